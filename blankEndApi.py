@@ -1,40 +1,80 @@
 import os
+import sys
+
+# --import-report：统计启动过程中各模块的导入耗时，需在其他导入之前安装
+if '--import-report' in sys.argv:
+    from src.import_timer import import_timer
+    import_timer.install()
+else:
+    import_timer = None
+
+import importlib
 from flask import Flask
 from flask_cors import CORS
-from src.config.config_v1 import configV1
-from src.web_side.youpin898.buy.buy_v1 import youpin898BuyV1
-from src.web_side.youpin898.lent.lent_v1 import youpin898LentV1
-from src.web_side.youpin898.sell.sell_v1 import youpin898SellV1
-from src.web_side.youpin898.message.message_v1 import youpin898MessageBoxV1
-from src.web_side.youpin898.select_weapon.select_weapon_v1 import youpin898SelectWeaponV1
-from src.web_side.webSide.web.index_page import indexPage
-from src.web_side.webSide.web.buy_page import webBuyV1
-from src.web_side.webSide.web.sell_page import webSellV1
-from src.web_side.webSide.web.lent import webLentV1
-from src.web_side.webSide.web.select_weapon import webSelectWeaponV1
-from src.web_side.webSide.DataSource_page import dataSourcePage
-from src.web_side.buff163.buy import buff163BuyV1
-from src.web_side.buff163.sell import buff163SellV1
-from src.web_side.buff163.select_weapon import buff163SelectWeaponV1
-from src.web_side.steam.market import steamMarketV1
-from src.web_side.steam.steam_inventory_history_api import steamInventoryHistoryV1
-from src.web_side.steam.inventory import steamInventoryV1
-from src.web_side.steam.select_weapon_hash_name import steamSelectWeaponHashNameV1
-from src.web_side.webSide.steamMarket import webSteamMarketV1
-from src.web_side.webSide.steamInventoryHistory import webSteamInventoryHistoryV1
-from src.web_side.webSide.buy_page import webBuyPageV1
-from src.web_side.webSide.sell_page import webSellPageV1
-from src.web_side.webSide.lent_page import webLentPageV1
-from src.web_side.webSide.inventory import webInventoryV1
-from src.web_side.webSide.stock_components import webStockComponentsV1
-from src.web_side.prefectWorld.prefectworld_config import prefectWorldConfigV1
-from src.web_side.prefectWorld.stock_components_api import prefectWorldStockComponentsV1
+from werkzeug.serving import run_simple
 from src.db_manager import init_database
+from src.db_manager.database import DatabaseManager
+from src.db_manager.index.weapon_catalog import weapon_catalog
+from src.web_side.lazy_app import LazyBlueprintDispatcher
+from src.read_conf import read_conf
+
+# 蓝图注册表：(模块路径, 蓝图变量名, URL 前缀)，按注册顺序
+BLUEPRINTS = [
+    ('src.config.config_v1', 'configV1', '/configV1'),
+    ('src.web_side.youpin898.buy.buy_v1', 'youpin898BuyV1', '/youpin898BuyV1'),
+    ('src.web_side.youpin898.sell.sell_v1', 'youpin898SellV1', '/youpin898SellV1'),
+    ('src.web_side.youpin898.lent.lent_v1', 'youpin898LentV1', '/youpin898LentV1'),
+    ('src.web_side.youpin898.message.message_v1', 'youpin898MessageBoxV1', '/youpin898MessageBoxV1'),
+    ('src.web_side.youpin898.select_weapon.select_weapon_v1', 'youpin898SelectWeaponV1', '/youpin898SelectWeaponV1'),
+    ('src.web_side.webSide.web.index_page', 'indexPage', '/indexPage'),
+    ('src.web_side.webSide.web.buy_page', 'webBuyV1', '/webBuyV1'),
+    ('src.web_side.webSide.web.sell_page', 'webSellV1', '/webSellV1'),
+    ('src.web_side.webSide.web.lent', 'webLentV1', '/webLentV1'),
+    ('src.web_side.webSide.web.select_weapon', 'webSelectWeaponV1', '/webSelectWeaponV1'),
+    ('src.web_side.webSide.DataSource_page', 'dataSourcePage', '/dataSourcePageV1'),
+    ('src.web_side.buff163.buy', 'buff163BuyV1', '/buff163BuyV1'),
+    ('src.web_side.buff163.sell', 'buff163SellV1', '/buff163SellV1'),
+    ('src.web_side.buff163.select_weapon', 'buff163SelectWeaponV1', '/buff163SelectWeaponV1'),
+    ('src.web_side.steam.market', 'steamMarketV1', '/steamMarketV1'),
+    ('src.web_side.steam.steam_inventory_history_api', 'steamInventoryHistoryV1', '/steamInventoryHistoryV1'),
+    ('src.web_side.steam.inventory', 'steamInventoryV1', '/api/v1/steam'),
+    ('src.web_side.steam.select_weapon_hash_name', 'steamSelectWeaponHashNameV1', '/steamSelectWeaponHashNameV1'),
+    ('src.web_side.webSide.steamMarket', 'webSteamMarketV1', '/webSteamMarketV1'),
+    ('src.web_side.webSide.steamInventoryHistory', 'webSteamInventoryHistoryV1', '/webSteamInventoryHistoryV1'),
+    ('src.web_side.webSide.buy_page', 'webBuyPageV1', '/webBuyPageV1'),
+    ('src.web_side.webSide.sell_page', 'webSellPageV1', '/webSellPageV1'),
+    ('src.web_side.webSide.lent_page', 'webLentPageV1', '/webLentPageV1'),
+    ('src.web_side.webSide.inventory', 'webInventoryV1', '/webInventoryV1'),
+    ('src.web_side.webSide.stock_components', 'webStockComponentsV1', '/webStockComponentsV1'),
+    ('src.web_side.prefectWorld.prefectworld_config', 'prefectWorldConfigV1', '/prefectWorldConfigV1'),
+    ('src.web_side.prefectWorld.stock_components_api', 'prefectWorldStockComponentsV1', '/prefectWorldStockComponentsV1'),
+]
+
+
+def create_app(debug=False):
+    """创建 Flask 应用（不含蓝图）"""
+    application = Flask(__name__)
+    application.debug = debug
+    CORS(application)
+    return application
+
 
-app = Flask(__name__)
-CORS(app)
+app = create_app()
 
-def blankEndApi():
+
+def register_blueprints(application):
+    """导入并注册全部蓝图"""
+    for module, name, prefix in BLUEPRINTS:
+        application.register_blueprint(getattr(importlib.import_module(module), name), url_prefix=prefix)
+
+
+def blankEndApi(lazy=False):
+    """
+    启动服务，conf.ini [server] mode 选择开发模式（默认）或生产模式
+
+    :param lazy: 按需加载蓝图：启动时不导入蓝图模块，前缀第一次被访问或后台预热时才导入
+    """
+    server = read_conf().server()
     # print("Blank End API Start")
     # 只在主进程中初始化数据库，避免Flask debug模式重复初始化
     if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
@@ -42,37 +82,76 @@ def blankEndApi():
         if not init_database():
             print("❌ 数据库初始化失败，程序退出")
             return
-    
-    app.register_blueprint(configV1, url_prefix = '/configV1')
-    app.register_blueprint(youpin898BuyV1, url_prefix = '/youpin898BuyV1')
-    app.register_blueprint(youpin898SellV1, url_prefix = '/youpin898SellV1')
-    app.register_blueprint(youpin898LentV1, url_prefix = '/youpin898LentV1')
-    app.register_blueprint(youpin898MessageBoxV1, url_prefix = '/youpin898MessageBoxV1')
-    app.register_blueprint(youpin898SelectWeaponV1, url_prefix = '/youpin898SelectWeaponV1')
-    app.register_blueprint(indexPage, url_prefix = '/indexPage')
-    app.register_blueprint(webBuyV1, url_prefix = '/webBuyV1')
-    app.register_blueprint(webSellV1, url_prefix = '/webSellV1')
-    app.register_blueprint(webLentV1, url_prefix = '/webLentV1')
-    app.register_blueprint(webSelectWeaponV1, url_prefix = '/webSelectWeaponV1')
-    app.register_blueprint(dataSourcePage, url_prefix='/dataSourcePageV1')
-    app.register_blueprint(buff163BuyV1, url_prefix = '/buff163BuyV1')
-    app.register_blueprint(buff163SellV1, url_prefix = '/buff163SellV1')
-    app.register_blueprint(buff163SelectWeaponV1, url_prefix = '/buff163SelectWeaponV1')
-    app.register_blueprint(steamMarketV1, url_prefix = '/steamMarketV1')
-    app.register_blueprint(steamInventoryHistoryV1, url_prefix = '/steamInventoryHistoryV1')
-    app.register_blueprint(steamInventoryV1, url_prefix = '/api/v1/steam')
-    app.register_blueprint(steamSelectWeaponHashNameV1, url_prefix = '/steamSelectWeaponHashNameV1')
-    app.register_blueprint(webSteamMarketV1, url_prefix = '/webSteamMarketV1')
-    app.register_blueprint(webSteamInventoryHistoryV1, url_prefix = '/webSteamInventoryHistoryV1')
-    app.register_blueprint(webBuyPageV1, url_prefix = '/webBuyPageV1')
-    app.register_blueprint(webSellPageV1, url_prefix = '/webSellPageV1')
-    app.register_blueprint(webLentPageV1, url_prefix = '/webLentPageV1')
-    app.register_blueprint(webInventoryV1, url_prefix = '/webInventoryV1')
-    app.register_blueprint(webStockComponentsV1, url_prefix = '/webStockComponentsV1')
-    app.register_blueprint(prefectWorldConfigV1, url_prefix = '/prefectWorldConfigV1')
-    app.register_blueprint(prefectWorldStockComponentsV1, url_prefix = '/prefectWorldStockComponentsV1')
-    app.run(debug=True, port=9001, host='0.0.0.0')
 
-if __name__ == '__main__':
-    blankEndApi()
+    if server['mode'] == 'production':
+        serve_production(server, lazy)
+        return
+
+    if lazy:
+        dispatcher = LazyBlueprintDispatcher(BLUEPRINTS, lambda: create_app(debug=True))
+        # 预热在提供服务的进程中进行（debug 模式下为重载器启动的子进程）；武器名称目录首次查询时也会自动加载
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            dispatcher.start_warm_up(after=_after_warm_up)
+        if import_timer is not None:
+            import_timer.report()
+        run_simple(server['host'], server['port'], dispatcher, use_reloader=True, use_debugger=True)
+        return
 
+    register_blueprints(app)
+    # 预先加载武器名称目录，自动完成查询不再访问数据库
+    weapon_catalog.load()
+    if import_timer is not None:
+        import_timer.report()
+    app.run(debug=True, port=server['port'], host=server['host'])
+
+
+def serve_production(server, lazy=False):
+    """
+    生产模式：waitress 线程池提供服务，不启用调试器和自动重载
+
+    waitress 为单进程多线程，写操作由 DatabaseManager 的单写线程合并提交，读操作并发执行；
+    数据版本号、武器名称目录等缓存都在进程内，不使用多进程。
+
+    :param server: read_conf().server() 返回的配置
+    :param lazy: 按需加载蓝图，启动后立即在后台预热
+    """
+    if lazy:
+        application = LazyBlueprintDispatcher(BLUEPRINTS, create_app)
+        application.start_warm_up(after=_after_warm_up)
+    else:
+        register_blueprints(app)
+        weapon_catalog.load()
+        application = app
+    if import_timer is not None:
+        import_timer.report()
+
+    pool_size = DatabaseManager().pool.max_size
+    if pool_size < server['threads']:
+        print(f"⚠️ 数据库连接池 pool_size={pool_size} 小于服务线程数 {server['threads']}，"
+              f"并发请求会等待空闲连接")
+
+    try:
+        from waitress import serve
+    except ImportError:
+        print("⚠️ 未安装 waitress（pip install waitress），使用 Werkzeug 多线程服务")
+        run_simple(server['host'], server['port'], application, threaded=True)
+        return
+
+    print(f"🚀 生产模式: http://{server['host']}:{server['port']} 线程 {server['threads']}, "
+          f"连接上限 {server['connection_limit']}, 监听队列 {server['backlog']}, "
+          f"keep-alive 超时 {server['channel_timeout']}s")
+    serve(application, host=server['host'], port=server['port'], threads=server['threads'],
+          connection_limit=server['connection_limit'], backlog=server['backlog'],
+          channel_timeout=server['channel_timeout'], ident='CSWeaponManager')
+
+
+def _after_warm_up():
+    """后台预热蓝图之后加载武器名称目录，并输出预热阶段的导入耗时"""
+    weapon_catalog.load()
+    if import_timer is not None:
+        import_timer.report()
+
+
+if __name__ == '__main__':
+    # --lazy：按需加载蓝图；--import-report：输出导入耗时统计
+    blankEndApi(lazy='--lazy' in sys.argv)
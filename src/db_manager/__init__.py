@@ -4,7 +4,9 @@
 提供现代化的对象关系映射和自动表结构管理
 """
 
-from .database import DatabaseManager
+from .database import DatabaseManager, TransactionRollback
+from .connection_pool import ConnectionPool
+from .writer import DatabaseWriter
 from .base_model import BaseModel
 from .manager import DBManager, init_database, get_db_manager
 
@@ -15,6 +17,9 @@ from .steam import SteamBuyModel, SteamSellModel, SteamInventoryHistoryModel, St
 
 __all__ = [
     'DatabaseManager', 
+    'ConnectionPool',
+    'DatabaseWriter',
+    'TransactionRollback',
     'BaseModel',
     'DBManager',
     'init_database',
@@ -3,29 +3,79 @@
 数据库模型基础类
 """
 
+import re
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Type
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Type
 from datetime import datetime
 from .database import DatabaseManager
+from .pagination import CursorPage, keyset_fetch
+from .record import make_record_class
+from .timestamps import epoch_sql, range_condition
+
+
+class ModelSchema:
+    """模型的编译后表结构，每个模型类只计算一次"""
+    
+    __slots__ = ('fields', 'columns', 'primary_keys', 'index', 'defaults', 'select_list', 'record', 'projections')
+    
+    def __init__(self, fields: Dict[str, Dict[str, Any]], model_name: str):
+        self.fields = fields
+        self.columns = tuple(fields)
+        self.primary_keys = tuple(name for name, field_def in fields.items() if field_def.get('primary_key', False))
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.defaults = tuple(field_def.get('default') for field_def in fields.values())
+        # 只读查询按字段定义的顺序显式列出各列，与记录类的属性一一对应
+        self.select_list = ', '.join(f"[{name}]" for name in self.columns)
+        self.record = make_record_class(f"{model_name}Record", self.columns)
+        self.projections = {}
+    
+    def projection(self, columns: Sequence[str]) -> Tuple[str, type]:
+        """获取只包含指定列的 (SELECT 列表, 记录类)，按列组合缓存；列不存在时抛出 ValueError"""
+        key = tuple(columns)
+        cached = self.projections.get(key)
+        if cached is None:
+            if not key:
+                raise ValueError("columns 不能为空")
+            for name in key:
+                if name not in self.index:
+                    raise ValueError(f"字段 {name} 不存在")
+            record = make_record_class(self.record.__name__, key)
+            cached = self.projections[key] = (', '.join(f"[{name}]" for name in key), record)
+        return cached
 
 
 class BaseModel(ABC):
     """数据库模型基础类"""
     
+    _schema: ModelSchema = None
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 字段定义是静态的，在类创建时编译一次；抽象的中间类不编译
+        if not getattr(cls.get_fields, '__isabstractmethod__', False):
+            cls._schema = ModelSchema(cls.get_fields(), cls.__name__)
+    
     def __init__(self, **kwargs):
         """初始化模型实例"""
-        self.db = DatabaseManager()
-        self._data = {}
-        self._original_data = {}
-        
-        # 设置字段值
-        for field_name, field_def in self.get_fields().items():
-            value = kwargs.get(field_name, field_def.get('default'))
+        data = {}
+        for field_name, default in zip(self._schema.columns, self._schema.defaults):
+            value = kwargs.get(field_name, default)
             # 处理空字符串，将其转换为 None
             if isinstance(value, str) and value.strip() == '':
                 value = None
-            self._data[field_name] = value
-            self._original_data[field_name] = value
+            data[field_name] = value
+        self._data = data
+        self._original_data = data.copy()
+        self._loaded = False
+    
+    @property
+    def db(self) -> DatabaseManager:
+        return DatabaseManager()
+    
+    @classmethod
+    def get_db(cls) -> DatabaseManager:
+        """获取数据库管理器（单例）"""
+        return DatabaseManager()
     
     @classmethod
     @abstractmethod
@@ -44,17 +94,52 @@ class BaseModel(ABC):
         """获取索引定义"""
         return []
     
+    @classmethod
+    def get_triggers(cls) -> List[Dict[str, Any]]:
+        """获取触发器定义，格式: [{'name': 触发器名, 'sql': 'CREATE TRIGGER IF NOT EXISTS ...'}]"""
+        return []
+    
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        """获取需要规范化的时间列，格式: {文本时间列: 整数时间戳列}
+        
+        时间戳列需要同时在 get_fields() 中定义（INTEGER，放在最后）并在 get_indexes() 中建索引，
+        由触发器在写入时维护，见 timestamps 模块
+        """
+        return {}
+    
+    @classmethod
+    def _time_triggers(cls) -> List[Dict[str, Any]]:
+        """维护时间戳列的触发器：插入后、时间列更新后重新换算"""
+        table = cls.get_table_name()
+        triggers = []
+        for column, ts_column in cls.get_time_columns().items():
+            body = (f"BEGIN UPDATE {table} SET [{ts_column}] = {epoch_sql(f'NEW.[{column}]')} "
+                    f"WHERE rowid = NEW.rowid; END")
+            triggers.append({
+                'name': f"{table}_{ts_column}_ai",
+                'sql': f"CREATE TRIGGER IF NOT EXISTS {table}_{ts_column}_ai AFTER INSERT ON {table} {body}"
+            })
+            triggers.append({
+                'name': f"{table}_{ts_column}_au",
+                'sql': f"CREATE TRIGGER IF NOT EXISTS {table}_{ts_column}_au "
+                       f"AFTER UPDATE OF [{column}] ON {table} {body}"
+            })
+        return triggers
+    
     def __getattr__(self, name: str):
         """获取字段值"""
+        if name.startswith('_'):
+            raise AttributeError(name)
         if name in self._data:
             return self._data[name]
         raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
     
     def __setattr__(self, name: str, value):
         """设置字段值"""
-        if name.startswith('_') or name in ['db']:
+        if name.startswith('_'):
             super().__setattr__(name, value)
-        elif hasattr(self, '_data') and name in self.get_fields():
+        elif name in self._schema.index and '_data' in self.__dict__:
             # 处理空字符串，将其转换为 None
             if isinstance(value, str) and value.strip() == '':
                 value = None
@@ -66,13 +151,102 @@ class BaseModel(ABC):
         """转换为字典"""
         return self._data.copy()
     
-    def save(self) -> bool:
-        """保存到数据库"""
+    def save(self, mode: str = 'auto') -> bool:
+        """保存到数据库
+        
+        mode='auto'：先查询记录是否存在，再执行 INSERT 或 UPDATE；
+        mode='upsert'：不查询，直接执行一条 INSERT ... ON CONFLICT DO UPDATE，见 upsert()
+        """
+        if mode == 'upsert':
+            return self.upsert()
+        if mode != 'auto':
+            raise ValueError(f"不支持的保存模式: {mode}")
         if self._is_new_record():
             return self._insert()
         else:
             return self._update()
     
+    def upsert(self) -> bool:
+        """插入或更新（一条 INSERT ... ON CONFLICT(主键) DO UPDATE 语句，不做存在性查询）
+        
+        从数据库读出的实例冲突时只更新修改过的字段；新建的实例冲突时更新所有有值的非主键字段。
+        """
+        primary_keys = self._get_primary_keys()
+        if not primary_keys or any(not self._data.get(key) for key in primary_keys):
+            return self._insert()
+        
+        values = {name: value for name, value in self._data.items() if value is not None}
+        if self._loaded:
+            update_columns = [name for name, value in self._data.items()
+                              if name not in primary_keys and value != self._original_data.get(name)]
+            if not update_columns:
+                return True  # 没有更改
+            # 修改为 NULL 的字段也要出现在 INSERT 列中，excluded 才能取到新值
+            for name in update_columns:
+                values[name] = self._data[name]
+        else:
+            update_columns = [name for name in values if name not in primary_keys]
+        
+        sql = self._upsert_sql(tuple(values), update_columns)
+        
+        try:
+            self.db.execute_update(sql, tuple(values.values()))
+            self._original_data = self._data.copy()
+            self._loaded = True
+            return True
+        except Exception as e:
+            print(f"写入记录失败: {e}")
+            return False
+    
+    @classmethod
+    def _upsert_sql(cls, columns: Sequence[str], update_columns: Sequence[str], update: bool = True) -> str:
+        """生成 INSERT ... ON CONFLICT(主键) DO UPDATE / DO NOTHING 语句"""
+        escaped_fields = ', '.join(f'[{name}]' for name in columns)
+        placeholders = ', '.join('?' * len(columns))
+        conflict = ', '.join(f'[{key}]' for key in cls._schema.primary_keys)
+        if update and update_columns:
+            assignments = ', '.join(f'[{name}] = excluded.[{name}]' for name in update_columns)
+            action = f"DO UPDATE SET {assignments}"
+        else:
+            action = "DO NOTHING"
+        return (f"INSERT INTO {cls.get_table_name()} ({escaped_fields}) VALUES ({placeholders}) "
+                f"ON CONFLICT({conflict}) {action}")
+    
+    @classmethod
+    def upsert_many(cls, rows, update: bool = True) -> int:
+        """批量插入或更新，在一个事务中按列组合分组 executemany
+        
+        :param rows: 字典（键为字段名，只写入给出的字段）或模型实例（只写入有值的字段）的列表
+        :param update: False 时主键冲突的行保持不变（ON CONFLICT DO NOTHING）
+        :return: 插入或更新的行数；update=False 时为新插入的行数
+        """
+        if not cls._schema.primary_keys:
+            raise ValueError(f"表 {cls.get_table_name()} 没有主键，不能 upsert")
+        
+        # 列组合相同的行共用一条语句
+        groups: Dict[Tuple[str, ...], List[tuple]] = {}
+        for row in rows:
+            if isinstance(row, BaseModel):
+                values = {name: value for name, value in row._data.items() if value is not None}
+            else:
+                values = {}
+                for name, value in row.items():
+                    if name not in cls._schema.index:
+                        raise ValueError(f"字段 {name} 不存在")
+                    # 处理空字符串，将其转换为 None
+                    if isinstance(value, str) and value.strip() == '':
+                        value = None
+                    values[name] = value
+            groups.setdefault(tuple(values), []).append(tuple(values.values()))
+        
+        affected = 0
+        db = cls.get_db()
+        with db.transaction():
+            for columns, params_list in groups.items():
+                update_columns = [name for name in columns if name not in cls._schema.primary_keys]
+                affected += db.execute_many(cls._upsert_sql(columns, update_columns, update), params_list)
+        return affected
+    
     def delete(self) -> bool:
         """从数据库删除"""
         primary_keys = self._get_primary_keys()
@@ -141,6 +315,7 @@ class BaseModel(ABC):
             self.db.execute_insert(sql, tuple(params))
             # 更新原始数据
             self._original_data = self._data.copy()
+            self._loaded = True
             return True
         except Exception as e:
             print(f"插入记录失败: {e}")
@@ -182,6 +357,7 @@ class BaseModel(ABC):
             if affected_rows > 0:
                 # 更新原始数据
                 self._original_data = self._data.copy()
+                self._loaded = True
                 return True
             return False
         except Exception as e:
@@ -190,17 +366,12 @@ class BaseModel(ABC):
     
     def _get_primary_keys(self) -> List[str]:
         """获取主键字段"""
-        primary_keys = []
-        for field_name, field_def in self.get_fields().items():
-            if field_def.get('primary_key', False):
-                primary_keys.append(field_name)
-        return primary_keys
+        return list(self._schema.primary_keys)
     
     @classmethod
     def find_by_id(cls, **primary_key_values):
         """根据主键查找记录"""
-        instance = cls()
-        primary_keys = instance._get_primary_keys()
+        primary_keys = cls._schema.primary_keys
         
         if not primary_keys or len(primary_key_values) != len(primary_keys):
             return None
@@ -216,7 +387,7 @@ class BaseModel(ABC):
         sql = f"SELECT * FROM {cls.get_table_name()} WHERE {' AND '.join(where_conditions)} LIMIT 1"
         
         try:
-            result = instance.db.execute_query(sql, tuple(params))
+            result = cls.get_db().execute_query(sql, tuple(params))
             if result:
                 return cls._create_from_row(result[0])
             return None
@@ -225,9 +396,30 @@ class BaseModel(ABC):
             return None
     
     @classmethod
-    def find_all(cls, where: str = "", params: tuple = (), limit: int = None, offset: int = None):
-        """查找多条记录"""
-        sql = f"SELECT * FROM {cls.get_table_name()}"
+    def find_all(cls, where: str = "", params: tuple = (), limit: int = None, offset: int = None,
+                 order_by: str = None, descending: bool = False, cursor: str = None,
+                 readonly: bool = False, columns: Optional[Sequence[str]] = None,
+                 rowid_descending: Optional[bool] = None):
+        """查找多条记录
+        
+        传入 order_by 时使用游标分页：按 (order_by, rowid) 排序，返回 CursorPage，
+        其 next_cursor 传回 cursor 参数即可读取下一页。此时 where 中不能包含 ORDER BY，
+        offset 被忽略，limit 为每页条数（默认 20）。游标无效时抛出 ValueError。
+        rowid 默认与 order_by 同向，rowid_descending 可单独指定，使游标分页与
+        "ORDER BY order_by DESC, rowid ASC" 这类偏移分页的顺序一致。
+        
+        readonly=True 时返回只读记录（cls._schema.record），按列名属性访问、支持 to_dict()，
+        不能修改或 save()，适合只用于展示的批量查询。
+        
+        columns 指定要读取的列（如 ('ID',)）时只查询这些列，返回只包含这些列的只读记录；
+        列名不存在时抛出 ValueError。
+        """
+        if order_by:
+            return cls._find_page(where, params, limit or 20, order_by, descending, cursor, readonly, columns,
+                                  rowid_descending)
+        
+        select_list, create = cls._row_factory(readonly, columns)
+        sql = f"SELECT {select_list} FROM {cls.get_table_name()}"
         
         if where:
             sql += f" WHERE {where}"
@@ -238,44 +430,127 @@ class BaseModel(ABC):
                 sql += f" OFFSET {offset}"
         
         try:
-            instance = cls()
-            result = instance.db.execute_query(sql, params)
-            return [cls._create_from_row(row) for row in result]
+            result = cls.get_db().execute_query(sql, params)
+            return [create(row) for row in result]
         except Exception as e:
             print(f"查找记录失败: {e}")
             return []
     
+    @classmethod
+    def _row_factory(cls, readonly: bool, columns: Optional[Sequence[str]]):
+        """根据 readonly / columns 返回 (SELECT 列表, 行转换函数)"""
+        if columns:
+            select_list, record = cls._schema.projection(columns)
+            return select_list, record._make
+        if readonly:
+            return cls._schema.select_list, cls._schema.record._make
+        return '*', cls._create_from_row
+    
+    @classmethod
+    def _find_page(cls, where: str, params: tuple, limit: int, order_by: str,
+                   descending: bool, cursor: Optional[str], readonly: bool = False,
+                   columns: Optional[Sequence[str]] = None,
+                   rowid_descending: Optional[bool] = None) -> CursorPage:
+        """游标分页查询"""
+        if order_by != 'rowid' and order_by not in cls._schema.index:
+            raise ValueError(f"排序字段 {order_by} 不存在")
+        sort_key = 'rowid' if order_by == 'rowid' else f"[{order_by}]"
+        select_list, create = cls._row_factory(readonly, columns)
+        
+        try:
+            rows, next_cursor = keyset_fetch(
+                DatabaseManager(), select_list, cls.get_table_name(),
+                where, params, sort_key, descending, cursor, limit,
+                rowid_descending=rowid_descending
+            )
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"查找记录失败: {e}")
+            return CursorPage()
+        return CursorPage([create(row) for row in rows], next_cursor)
+    
+    @classmethod
+    def time_range(cls, column: str, start: Any = None, end: Any = None) -> Tuple[str, List[Any]]:
+        """
+        生成时间范围条件，在时间戳列上比较（可走索引），代替 DATE(column) BETWEEN ? AND ?
+        
+        :param column: 文本时间列（需在 get_time_columns() 中）
+        :param start: 开始日期 / 时间（含），None 表示不限
+        :param end: 结束日期 / 时间（含）；只有日期时包含当天全天，None 表示不限
+        :return: (条件, 参数)；日期无法解析时参数为 NULL，不匹配任何行
+        """
+        ts_column = cls.get_time_columns().get(column)
+        if ts_column is None:
+            raise ValueError(f"字段 {column} 没有时间戳列")
+        return range_condition(f"[{ts_column}]", start, end)
+    
     @classmethod
     def count(cls, where: str = "", params: tuple = ()) -> int:
         """统计记录数"""
-        sql = f"SELECT COUNT(*) FROM {cls.get_table_name()}"
+        return cls.aggregate(where, params, count=True)['count']
+    
+    @classmethod
+    def aggregate(cls, where: str = "", params: tuple = (), count: bool = False,
+                  sum: Any = None, avg: Any = None, min: Any = None, max: Any = None) -> Dict[str, Any]:
+        """在数据库中计算聚合值，不加载记录
+        
+        sum / avg / min / max 传列名或列名列表，结果键为 "函数_列名"，count=True 时结果键为 "count"。
+        例如 aggregate("data_user = ?", (user,), count=True, sum='price')
+        返回 {'count': 12, 'sum_price': 345.6}。
+        没有匹配记录时 count 和 sum 为 0，avg / min / max 为 None；查询失败时同样返回这些默认值。
+        """
+        expressions = []
+        defaults = {}
+        if count:
+            expressions.append("COUNT(*)")
+            defaults['count'] = 0
+        for func, columns in (('sum', sum), ('avg', avg), ('min', min), ('max', max)):
+            if not columns:
+                continue
+            for column in ([columns] if isinstance(columns, str) else columns):
+                if column not in cls._schema.index:
+                    raise ValueError(f"字段 {column} 不存在")
+                expressions.append(f"{func.upper()}([{column}])")
+                defaults[f"{func}_{column}"] = 0 if func == 'sum' else None
+        if not expressions:
+            raise ValueError("至少需要一个聚合项")
+        
+        sql = f"SELECT {', '.join(expressions)} FROM {cls.get_table_name()}"
         
         if where:
             sql += f" WHERE {where}"
         
         try:
-            instance = cls()
-            result = instance.db.execute_query(sql, params)
-            return result[0][0] if result else 0
+            row = cls.get_db().execute_query(sql, params)[0]
         except Exception as e:
             print(f"统计记录失败: {e}")
-            return 0
+            return defaults
+        
+        result = {}
+        for (key, default), value in zip(defaults.items(), row):
+            result[key] = default if value is None else value
+        return result
     
     @classmethod
     def _create_from_row(cls, row: tuple):
         """从数据库行创建模型实例"""
-        fields = list(cls.get_fields().keys())
-        kwargs = {}
-        for i, field_name in enumerate(fields):
-            if i < len(row):
-                value = row[i]
-                # 处理空字符串，将其转换为 None
-                if isinstance(value, str) and value.strip() == '':
-                    value = None
-                kwargs[field_name] = value
-        
-        instance = cls(**kwargs)
-        instance._original_data = instance._data.copy()
+        schema = cls._schema
+        values = row[:len(schema.columns)]
+        data = dict(zip(schema.columns, values))
+        # 处理空字符串，将其转换为 None；行比字段少时缺失的字段取默认值
+        for field_name, value in data.items():
+            if isinstance(value, str) and value.strip() == '':
+                data[field_name] = None
+        if len(values) < len(schema.columns):
+            for field_name, default in zip(schema.columns[len(values):], schema.defaults[len(values):]):
+                data[field_name] = default
+        
+        # 跳过 __init__，直接挂上数据
+        instance = cls.__new__(cls)
+        instance._data = data
+        instance._original_data = data.copy()
+        instance._loaded = True
         return instance
     
     @classmethod
@@ -283,21 +558,69 @@ class BaseModel(ABC):
         """确保表存在，如果不存在则创建"""
         db = DatabaseManager()
         
+        # 时间戳触发器是新建的（新增时间戳列或触发器被删除过）时需要回填已有数据
+        existing_triggers = {row[0] for row in db.execute_query("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        needs_backfill = any(trigger['name'] not in existing_triggers for trigger in cls._time_triggers())
+        
         if db.table_exists(cls.get_table_name()):
             # 检查字段是否完整
-            return cls._check_and_update_table_structure()
+            ok = cls._check_and_update_table_structure()
         else:
             # 创建新表
-            return cls._create_table()
+            ok = cls._create_table()
+        
+        if not (ok and cls._ensure_triggers()):
+            return False
+        if needs_backfill:
+            cls.backfill_time_columns()
+        return True
     
     @classmethod
-    def _create_table(cls) -> bool:
-        """创建表"""
+    def backfill_time_columns(cls) -> int:
+        """按时间列重新计算全部时间戳列，返回更新的行数"""
+        time_columns = cls.get_time_columns()
+        if not time_columns:
+            return 0
+        assignments = ', '.join(f"[{ts_column}] = {epoch_sql(f'[{column}]')}"
+                                for column, ts_column in time_columns.items())
+        with DatabaseManager().transaction() as conn:
+            updated = conn.execute(f"UPDATE {cls.get_table_name()} SET {assignments}").rowcount
+        if updated:
+            print(f"✅ 表 {cls.get_table_name()} 时间戳列回填完成: {updated} 行")
+        return updated
+    
+    @staticmethod
+    def _normalize_trigger_sql(sql: str) -> str:
+        """sqlite_master 中保存的触发器 SQL 去掉了 IF NOT EXISTS，比较前统一格式"""
+        return ' '.join(re.sub(r'(?i)\bIF\s+NOT\s+EXISTS\b', '', sql).split())
+    
+    @classmethod
+    def _outdated_triggers(cls) -> List[Dict[str, Any]]:
+        """缺失或定义已变化的触发器"""
         db = DatabaseManager()
-        
-        # 转换字段定义格式
+        existing = dict(db.execute_query("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"))
+        return [trigger for trigger in cls.get_triggers() + cls._time_triggers()
+                if trigger['name'] not in existing
+                or cls._normalize_trigger_sql(existing[trigger['name']]) != cls._normalize_trigger_sql(trigger['sql'])]
+    
+    @classmethod
+    def _ensure_triggers(cls) -> bool:
+        """创建缺失的触发器，定义已变化的触发器删除后重建"""
+        db = DatabaseManager()
+        for trigger in cls._outdated_triggers():
+            try:
+                db.execute_update(f"DROP TRIGGER IF EXISTS {trigger['name']}")
+                db.execute_update(trigger['sql'])
+            except Exception as e:
+                print(f"创建触发器 {trigger['name']} 失败: {e}")
+                return False
+        return True
+    
+    @classmethod
+    def _column_list(cls) -> List[Dict[str, Any]]:
+        """字段定义转换为 DatabaseManager.create_table / rebuild_table 的列格式"""
         columns = []
-        for field_name, field_def in cls.get_fields().items():
+        for field_name, field_def in cls._schema.fields.items():
             columns.append({
                 'name': field_name,
                 'type': field_def['type'],
@@ -305,8 +628,13 @@ class BaseModel(ABC):
                 'not_null': field_def.get('not_null', False),
                 'default': field_def.get('default')
             })
-        
-        return db.create_table(cls.get_table_name(), columns, cls.get_indexes())
+        return columns
+    
+    @classmethod
+    def _create_table(cls) -> bool:
+        """创建表"""
+        db = DatabaseManager()
+        return db.create_table(cls.get_table_name(), cls._column_list(), cls.get_indexes())
     
     @classmethod
     def _check_and_update_table_structure(cls) -> bool:
@@ -317,7 +645,7 @@ class BaseModel(ABC):
         existing_columns = {col['name']: col for col in db.get_table_columns(cls.get_table_name())}
         
         # 检查缺失的列
-        for field_name, field_def in cls.get_fields().items():
+        for field_name, field_def in cls._schema.fields.items():
             if field_name not in existing_columns:
                 print(f"表 {cls.get_table_name()} 缺少字段 {field_name}，正在添加...")
                 column_def = {
@@ -331,4 +659,22 @@ class BaseModel(ABC):
                     print(f"添加字段 {field_name} 失败")
                     return False
         
+        # 字段类型变化（例如价格列由 TEXT 改为 REAL）时重建表并转换已有数据
+        changed = [
+            field_name for field_name, field_def in cls._schema.fields.items()
+            if field_name in existing_columns
+            and existing_columns[field_name]['type'].upper() != field_def['type'].upper()
+        ]
+        if changed:
+            print(f"表 {cls.get_table_name()} 字段类型变化 {', '.join(changed)}，正在重建表...")
+            if not db.rebuild_table(cls.get_table_name(), cls._column_list()):
+                return False
+        
+        # 补建后来新增的索引
+        try:
+            db.create_indexes(cls.get_table_name(), cls.get_indexes())
+        except Exception as e:
+            print(f"创建表 {cls.get_table_name()} 的索引失败: {e}")
+            return False
+        
         return True
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+ORM 行对象构建微基准
+
+用法:
+    python -m src.db_manager.benchmark [行数]
+
+不读写数据库，只对内存中构造的行元组测量 _create_from_row 的耗时，
+并与编译表结构之前的实现（每行调用 get_fields()、经过 __init__ 并创建 DatabaseManager）对比；
+同时用 tracemalloc 对比模型实例与只读记录（find_all(readonly=True)）保存全部行的内存占用。
+"""
+
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Type
+
+from .base_model import BaseModel
+from .database import DatabaseManager
+from .index.buy import BuyModel
+from .steam.steam_inventory_history import SteamInventoryHistoryModel
+
+
+def _legacy_create_from_row(cls: Type[BaseModel], row: tuple):
+    """编译表结构之前的实现，仅作基准对照"""
+    fields = list(cls.get_fields().keys())
+    kwargs = {}
+    for i, field_name in enumerate(fields):
+        if i < len(row):
+            value = row[i]
+            if isinstance(value, str) and value.strip() == '':
+                value = None
+            kwargs[field_name] = value
+
+    instance = cls.__new__(cls)
+    object.__setattr__(instance, '_db', DatabaseManager())
+    instance._data = {}
+    instance._original_data = {}
+    for field_name, field_def in cls.get_fields().items():
+        value = kwargs.get(field_name, field_def.get('default'))
+        if isinstance(value, str) and value.strip() == '':
+            value = None
+        instance._data[field_name] = value
+        instance._original_data[field_name] = value
+    instance._original_data = instance._data.copy()
+    return instance
+
+
+def _sample_rows(cls: Type[BaseModel], count: int) -> List[tuple]:
+    """按字段类型构造样例行"""
+    row = []
+    for i, field_def in enumerate(cls.get_fields().values()):
+        field_type = field_def['type'].upper()
+        if field_type in ('REAL', 'INTEGER'):
+            row.append(i * 1.5)
+        else:
+            row.append(f"value_{i}")
+    return [tuple(row)] * count
+
+
+def _measure(label: str, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def _measure_memory(label: str, func: Callable[[], object], count: int) -> int:
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"  {label:<28} {size / 1024 / 1024:9.1f} MB ({size // count} B/行)")
+    return size
+
+
+def run(count: int = 10000):
+    DatabaseManager()  # 预先初始化单例，不计入耗时
+    for model in (BuyModel, SteamInventoryHistoryModel):
+        rows = _sample_rows(model, count)
+        print(f"{model.get_table_name()} - {count} 行, {len(model._schema.columns)} 列")
+        legacy = _measure('逐行 get_fields() (旧)', lambda: [_legacy_create_from_row(model, r) for r in rows])
+        compiled = _measure('编译表结构 _create_from_row', lambda: [model._create_from_row(r) for r in rows])
+        readonly = _measure('只读记录 record._make', lambda: [model._schema.record._make(r) for r in rows])
+        print(f"  提升 {legacy / compiled:.1f}x / {legacy / readonly:.1f}x")
+        # 内存测量不计入行元组本身，只比较额外构建的对象
+        model_size = _measure_memory('模型实例内存', lambda: [model._create_from_row(r) for r in rows], count)
+        record_size = _measure_memory('只读记录内存', lambda: [model._schema.record._make(r) for r in rows], count)
+        print(f"  内存减少 {model_size / record_size:.1f}x")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
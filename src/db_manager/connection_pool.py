@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 连接池
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+
+class ConnectionPool:
+    """SQLite 连接池 - 有界、带健康检查和空闲回收"""
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 30.0,
+                 idle_timeout: float = 300.0, health_check_interval: float = 30.0,
+                 on_connect: Optional[Callable[[sqlite3.Connection], None]] = None):
+        """
+        :param db_path: 数据库文件路径
+        :param max_size: 同时打开的最大连接数
+        :param timeout: 连接池耗尽时等待空闲连接的秒数，同时作为 sqlite busy timeout
+        :param idle_timeout: 空闲超过该秒数的连接会被关闭
+        :param health_check_interval: 空闲超过该秒数的连接在取出时先做一次 SELECT 1 检查
+        :param on_connect: 新连接创建后执行一次的回调（用于设置 PRAGMA）
+        """
+        self.db_path = db_path
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect
+
+        self._idle = deque()  # (conn, last_used)，右端为最近归还的连接
+        self._size = 0        # 当前已打开的连接数（空闲 + 使用中）
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建新连接并执行一次初始化回调"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout)
+        try:
+            if self.on_connect:
+                self.on_connect(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """健康检查"""
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _evict_idle(self, now: float):
+        """关闭空闲超时的连接（调用方需持有锁）"""
+        # 最久未使用的连接在左端
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._close_quietly(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """从池中取出一个连接，池耗尽时阻塞等待"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("连接池已关闭")
+
+                now = time.monotonic()
+                self._evict_idle(now)
+
+                if self._idle:
+                    # 优先复用最近归还的连接，页缓存最热
+                    conn, last_used = self._idle.pop()
+                    need_check = now - last_used > self.health_check_interval
+                elif self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    need_check = False
+                else:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise sqlite3.OperationalError(
+                            f"获取数据库连接超时 (connection pool timed out, max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            # 建立连接和健康检查不占用锁
+            if conn is None:
+                try:
+                    return self._create_connection()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if not need_check or self._is_healthy(conn):
+                return conn
+
+            # 连接已失效，丢弃后重新获取
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+
+    def release(self, conn: sqlite3.Connection):
+        """归还连接"""
+        # 回滚调用方遗留的未提交事务，避免污染下一个使用者
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            if self._closed or not healthy:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                now = time.monotonic()
+                self._idle.append((conn, now))
+                self._evict_idle(now)
+            self._cond.notify()
+
+    def discard(self, conn: sqlite3.Connection):
+        """丢弃一个损坏的连接（不归还到池中）"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """关闭所有空闲连接并拒绝后续获取"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池状态"""
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'open': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle)
+            }
@@ -10,6 +10,13 @@ import threading
 from contextlib import contextmanager
 from typing import List, Dict, Any, Optional, Tuple
 from ..read_conf import read_conf
+from .connection_pool import ConnectionPool
+from .prices import price_sql
+from .writer import DatabaseWriter
+
+
+class TransactionRollback(Exception):
+    """在 transaction() 块内抛出，回滚当前事务（或保存点）且不向外传播"""
 
 
 class DatabaseManager:
@@ -29,6 +36,10 @@ class DatabaseManager:
         if not hasattr(self, 'initialized'):
             self.config = read_conf()
             self.db_path = self._get_db_path()
+            self._local = threading.local()
+            self.pool = self._create_pool()
+            # 单写线程：进程内所有写操作都在它独占的写连接上执行，读操作使用连接池
+            self.writer = self._create_writer()
             self.initialized = True
             self._setup_database()
     
@@ -46,26 +57,158 @@ class DatabaseManager:
             sqlite_file = os.path.join(base_path, sqlite_file)
         return sqlite_file
     
+    def _create_pool(self) -> ConnectionPool:
+        """根据配置创建连接池"""
+        conf = self.config.config
+        return ConnectionPool(
+            self.db_path,
+            max_size=conf.getint('database', 'pool_size', fallback=8),
+            timeout=conf.getfloat('database', 'pool_timeout', fallback=30.0),
+            idle_timeout=conf.getfloat('database', 'pool_idle_timeout', fallback=300.0),
+            health_check_interval=conf.getfloat('database', 'pool_health_check_interval', fallback=30.0),
+            on_connect=self._configure_connection
+        )
+    
+    def _create_writer(self) -> DatabaseWriter:
+        """根据配置创建单写线程（第一次写入时启动）"""
+        conf = self.config.config
+        return DatabaseWriter(
+            self._create_write_connection,
+            max_batch=conf.getint('database', 'writer_batch_size', fallback=256),
+            max_delay=conf.getfloat('database', 'writer_max_delay_ms', fallback=0.0) / 1000
+        )
+    
+    def _create_write_connection(self) -> sqlite3.Connection:
+        """写线程独占的写连接"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.pool.timeout)
+        self._configure_connection(conn)
+        return conn
+    
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """新连接的连接级 PRAGMA，每个连接只执行一次"""
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=1000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA foreign_keys=ON')
+    
     def _setup_database(self):
         """设置数据库配置"""
         print(f"📁 数据库文件路径: {self.db_path}")
         with self.get_connection() as conn:
-            # 启用 WAL 模式以减少锁定问题
+            # 启用 WAL 模式以减少锁定问题（数据库级设置，持久化到文件）
             conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA synchronous=NORMAL')
-            conn.execute('PRAGMA cache_size=1000')
-            conn.execute('PRAGMA temp_store=MEMORY')
-            conn.execute('PRAGMA foreign_keys=ON')
             conn.commit()
     
     @contextmanager
     def get_connection(self):
-        """获取数据库连接上下文管理器"""
-        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        """获取数据库连接上下文管理器
+        
+        同一线程内嵌套调用复用同一个连接，最外层退出时归还到连接池。
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None:
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+        
+        conn = self.pool.acquire()
+        local.conn = conn
+        local.depth = 1
+        broken = False
         try:
             yield conn
+        except sqlite3.DatabaseError as e:
+            # 连接级错误（如文件损坏、磁盘 I/O 错误）不应回到池中
+            broken = not isinstance(e, (sqlite3.IntegrityError, sqlite3.OperationalError, sqlite3.ProgrammingError))
+            raise
         finally:
-            conn.close()
+            local.conn = None
+            local.depth = 0
+            if broken:
+                self.pool.discard(conn)
+            else:
+                self.pool.release(conn)
+    
+    def close(self):
+        """停止写线程，关闭连接池中的所有连接"""
+        self.writer.close()
+        self.pool.close_all()
+    
+    def in_transaction(self) -> bool:
+        """当前线程是否处于 transaction() 块内"""
+        return getattr(self._local, 'tx_depth', 0) > 0
+    
+    @contextmanager
+    def transaction(self):
+        """工作单元：块内的所有写操作在同一个连接上执行，退出时一次提交
+        
+        BaseModel.save()、Date_base 以及 execute_* 系列方法在块内会自动加入当前事务，
+        不再各自提交。嵌套调用使用 SAVEPOINT，内层失败只回滚内层。
+        块内抛出 TransactionRollback 可回滚当前层且不向外传播。
+        最外层事务借用写线程的写连接，块内本线程的读写都使用该连接，其他线程的写任务排队等待。
+        
+        用法:
+            with db.transaction():
+                record_a.save()
+                record_b.save()
+        """
+        local = self._local
+        depth = getattr(local, 'tx_depth', 0)
+        if depth > 0:
+            with self.get_connection() as conn, self._transaction_scope(conn, depth):
+                yield conn
+            return
+        
+        with self.writer.lease() as conn:
+            previous = (getattr(local, 'conn', None), getattr(local, 'depth', 0))
+            local.conn, local.depth = conn, 1
+            try:
+                with self._transaction_scope(conn, depth):
+                    yield conn
+            finally:
+                local.conn, local.depth = previous
+    
+    @contextmanager
+    def _transaction_scope(self, conn: sqlite3.Connection, depth: int):
+        """开始事务（depth 为 0）或保存点，退出时提交 / 释放，异常时回滚"""
+        local = self._local
+        savepoint = f"sp_{depth}"
+        if depth == 0:
+            # 立即获取写锁，避免读锁升级为写锁时的 SQLITE_BUSY
+            conn.execute('BEGIN IMMEDIATE')
+        else:
+            conn.execute(f'SAVEPOINT {savepoint}')
+        local.tx_depth = depth + 1
+        
+        try:
+            yield
+        except BaseException as e:
+            local.tx_depth = depth
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f'ROLLBACK TO {savepoint}')
+                conn.execute(f'RELEASE {savepoint}')
+            if not isinstance(e, TransactionRollback):
+                raise
+        else:
+            local.tx_depth = depth
+            if depth == 0:
+                conn.commit()
+            else:
+                conn.execute(f'RELEASE {savepoint}')
+    
+    def _write(self, method: str, sql: str, params):
+        """事务内的写语句加入当前事务；事务外交给写线程，与其他线程的写操作合并提交后返回游标"""
+        if self.in_transaction():
+            with self.get_connection() as conn:
+                return getattr(conn.cursor(), method)(sql, params)
+        return getattr(self.writer, method)(sql, params).result()
     
     def execute_query(self, sql: str, params: tuple = ()) -> List[tuple]:
         """执行查询语句"""
@@ -76,27 +219,15 @@ class DatabaseManager:
     
     def execute_update(self, sql: str, params: tuple = ()) -> int:
         """执行更新语句，返回受影响的行数"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
-            conn.commit()
-            return cursor.rowcount
+        return self._write('execute', sql, params).rowcount
     
     def execute_insert(self, sql: str, params: tuple = ()) -> Optional[int]:
         """执行插入语句，返回最后插入的行ID"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
-            conn.commit()
-            return cursor.lastrowid
+        return self._write('execute', sql, params).lastrowid
     
     def execute_many(self, sql: str, params_list: List[tuple]) -> int:
         """执行批量操作"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.executemany(sql, params_list)
-            conn.commit()
-            return cursor.rowcount
+        return self._write('executemany', sql, params_list).rowcount
     
     def table_exists(self, table_name: str) -> bool:
         """检查表是否存在"""
@@ -124,54 +255,145 @@ class DatabaseManager:
             })
         return columns
     
+    @staticmethod
+    def _column_definitions(columns: List[Dict[str, Any]]) -> List[str]:
+        """生成建表语句中的列定义（含复合主键约束）"""
+        column_defs = []
+        primary_keys = []
+
+        # 先收集所有主键
+        for col in columns:
+            if col.get('primary_key'):
+                primary_keys.append(f'[{col["name"]}]')
+
+        # 生成列定义
+        for col in columns:
+            # 对列名使用方括号以处理保留字
+            col_name = f'[{col["name"]}]'
+            col_def = f"{col_name} {col['type']}"
+
+            # 只有单个主键时才在列定义中加 PRIMARY KEY
+            if col.get('primary_key') and len(primary_keys) == 1:
+                col_def += " PRIMARY KEY"
+            if col.get('not_null'):
+                col_def += " NOT NULL"
+            if col.get('default') is not None:
+                col_def += f" DEFAULT {col['default']}"
+            column_defs.append(col_def)
+
+        # 处理复合主键（在表级别定义）
+        if len(primary_keys) > 1:
+            column_defs.append(f"PRIMARY KEY ({', '.join(primary_keys)})")
+        return column_defs
+
     def create_table(self, table_name: str, columns: List[Dict[str, Any]], 
                     indexes: List[Dict[str, Any]] = None) -> bool:
         """创建表"""
         try:
-            # 构建创建表的SQL
-            column_defs = []
-            primary_keys = []
-
-            # 先收集所有主键
-            for col in columns:
-                if col.get('primary_key'):
-                    primary_keys.append(f'[{col["name"]}]')
-
-            # 生成列定义
-            for col in columns:
-                # 对列名使用方括号以处理保留字
-                col_name = f'[{col["name"]}]'
-                col_def = f"{col_name} {col['type']}"
-
-                # 只有单个主键时才在列定义中加 PRIMARY KEY
-                if col.get('primary_key') and len(primary_keys) == 1:
-                    col_def += " PRIMARY KEY"
-                if col.get('not_null'):
-                    col_def += " NOT NULL"
-                if col.get('default') is not None:
-                    col_def += f" DEFAULT {col['default']}"
-                column_defs.append(col_def)
-
-            # 处理复合主键（在表级别定义）
-            if len(primary_keys) > 1:
-                column_defs.append(f"PRIMARY KEY ({', '.join(primary_keys)})")
-
-            sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(column_defs)})"
+            sql = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(self._column_definitions(columns))})"
             self.execute_update(sql)
             
             # 创建索引
-            if indexes:
-                for idx in indexes:
-                    idx_name = idx.get('name', f"idx_{table_name}_{idx['columns'][0]}")
-                    idx_cols = ', '.join([f'[{col}]' for col in idx['columns']])
-                    idx_sql = f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table_name} ({idx_cols})"
-                    self.execute_update(idx_sql)
+            self.create_indexes(table_name, indexes)
             
             return True
         except Exception as e:
             print(f"创建表 {table_name} 失败: {e}")
             return False
     
+    def rebuild_table(self, table_name: str, columns: List[Dict[str, Any]], batch_size: int = 50000) -> bool:
+        """
+        按新的列定义重建表（SQLite 不能修改已有列的类型）
+
+        在一个事务内：按新定义建临时表，按 rowid 分批复制数据，删除旧表后改名，
+        再按原 SQL 重建旧表上的索引和触发器。rowid 保持不变；旧表中不在新定义里的列原样保留。
+        类型改为 REAL / INTEGER / NUMERIC 的列按 prices.price_sql 的规则转换（与运行时读取价格的规则一致）：
+        去掉 ￥ / ¥ 符号、千分位逗号和空白后是数字的转为数字，空字符串和无法解析的文本置为 NULL。
+
+        :param columns: 新的列定义，格式同 create_table
+        :param batch_size: 每批复制的行数
+        """
+        new_table = f"{table_name}__rebuild"
+        try:
+            existing = {col['name']: col for col in self.get_table_columns(table_name)}
+            declared = {col['name'] for col in columns}
+            # 旧表中多出来的列原样保留
+            columns = list(columns) + [
+                {'name': name, 'type': col['type'], 'not_null': col['notnull'], 'default': col['default_value']}
+                for name, col in existing.items() if name not in declared
+            ]
+            # 保持原有列的顺序（按位置读取 SELECT * 结果的代码不受影响），新增的列排在最后
+            columns.sort(key=lambda col: existing[col['name']]['cid'] if col['name'] in existing else len(existing))
+            copy_columns = [col for col in columns if col['name'] in existing]
+            converted = [
+                col['name'] for col in copy_columns
+                if col['type'].upper() in ('REAL', 'INTEGER', 'NUMERIC')
+                and existing[col['name']]['type'].upper() != col['type'].upper()
+            ]
+            select_list = ', '.join(
+                price_sql(f"[{col['name']}]") if col['name'] in converted else f"[{col['name']}]"
+                for col in copy_columns
+            )
+            names = ', '.join(f"[{col['name']}]" for col in copy_columns)
+
+            with self.transaction() as conn:
+                # 旧表上的索引和触发器会随 DROP TABLE 一起删除，先记下原 SQL（主键 / 唯一约束的自动索引没有 SQL）
+                schema = conn.execute(
+                    "SELECT name, sql FROM sqlite_master "
+                    "WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+                    (table_name,)
+                ).fetchall()
+
+                # 非空但无法解析的文本在转换后为 NULL，复制前先统计
+                cleared = 0
+                for name in converted:
+                    cleared += conn.execute(
+                        f"SELECT COUNT(*) FROM {table_name} WHERE TRIM([{name}]) != '' "
+                        f"AND {price_sql(f'[{name}]')} IS NULL"
+                    ).fetchone()[0]
+
+                conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+                conn.execute(f"CREATE TABLE {new_table} ({', '.join(self._column_definitions(columns))})")
+
+                copied = 0
+                last_rowid = 0
+                while True:
+                    count = conn.execute(f"""
+                        INSERT INTO {new_table} (rowid, {names})
+                        SELECT rowid, {select_list} FROM {table_name}
+                        WHERE rowid > ? ORDER BY rowid LIMIT ?
+                    """, (last_rowid, batch_size)).rowcount
+                    copied += count
+                    if count < batch_size:
+                        break
+                    last_rowid = conn.execute(f"SELECT MAX(rowid) FROM {new_table}").fetchone()[0]
+                    print(f"  表 {table_name} 已复制 {copied} 行...")
+
+                conn.execute(f"DROP TABLE {table_name}")
+                # 其他表的触发器里可能引用了本表，按旧规则改名，不校验这些引用
+                conn.execute("PRAGMA legacy_alter_table = ON")
+                try:
+                    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table_name}")
+                finally:
+                    conn.execute("PRAGMA legacy_alter_table = OFF")
+                for _, sql in schema:
+                    conn.execute(sql)
+
+            print(f"✅ 表 {table_name} 重建完成: {copied} 行，"
+                  f"转换列 {', '.join(converted) or '无'}，无法解析置空 {cleared} 个值，重建索引 / 触发器 {len(schema)} 个")
+            return True
+        except Exception as e:
+            print(f"重建表 {table_name} 失败: {e}")
+            return False
+    
+    def create_indexes(self, table_name: str, indexes: List[Dict[str, Any]] = None):
+        """创建索引（已存在的跳过）"""
+        for idx in indexes or []:
+            idx_name = idx.get('name', f"idx_{table_name}_{idx['columns'][0]}")
+            idx_cols = ', '.join([f'[{col}]' for col in idx['columns']])
+            idx_sql = f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table_name} ({idx_cols})"
+            self.execute_update(idx_sql)
+    
     def add_column(self, table_name: str, column_def: Dict[str, Any]) -> bool:
         """添加列到现有表"""
         try:
@@ -9,5 +9,10 @@ from .buy import BuyModel
 from .sell import SellModel
 from .lease import LeaseModel
 from .weapon_classID import WeaponClassIDModel
+from .buy_price_index import BuyPriceExactModel, BuyPriceIndexModel
+from .daily_rollup import (BuyDailyRollupModel, SellDailyRollupModel, LeaseDailyRollupModel,
+                           YyypLentDailyRollupModel)
 
-__all__ = ['ConfigModel', 'FundsModel', 'BuyModel', 'SellModel', 'LeaseModel', 'WeaponClassIDModel']
+__all__ = ['ConfigModel', 'FundsModel', 'BuyModel', 'SellModel', 'LeaseModel', 'WeaponClassIDModel',
+           'BuyPriceExactModel', 'BuyPriceIndexModel', 'BuyDailyRollupModel', 'SellDailyRollupModel',
+           'LeaseDailyRollupModel', 'YyypLentDailyRollupModel']
@@ -5,6 +5,7 @@
 
 from typing import Dict, Any, List
 from ..base_model import BaseModel
+from ..search import search_condition
 
 
 class BuyModel(BaseModel):
@@ -121,6 +122,11 @@ class BuyModel(BaseModel):
                 'type': 'TEXT',
                 'not_null': False,
                 'default': None
+            },
+            'order_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None
             }
         }
     
@@ -142,13 +148,27 @@ class BuyModel(BaseModel):
                 'name': 'buy_idx_item_name',
                 'columns': ['item_name']
             },
+            # 按下单时间排序分页（游标分页按 order_time, rowid 定位）
+            {
+                'name': 'buy_idx_order_time',
+                'columns': ['order_time']
+            },
             # 针对价格查询优化的索引
             {
                 'name': 'buy_idx_item_price',
                 'columns': ['item_name', 'price']
+            },
+            # 时间范围查询
+            {
+                'name': 'buy_idx_order_time_ts',
+                'columns': ['order_time_ts']
             }
         ]
     
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'order_time': 'order_time_ts'}
+    
     @classmethod
     def find_by_status(cls, status: str, limit: int = None, offset: int = None):
         """根据状态查找购买记录"""
@@ -162,7 +182,8 @@ class BuyModel(BaseModel):
     @classmethod
     def find_by_weapon_name(cls, weapon_name: str, limit: int = None, offset: int = None):
         """根据武器名称查找购买记录"""
-        return cls.find_all("weapon_name LIKE ?", (f"%{weapon_name}%",), limit, offset)
+        condition, params = search_condition(cls.get_table_name(), weapon_name, columns=('weapon_name',))
+        return cls.find_all(condition, tuple(params), limit, offset)
     
     @classmethod
     def get_recent_orders(cls, limit: int = 20, offset: int = 0):
@@ -172,7 +193,7 @@ class BuyModel(BaseModel):
     @classmethod
     def get_statistics_by_status(cls) -> Dict[str, int]:
         """按状态统计购买记录"""
-        db = cls().db
+        db = cls.get_db()
         sql = """
         SELECT status, COUNT(*) as count 
         FROM buy 
@@ -193,7 +214,7 @@ class BuyModel(BaseModel):
     @classmethod
     def get_total_amount(cls, where: str = "", params: tuple = ()) -> float:
         """获取总金额"""
-        db = cls().db
+        db = cls.get_db()
         sql = "SELECT COALESCE(SUM(price), 0) FROM buy"
         
         if where:
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+购入价格索引表模型
+
+库存自动填充 buy_price 时需要按 item_name 查询 buy 表：
+有磨损值时取 (item_name, weapon_float) 精确匹配的价格，否则取同名物品的平均价格。
+这里把这两种结果预先维护在两张小表中，由 buy 表上的触发器增量更新：
+- buy_price_exact: (item_name, weapon_float) -> price
+- buy_price_index: item_name -> price_sum / price_count
+buy.price 中可能残留文本价格，统一经 price_sql 转换：带 ￥ / 千分位逗号的文本按数字计入，
+无法解析的文本与 NULL 一样不计入价格总和与记录数，精确价格表中只保存数字或 NULL。
+"""
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from ..base_model import BaseModel
+from ..database import DatabaseManager
+from ..prices import price_sql
+
+
+# 单条 SQL 的参数上限为 999，分块查询时每块的条数
+_CHUNK_SIZE = 300
+
+
+def _refresh_exact_sql(ref: str) -> str:
+    """重新计算 (item_name, weapon_float) 对应的精确价格，取 buy 表中最早的一条"""
+    return f"""
+        DELETE FROM buy_price_exact
+        WHERE item_name = {ref}.item_name AND weapon_float = {ref}.weapon_float;
+        INSERT OR IGNORE INTO buy_price_exact (item_name, weapon_float, price)
+        SELECT item_name, weapon_float, {price_sql('price')} FROM buy
+        WHERE item_name = {ref}.item_name AND weapon_float = {ref}.weapon_float
+        LIMIT 1;
+    """
+
+
+_ADD_BASIS_SQL = f"""
+        INSERT INTO buy_price_index (item_name, price_sum, price_count)
+        SELECT NEW.item_name, COALESCE({price_sql('NEW.price')}, 0), {price_sql('NEW.price')} IS NOT NULL
+        WHERE NEW.item_name IS NOT NULL
+        ON CONFLICT(item_name) DO UPDATE SET
+            price_sum = price_sum + excluded.price_sum,
+            price_count = price_count + excluded.price_count;
+"""
+
+_SUBTRACT_BASIS_SQL = f"""
+        UPDATE buy_price_index SET
+            price_sum = price_sum - COALESCE({price_sql('OLD.price')}, 0),
+            price_count = price_count - ({price_sql('OLD.price')} IS NOT NULL)
+        WHERE item_name = OLD.item_name;
+        DELETE FROM buy_price_index WHERE item_name = OLD.item_name AND price_count <= 0;
+"""
+
+
+class BuyPriceExactModel(BaseModel):
+    """精确价格表：(item_name, weapon_float) -> price"""
+
+    @classmethod
+    def get_table_name(cls) -> str:
+        return "buy_price_exact"
+
+    @classmethod
+    def get_fields(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            'item_name': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '物品名称'
+            },
+            'weapon_float': {
+                'type': 'REAL',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '磨损值'
+            },
+            'price': {
+                'type': 'REAL',
+                'not_null': False,
+                'default': None,
+                'comment': 'buy表中该物品该磨损值最早一条记录的价格'
+            }
+        }
+
+
+class BuyPriceIndexModel(BaseModel):
+    """价格基准表：item_name -> 价格总和 / 有价格的记录数，并负责维护两张索引表"""
+
+    @classmethod
+    def get_table_name(cls) -> str:
+        return "buy_price_index"
+
+    @classmethod
+    def get_fields(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            'item_name': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '物品名称'
+            },
+            'price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': '价格总和'
+            },
+            'price_count': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '有价格的记录数'
+            }
+        }
+
+    @classmethod
+    def get_triggers(cls) -> List[Dict[str, Any]]:
+        return [
+            {
+                'name': 'buy_price_index_ai',
+                'sql': f"""
+                    CREATE TRIGGER IF NOT EXISTS buy_price_index_ai AFTER INSERT ON buy
+                    BEGIN
+                        {_ADD_BASIS_SQL}
+                        {_refresh_exact_sql('NEW')}
+                    END
+                """
+            },
+            {
+                'name': 'buy_price_index_ad',
+                'sql': f"""
+                    CREATE TRIGGER IF NOT EXISTS buy_price_index_ad AFTER DELETE ON buy
+                    BEGIN
+                        {_SUBTRACT_BASIS_SQL}
+                        {_refresh_exact_sql('OLD')}
+                    END
+                """
+            },
+            {
+                'name': 'buy_price_index_au',
+                'sql': f"""
+                    CREATE TRIGGER IF NOT EXISTS buy_price_index_au
+                    AFTER UPDATE OF item_name, weapon_float, price ON buy
+                    BEGIN
+                        {_SUBTRACT_BASIS_SQL}
+                        {_ADD_BASIS_SQL}
+                        {_refresh_exact_sql('OLD')}
+                        {_refresh_exact_sql('NEW')}
+                    END
+                """
+            }
+        ]
+
+    @classmethod
+    def ensure_table_exists(cls) -> bool:
+        """建表并创建触发器；触发器是新建的（首次部署或被删除过）或定义已变化时从 buy 表全量重建"""
+        needs_rebuild = bool(cls._outdated_triggers())
+
+        if not super().ensure_table_exists():
+            return False
+
+        if needs_rebuild:
+            cls.rebuild()
+        return True
+
+    @classmethod
+    def rebuild(cls) -> Dict[str, int]:
+        """从 buy 表全量重建两张索引表"""
+        db = DatabaseManager()
+        with db.transaction() as conn:
+            conn.execute("DELETE FROM buy_price_index")
+            conn.execute("DELETE FROM buy_price_exact")
+            names = conn.execute(f"""
+                INSERT INTO buy_price_index (item_name, price_sum, price_count)
+                SELECT item_name, COALESCE(SUM({price_sql('price')}), 0), COUNT({price_sql('price')})
+                FROM buy WHERE item_name IS NOT NULL
+                GROUP BY item_name
+            """).rowcount
+            exact = conn.execute(f"""
+                INSERT OR IGNORE INTO buy_price_exact (item_name, weapon_float, price)
+                SELECT item_name, weapon_float, {price_sql('price')} FROM buy
+                WHERE item_name IS NOT NULL AND weapon_float IS NOT NULL
+                ORDER BY rowid
+            """).rowcount
+        print(f"✅ 购入价格索引重建完成: {names} 个物品, {exact} 个精确价格")
+        return {'item_count': names, 'exact_count': exact}
+
+    @classmethod
+    def resolve_prices(cls, keys: Sequence[Tuple[Optional[str], Any]]) -> List[Optional[float]]:
+        """
+        批量查询购入价格，与逐条查询 buy 表的规则一致：
+        weapon_float 有值时取精确匹配价格，否则取同名物品平均价格（保留两位小数）
+
+        :param keys: (item_name, weapon_float) 列表
+        :return: 与 keys 一一对应的价格，查不到为 None
+        """
+        prices: List[Optional[float]] = [None] * len(keys)
+        exact_keys = []
+        avg_names = {}
+        for i, (item_name, weapon_float) in enumerate(keys):
+            if not item_name:
+                continue
+            if weapon_float:
+                exact_keys.append((i, item_name, weapon_float))
+            else:
+                avg_names.setdefault(item_name, []).append(i)
+
+        db = DatabaseManager()
+        with db.get_connection() as conn:
+            for start in range(0, len(exact_keys), _CHUNK_SIZE):
+                chunk = exact_keys[start:start + _CHUNK_SIZE]
+                values = ', '.join(['(?, ?, ?)'] * len(chunk))
+                params = [value for key in chunk for value in key]
+                rows = conn.execute(f"""
+                    WITH k(i, item_name, weapon_float) AS (VALUES {values})
+                    SELECT k.i, e.price FROM k
+                    JOIN buy_price_exact e ON e.item_name = k.item_name AND e.weapon_float = k.weapon_float
+                """, params).fetchall()
+                for i, price in rows:
+                    prices[i] = price
+
+            names = list(avg_names)
+            for start in range(0, len(names), _CHUNK_SIZE):
+                chunk = names[start:start + _CHUNK_SIZE]
+                placeholders = ', '.join(['?'] * len(chunk))
+                rows = conn.execute(f"""
+                    SELECT item_name, price_sum / price_count FROM buy_price_index
+                    WHERE price_count > 0 AND item_name IN ({placeholders})
+                """, chunk).fetchall()
+                for item_name, avg_price in rows:
+                    for i in avg_names[item_name]:
+                        prices[i] = round(avg_price, 2)
+
+        return prices
+
+    @classmethod
+    def resolve_price(cls, item_name: Optional[str], weapon_float: Any = None) -> Optional[float]:
+        """查询单个物品的购入价格"""
+        return cls.resolve_prices([(item_name, weapon_float)])[0]
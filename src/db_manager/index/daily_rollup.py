@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+购入 / 出售 / 租赁日汇总表模型
+
+各页面的统计卡片（getBuyStats、getSellStats、getLentStats、getStatsByTypeAndWear、*StatsByTimeRange）
+每次加载都要对整张明细表做 COUNT / SUM / AVG，耗时随历史记录增长。
+这里按 (日期, 平台, 用户, 武器类型, 磨损等级, 状态) 预先汇总记录数与价格、租期、租金总和，
+由明细表上的触发器增量维护，统计时只需要对汇总表求和，耗时只与维度组合数有关：
+- buy_daily_rollup: buy 表，按 order_time
+- sell_daily_rollup: sell 表，按 order_time
+- lease_daily_rollup: lease 表，按 create_time
+- yyyp_lent_daily_rollup: yyyp_lent 表，按 lean_start_time
+
+维度为 NULL 时按空字符串汇总；日期与时间戳列的规则一致（见 timestamps 模块），无法解析时为空字符串。
+单价、租期按 prices.price_sql 转换为数字，无法解析的文本视为 NULL。
+全量重建（首次部署之后补数据或怀疑汇总不一致时）:
+    python -m src.db_manager.rebuild_rollups
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..base_model import BaseModel
+from ..database import DatabaseManager
+from ..prices import price_sql
+from ..timestamps import day_end_epoch, epoch_sql, is_date_only, range_condition, to_epoch
+
+
+# 汇总维度
+DIMENSIONS = ('day', 'platform', 'data_user', 'weapon_type', 'float_range', 'status')
+# 汇总度量
+MEASURES = ('record_count', 'price_sum', 'price_count', 'days_sum', 'days_count', 'amount_sum')
+
+
+def _epoch_to_day(epoch: Optional[int]) -> Optional[str]:
+    """时间戳对应的日期文本，与 SQLite 的 date(x, 'unixepoch') 一致"""
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d')
+
+
+def empty_totals() -> Dict[str, float]:
+    """各度量均为 0 的合计"""
+    return {name: 0 for name in MEASURES}
+
+
+def combine(groups: Dict[str, Dict[str, float]], exclude: Tuple[str, ...] = ()) -> Dict[str, float]:
+    """
+    合计 summarize() 的各状态结果
+
+    :param groups: {状态: 度量}
+    :param exclude: 不参与合计的状态（空字符串代表状态为空）
+    """
+    totals = empty_totals()
+    for status, values in groups.items():
+        if status in exclude:
+            continue
+        for name in MEASURES:
+            totals[name] += values[name]
+    return totals
+
+
+def average(total: float, count: float) -> float:
+    """与 COALESCE(AVG(x), 0) 一致：没有非空值时为 0"""
+    return total / count if count else 0
+
+
+class DailyRollupModel(BaseModel):
+    """日汇总表基类，子类指定来源表及各维度、度量对应的列"""
+
+    # 来源表
+    source_table: str = ''
+    # 日期来源列（文本时间）及其时间戳列（没有时为 None，按文本实时换算）
+    time_column: str = ''
+    ts_column: Optional[str] = None
+    # 平台、用户列（没有时为 None，按空字符串汇总）
+    platform_column: Optional[str] = 'from'
+    data_user_column: Optional[str] = 'data_user'
+    # 单价列、租期列（没有时为 None，租期与租金总和为 0）
+    price_column: str = 'price'
+    days_column: Optional[str] = None
+
+    @classmethod
+    def get_table_name(cls) -> str:
+        return f"{cls.source_table}_daily_rollup"
+
+    @classmethod
+    def get_fields(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            'day': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '日期（YYYY-MM-DD），时间无法解析时为空字符串'
+            },
+            'platform': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '平台'
+            },
+            'data_user': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '数据所属用户'
+            },
+            'weapon_type': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '武器类型'
+            },
+            'float_range': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '磨损等级'
+            },
+            'status': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '状态'
+            },
+            'record_count': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '记录数'
+            },
+            'price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': '价格总和'
+            },
+            'price_count': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '有价格的记录数'
+            },
+            'days_sum': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '租期总和'
+            },
+            'days_count': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '有租期的记录数'
+            },
+            'amount_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': '租金总和（单价 * 租期）'
+            }
+        }
+
+    @classmethod
+    def _column(cls, ref: str, column: Optional[str]) -> str:
+        return f"{ref}[{column}]" if column else 'NULL'
+
+    @classmethod
+    def _dimension_values(cls, ref: str = '') -> List[str]:
+        """各维度的取值表达式，ref 为 'NEW.' / 'OLD.' 或空（来源表的列）"""
+        day = f"date({epoch_sql(cls._column(ref, cls.time_column))}, 'unixepoch')"
+        columns = (cls.platform_column, cls.data_user_column, 'weapon_type', 'float_range', 'status')
+        return [f"COALESCE({day}, '')"] + [f"COALESCE({cls._column(ref, c)}, '')" for c in columns]
+
+    @classmethod
+    def _measure_values(cls, ref: str = '', aggregate: bool = False) -> List[str]:
+        """各度量的取值表达式；aggregate=True 时为 GROUP BY 的聚合表达式"""
+        # 部分来源表的单价 / 租期列是 TEXT，带 ￥ 符号、千分位逗号的按数字汇总，无法解析的不计入
+        price = price_sql(cls._column(ref, cls.price_column))
+        days = price_sql(cls._column(ref, cls.days_column))
+        values = [
+            '1',
+            f"COALESCE({price}, 0)",
+            f"({price} IS NOT NULL)",
+            f"COALESCE({days}, 0)",
+            f"({days} IS NOT NULL)",
+            f"COALESCE({price} * {days}, 0)",
+        ]
+        if aggregate:
+            values = [f"SUM({value})" for value in values]
+        return values
+
+    @classmethod
+    def _add_sql(cls) -> str:
+        table = cls.get_table_name()
+        updates = ', '.join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+        return f"""
+            INSERT INTO {table} ({', '.join(DIMENSIONS + MEASURES)})
+            VALUES ({', '.join(cls._dimension_values('NEW.') + cls._measure_values('NEW.'))})
+            ON CONFLICT({', '.join(DIMENSIONS)}) DO UPDATE SET {updates};
+        """
+
+    @classmethod
+    def _subtract_sql(cls) -> str:
+        table = cls.get_table_name()
+        key = ' AND '.join(f"{d} = {v}" for d, v in zip(DIMENSIONS, cls._dimension_values('OLD.')))
+        updates = ', '.join(f"{m} = {m} - {v}" for m, v in zip(MEASURES, cls._measure_values('OLD.')))
+        return f"""
+            UPDATE {table} SET {updates} WHERE {key};
+            DELETE FROM {table} WHERE {key} AND record_count <= 0;
+        """
+
+    @classmethod
+    def get_triggers(cls) -> List[Dict[str, Any]]:
+        table, source = cls.get_table_name(), cls.source_table
+        watched = [cls.time_column, cls.platform_column, cls.data_user_column, 'weapon_type', 'float_range',
+                   'status', cls.price_column, cls.days_column]
+        columns = ', '.join(f"[{c}]" for c in watched if c)
+        return [
+            {
+                'name': f'{table}_ai',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} "
+                       f"BEGIN {cls._add_sql()} END"
+            },
+            {
+                'name': f'{table}_ad',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} "
+                       f"BEGIN {cls._subtract_sql()} END"
+            },
+            {
+                'name': f'{table}_au',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {source} "
+                       f"BEGIN {cls._subtract_sql()} {cls._add_sql()} END"
+            }
+        ]
+
+    @classmethod
+    def ensure_table_exists(cls) -> bool:
+        """建表并创建触发器；触发器是新建的（首次部署或被删除过）或定义已变化时从来源表全量重建"""
+        needs_rebuild = bool(cls._outdated_triggers())
+
+        if not super().ensure_table_exists():
+            return False
+
+        if needs_rebuild:
+            cls.rebuild()
+        return True
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """从来源表全量重建汇总表，返回汇总行数"""
+        table = cls.get_table_name()
+        dimensions = cls._dimension_values()
+        with DatabaseManager().transaction() as conn:
+            conn.execute(f"DELETE FROM {table}")
+            count = conn.execute(f"""
+                INSERT INTO {table} ({', '.join(DIMENSIONS + MEASURES)})
+                SELECT {', '.join(dimensions + cls._measure_values(aggregate=True))}
+                FROM {cls.source_table}
+                GROUP BY {', '.join(dimensions)}
+            """).rowcount
+        print(f"✅ 日汇总表 {table} 重建完成: {count} 行")
+        return count
+
+    @classmethod
+    def day_range(cls, start: Any = None, end: Any = None) -> Optional[Tuple[str, List[Any]]]:
+        """
+        汇总表上的日期范围条件，与 time_range 的结果一致
+
+        :return: (条件, 参数)；边界带时间（不是整天）时无法用日汇总回答，返回 None
+        """
+        if any(value is not None and not is_date_only(value) for value in (start, end)):
+            return None
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("day >= ?")
+            params.append(_epoch_to_day(to_epoch(start)))
+        if end is not None:
+            conditions.append("day < ?")
+            params.append(_epoch_to_day(day_end_epoch(end)))
+        if not conditions:
+            return "1=1", []
+        # 时间无法解析的记录汇总在空字符串日期下，不在任何范围内
+        return f"(day != '' AND {' AND '.join(conditions)})", params
+
+    @classmethod
+    def summarize(cls, where: str = "", params: tuple = ()) -> Dict[str, Dict[str, float]]:
+        """
+        按状态合计汇总表
+
+        :param where: 汇总表上的条件（列为各维度）
+        :return: {状态: {度量: 值}}，状态为空的记录键为空字符串
+        """
+        sums = ', '.join(f"SUM({m})" for m in MEASURES)
+        sql = f"SELECT status, {sums} FROM {cls.get_table_name()}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " GROUP BY status"
+        rows = DatabaseManager().execute_query(sql, tuple(params))
+        return {row[0]: dict(zip(MEASURES, row[1:])) for row in rows}
+
+    @classmethod
+    def summarize_source(cls, where: str = "", params: tuple = ()) -> Dict[str, Dict[str, float]]:
+        """直接在来源表上按状态合计，结果格式与 summarize() 相同（用于汇总表无法回答的条件）"""
+        status = cls._dimension_values()[-1]
+        sql = f"SELECT {status}, {', '.join(cls._measure_values(aggregate=True))} FROM {cls.source_table}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" GROUP BY {status}"
+        rows = DatabaseManager().execute_query(sql, tuple(params))
+        return {row[0]: dict(zip(MEASURES, row[1:])) for row in rows}
+
+    @classmethod
+    def summarize_range(cls, start: Any = None, end: Any = None) -> Dict[str, Dict[str, float]]:
+        """按时间范围（与 time_range 规则一致）按状态合计，整天的范围使用汇总表"""
+        day_range = cls.day_range(start, end)
+        if day_range is not None:
+            return cls.summarize(*day_range)
+        if cls.ts_column:
+            expr = f"[{cls.ts_column}]"
+        else:
+            expr = epoch_sql(f"[{cls.time_column}]")
+        return cls.summarize_source(*range_condition(expr, start, end))
+
+    @classmethod
+    def summarize_by(cls, weapon_types: Optional[List[str]] = None,
+                     float_ranges: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """按武器类型、磨损等级（多选，空表示不限）按状态合计"""
+        conditions = []
+        params = []
+        for column, values in (('weapon_type', weapon_types), ('float_range', float_ranges)):
+            if values:
+                conditions.append(f"{column} IN ({', '.join(['?'] * len(values))})")
+                params.extend(values)
+        return cls.summarize(' AND '.join(conditions), tuple(params))
+
+
+class BuyDailyRollupModel(DailyRollupModel):
+    """buy 表日汇总"""
+    source_table = 'buy'
+    time_column = 'order_time'
+    ts_column = 'order_time_ts'
+
+
+class SellDailyRollupModel(DailyRollupModel):
+    """sell 表日汇总"""
+    source_table = 'sell'
+    time_column = 'order_time'
+    ts_column = 'order_time_ts'
+
+
+class LeaseDailyRollupModel(DailyRollupModel):
+    """lease 表日汇总，单价为 unit_price、租期为 lease_day"""
+    source_table = 'lease'
+    time_column = 'create_time'
+    platform_column = 'lease_from'
+    data_user_column = None
+    price_column = 'unit_price'
+    days_column = 'lease_day'
+
+
+class YyypLentDailyRollupModel(DailyRollupModel):
+    """yyyp_lent 表日汇总，租期为 total_Lease_Days"""
+    source_table = 'yyyp_lent'
+    time_column = 'lean_start_time'
+    ts_column = 'lean_start_time_ts'
+    days_column = 'total_Lease_Days'
+
+
+ROLLUP_MODELS = [BuyDailyRollupModel, SellDailyRollupModel, LeaseDailyRollupModel, YyypLentDailyRollupModel]
+
+
+def rebuild_rollups() -> Dict[str, int]:
+    """全量重建全部日汇总表（汇总表或触发器不存在时先创建），返回 {表名: 汇总行数}"""
+    db = DatabaseManager()
+    result = {}
+    for model in ROLLUP_MODELS:
+        if not db.table_exists(model.source_table):
+            print(f"⚠️  来源表 {model.source_table} 不存在，跳过 {model.get_table_name()}")
+            continue
+        if not db.table_exists(model.get_table_name()):
+            # 新建时 ensure_table_exists 已经完成全量重建
+            if model.ensure_table_exists():
+                result[model.get_table_name()] = model.count()
+            continue
+        if model.ensure_table_exists():
+            result[model.get_table_name()] = model.rebuild()
+    return result
+
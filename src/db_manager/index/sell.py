@@ -116,6 +116,11 @@ class SellModel(BaseModel):
                 'type': 'TEXT',
                 'not_null': False,
                 'default': None
+            },
+            'order_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None
             }
         }
     
@@ -125,5 +130,14 @@ class SellModel(BaseModel):
             {
                 'name': 'sell_idx',
                 'columns': ['weapon_name', 'item_name', 'weapon_float', 'float_range', 'price', 'buyer_name', 'order_time', 'status', 'from']
+            },
+            # 时间范围查询
+            {
+                'name': 'sell_idx_order_time_ts',
+                'columns': ['order_time_ts']
             }
         ]
+    
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'order_time': 'order_time_ts'}
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+武器名称内存目录（自动完成用）
+
+/webSelectWeaponV1/searchWeapon 每次按键都要做 market_listing_item_name LIKE '%kw%'，
+这种前后都带通配符的查询用不上 idx_item_name 索引，只能全表扫描 weapon_classID。
+这里在进程内维护一份去重后的名称目录，并建立 n-gram 倒排索引：
+- 单字 -> 名称编号、相邻两字 -> 名称编号；查询时在关键词的各个 n-gram 中取最短的倒排表作为候选，
+  再逐个做子串校验，中文关键词常见的一两个字也能直接命中
+- 结果排序：前缀匹配优先，其次名称越短越靠前，最后按名称排序；全量构建时名称按这个顺序编号，
+  倒排表本身就是排好序的，常见关键词找够条数即可停止扫描
+- 比较不区分大小写（与 SQLite 对 ASCII 的 LIKE 一致）
+
+目录在启动时从 weapon_classID 全量加载，之后由写入方按 steam_hash_name 调用 refresh() 增量更新；
+倒排表只追加，删除的名称先标记为失效，失效和未排序的增量名称比例过高时整体重建。
+"""
+
+import heapq
+from bisect import bisect_left
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..database import DatabaseManager
+
+
+# 单条 SQL 的参数上限为 999，分块查询时每块的条数
+_CHUNK_SIZE = 500
+# 失效名称超过该比例时整体重建索引
+_COMPACT_RATIO = 0.25
+
+
+def _grams(text: str):
+    """名称的单字与相邻两字（去重）"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class _CatalogIndex:
+    """一份完整的目录与索引；整体重建时生成新对象替换，查询线程不会看到重建到一半的状态"""
+
+    def __init__(self):
+        self.names: List[Optional[str]] = []    # 名称编号 -> 名称，失效为 None
+        self.folded: List[Optional[str]] = []   # 名称编号 -> 小写名称
+        self.ids: Dict[str, int] = {}           # 名称 -> 名称编号
+        self.refs: Dict[str, int] = {}          # 名称 -> 引用它的 weapon_classID 行数
+        self.keys: Dict[str, str] = {}          # steam_hash_name -> 名称
+        self.postings: Dict[str, List[int]] = {}   # n-gram -> 包含它的名称编号（升序）
+        self.prefixes: Dict[str, List[int]] = {}   # 名称前一、两个字 -> 名称编号（升序）
+        self.ordered = 0                        # 编号小于它的名称按 (长度, 名称) 排好序
+        self.dead = 0
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str]]) -> '_CatalogIndex':
+        """全量构建：名称按 (长度, 名称) 顺序编号，倒排表的顺序即排序结果"""
+        index = cls()
+        for key, name in items:
+            index.keys[key] = name
+            index.refs[name] = index.refs.get(name, 0) + 1
+        for name in sorted(index.refs, key=lambda n: (len(n.casefold()), n.casefold())):
+            index._append(name)
+        index.ordered = len(index.names)
+        return index
+
+    def _append(self, name: str):
+        name_id = len(self.names)
+        folded = name.casefold()
+        self.names.append(name)
+        self.folded.append(folded)
+        self.ids[name] = name_id
+        for gram in _grams(folded):
+            self.postings.setdefault(gram, []).append(name_id)
+        for prefix in {folded[:1], folded[:2]}:
+            self.prefixes.setdefault(prefix, []).append(name_id)
+
+    def add(self, key: str, name: str):
+        """增量新增：新名称追加在末尾，不参与预排序"""
+        self.keys[key] = name
+        count = self.refs.get(name, 0)
+        self.refs[name] = count + 1
+        if not count:
+            self._append(name)
+
+    def remove(self, key: str):
+        name = self.keys.pop(key, None)
+        if name is None:
+            return
+        count = self.refs[name] - 1
+        if count:
+            self.refs[name] = count
+            return
+        del self.refs[name]
+        name_id = self.ids.pop(name)
+        self.names[name_id] = None
+        self.folded[name_id] = None
+        self.dead += 1
+
+    @property
+    def stale(self) -> int:
+        """失效名称与未排序的增量名称数量"""
+        return self.dead + len(self.names) - self.ordered
+
+    def collect(self, posting: List[int], match: Callable[[str], bool], limit: int) -> List[Tuple[int, str, int]]:
+        """
+        按排序取出倒排表中满足 match 的前 limit 个名称，返回 (长度, 小写名称, 名称编号)
+        预排序部分找够 limit 个即可停止，末尾的增量名称全部检查后一起排序
+        """
+        folded = self.folded
+        found = []
+        tail = bisect_left(posting, self.ordered)
+        for name_id in posting[:tail]:
+            name = folded[name_id]
+            if name is not None and match(name):
+                found.append((len(name), name, name_id))
+                if len(found) >= limit:
+                    break
+        for name_id in posting[tail:]:
+            name = folded[name_id]
+            if name is not None and match(name):
+                found.append((len(name), name, name_id))
+        if len(found) > limit or tail < len(posting):
+            found = heapq.nsmallest(limit, found)
+        return found
+
+
+class WeaponCatalog:
+    """进程级武器名称目录，线程安全：写入加锁，查询不加锁"""
+
+    def __init__(self):
+        self._index: Optional[_CatalogIndex] = None
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._index is not None
+
+    def load(self) -> int:
+        """从 weapon_classID 全量加载，返回名称数量；加载期间的增量更新会等待加载完成"""
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> int:
+        start = time.perf_counter()
+        rows = DatabaseManager().execute_query(
+            "SELECT steam_hash_name, market_listing_item_name FROM weapon_classID "
+            "WHERE market_listing_item_name IS NOT NULL"
+        )
+        index = _CatalogIndex.build((key, name) for key, name in rows if name.strip())
+        self._index = index
+        self.loaded_at = time.time()
+        print(f"✅ 武器名称目录加载完成: {len(index.refs)} 个名称 ({len(rows)} 条记录), "
+              f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        return len(index.refs)
+
+    def refresh(self, steam_hash_names: Iterable[str]):
+        """
+        按 steam_hash_name 从数据库重新读取这些记录并更新目录（新增、改名、删除都适用）
+        目录尚未加载时不做任何事，首次查询时会全量加载
+        """
+        if self._index is None:
+            return
+        keys = [key for key in dict.fromkeys(steam_hash_names) if key]
+        if not keys:
+            return
+
+        current = {}
+        db = DatabaseManager()
+        for start in range(0, len(keys), _CHUNK_SIZE):
+            chunk = keys[start:start + _CHUNK_SIZE]
+            placeholders = ', '.join(['?'] * len(chunk))
+            current.update(db.execute_query(
+                f"SELECT steam_hash_name, market_listing_item_name FROM weapon_classID "
+                f"WHERE steam_hash_name IN ({placeholders})",
+                tuple(chunk)
+            ))
+
+        with self._lock:
+            index = self._index
+            for key in keys:
+                name = current.get(key)
+                if name is not None and not name.strip():
+                    name = None
+                if index.keys.get(key) == name:
+                    continue
+                index.remove(key)
+                if name is not None:
+                    index.add(key, name)
+            if index.stale > len(index.names) * _COMPACT_RATIO:
+                self._index = _CatalogIndex.build(index.keys.items())
+
+    def search(self, keyword: str, limit: int = 20) -> List[str]:
+        """
+        按子串匹配名称，前缀匹配优先，其次名称越短越靠前
+
+        :param keyword: 搜索关键词（不区分大小写）
+        :param limit: 返回数量上限
+        :return: 去重后的名称列表
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load()
+        index = self._index
+
+        folded = keyword.strip().casefold()
+        if not folded:
+            return []
+
+        # 1. 前缀匹配：名称前一、两个字的倒排表
+        prefix_posting = index.prefixes.get(folded[:2], ())
+        ranked = index.collect(prefix_posting, lambda name: name.startswith(folded), limit) if prefix_posting else []
+
+        # 2. 不足 limit 时补充中间包含关键词的名称，取关键词各 n-gram 中最短的倒排表作为候选
+        if len(ranked) < limit:
+            candidates = None
+            for gram in _grams(folded):
+                posting = index.postings.get(gram)
+                if not posting:
+                    candidates = None
+                    break
+                if candidates is None or len(posting) < len(candidates):
+                    candidates = posting
+            if candidates:
+                ranked += index.collect(
+                    candidates, lambda name: folded in name and not name.startswith(folded), limit - len(ranked)
+                )
+
+        names = index.names
+        return [names[name_id] for _, _, name_id in ranked if names[name_id] is not None]
+
+    def stats(self) -> Dict[str, int]:
+        """目录规模"""
+        index = self._index
+        if index is None:
+            return {'names': 0, 'records': 0, 'grams': 0}
+        return {'names': len(index.refs), 'records': len(index.keys), 'grams': len(index.postings)}
+
+
+# 全局武器名称目录
+weapon_catalog = WeaponCatalog()
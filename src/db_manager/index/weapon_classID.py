@@ -4,13 +4,34 @@
 用于存储各平台武器的模板ID和相关信息（悠悠有品、BUFF、Steam）
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from ..base_model import BaseModel
+from ..database import DatabaseManager
+from .weapon_catalog import weapon_catalog
 
 
 class WeaponClassIDModel(BaseModel):
     """武器ClassID表模型（统一管理各平台武器ID）"""
 
+    # merge_catalog 各平台的合并规则：
+    # update - steam_hash_name 已存在时只更新这些列；insert - 不存在时插入这些列
+    CATALOG_MERGE_RULES = {
+        'yyyp': {
+            'update': ('yyyp_id', 'yyyp_class_name'),
+            'insert': ('steam_hash_name', 'market_listing_item_name', 'yyyp_id', 'yyyp_class_name',
+                       'weapon_type', 'weapon_name', 'item_name', 'float_range', 'Rarity')
+        },
+        'buff': {
+            'update': ('buff_id', 'buff_class_name'),
+            'insert': ('steam_hash_name', 'market_listing_item_name', 'buff_id', 'buff_class_name',
+                       'weapon_type', 'weapon_name', 'item_name')
+        },
+        'steam': {
+            'update': (),
+            'insert': ('steam_hash_name', 'weapon_type', 'weapon_name', 'item_name', 'market_listing_item_name')
+        }
+    }
+
     @classmethod
     def get_table_name(cls) -> str:
         return "weapon_classID"
@@ -133,6 +154,21 @@ class WeaponClassIDModel(BaseModel):
             }
         ]
 
+    def save(self, mode: str = 'auto') -> bool:
+        """保存后同步内存中的武器名称目录（修改了 steam_hash_name 时新旧两个都要刷新）"""
+        previous_key = self._original_data.get('steam_hash_name')
+        if not super().save(mode):
+            return False
+        weapon_catalog.refresh([self.steam_hash_name, previous_key])
+        return True
+
+    def delete(self) -> bool:
+        """删除后同步内存中的武器名称目录"""
+        if not super().delete():
+            return False
+        weapon_catalog.refresh([self.steam_hash_name])
+        return True
+
     @classmethod
     def find_by_weapon_info(cls, weapon_type: str = None, weapon_name: str = None, item_name: str = None):
         """根据武器信息查询"""
@@ -194,13 +230,142 @@ class WeaponClassIDModel(BaseModel):
         return cls.find_all(where="[float_range] = ?", params=(float_range,))
 
 
+    @classmethod
+    def _normalize_catalog_row(cls, weapon_data: Dict[str, Any], platform: str) -> Optional[Dict[str, Any]]:
+        """把各平台提交的字段名映射为表字段，缺少必需字段时返回 None（跳过）"""
+        if platform == 'yyyp':
+            row = dict(weapon_data)
+            # 兼容旧数据：'Id' 即 yyyp_id；en_weapon_name / CommodityName 为悠悠有品的字段名
+            if 'Id' in row and 'yyyp_id' not in row:
+                row['yyyp_id'] = row.pop('Id')
+            row['steam_hash_name'] = row.get('en_weapon_name') or row.get('steam_hash_name')
+            if 'CommodityName' in row:
+                row['market_listing_item_name'] = row['CommodityName']
+            if not row.get('yyyp_id'):
+                return None
+        elif platform == 'buff':
+            row = dict(weapon_data)
+            if not row.get('buff_id'):
+                return None
+        elif platform == 'steam':
+            row = dict(weapon_data, steam_hash_name=weapon_data.get('data_hash_name'))
+        else:
+            raise ValueError(f"不支持的平台: {platform}")
+
+        if not row.get('steam_hash_name'):
+            return None
+        return row
+
+    @classmethod
+    def merge_catalog(cls, weapon_list: List[Dict[str, Any]], platform: str) -> Dict[str, int]:
+        """
+        以集合方式把一批平台武器数据合并到 weapon_classID
+
+        1. 一次 executemany 写入临时暂存表（steam_hash_name 重复时以最后一条为准）
+        2. 与 weapon_classID 按 steam_hash_name 连接一次，得到 已存在 / 新增 两个集合
+        3. 已存在的记录只更新该平台的列（CATALOG_MERGE_RULES['update']，值有变化才写），
+           新增的记录插入该平台的全部列（CATALOG_MERGE_RULES['insert']），全部在同一个事务内完成
+
+        :param weapon_list: 平台提交的武器数据列表
+        :param platform: 'yyyp' / 'buff' / 'steam'
+        :return: total / inserted / updated / unchanged / skipped 计数
+        """
+        rules = cls.CATALOG_MERGE_RULES.get(platform)
+        if rules is None:
+            raise ValueError(f"不支持的平台: {platform}")
+        table = cls.get_table_name()
+        stage = 'temp.weapon_classID_merge_stage'
+        columns = rules['insert']
+        update_columns = rules['update']
+
+        rows = []
+        skipped = 0
+        for weapon_data in weapon_list:
+            row = cls._normalize_catalog_row(weapon_data, platform)
+            if row is None:
+                skipped += 1
+                continue
+            values = []
+            for c in columns:
+                value = row.get(c)
+                # 与模型保存一致，空字符串按 NULL 处理
+                if isinstance(value, str) and value.strip() == '':
+                    value = None
+                values.append(value)
+            rows.append(tuple(values))
+
+        inserted = updated = matched = 0
+        db = DatabaseManager()
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            # 列类型与 weapon_classID 一致，IS 比较时不会因类型亲和性不同而误判为变化
+            column_defs = ', '.join(
+                f"[{c}] {cls._schema.fields[c]['type']}" + (' PRIMARY KEY' if c == 'steam_hash_name' else '')
+                for c in columns
+            )
+            cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+            cursor.execute(f"CREATE TEMP TABLE weapon_classID_merge_stage ({column_defs})")
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {stage} ({', '.join(f'[{c}]' for c in columns)}) "
+                f"VALUES ({', '.join(['?'] * len(columns))})",
+                rows
+            )
+
+            matched = cursor.execute(
+                f"SELECT COUNT(*) FROM {stage} s JOIN {table} w ON w.steam_hash_name = s.steam_hash_name"
+            ).fetchone()[0]
+
+            # ---------- 已存在：只更新该平台的列 ----------
+            if update_columns:
+                targets = ', '.join(f'[{c}]' for c in update_columns)
+                compare = ' AND '.join(f'w.[{c}] IS s.[{c}]' for c in update_columns)
+                updated = cursor.execute(f"""
+                    UPDATE {table} SET ({targets}) = (
+                        SELECT {', '.join(f's.[{c}]' for c in update_columns)}
+                        FROM {stage} s WHERE s.steam_hash_name = {table}.steam_hash_name
+                    )
+                    WHERE steam_hash_name IN (
+                        SELECT s.steam_hash_name FROM {stage} s
+                        JOIN {table} w ON w.steam_hash_name = s.steam_hash_name
+                        WHERE NOT ({compare})
+                    )
+                """).rowcount
+
+            # ---------- 新增：表中没有的 steam_hash_name ----------
+            new_keys = [row[0] for row in cursor.execute(f"""
+                SELECT s.steam_hash_name FROM {stage} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} w WHERE w.steam_hash_name = s.steam_hash_name)
+            """)]
+            escaped = ', '.join(f'[{c}]' for c in columns)
+            inserted = cursor.execute(f"""
+                INSERT INTO {table} ({escaped})
+                SELECT {', '.join(f's.[{c}]' for c in columns)} FROM {stage} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} w WHERE w.steam_hash_name = s.steam_hash_name)
+            """).rowcount
+
+            cursor.execute(f"DROP TABLE {stage}")
+
+        # 只有新增会带来新名称，已存在记录只更新平台列
+        weapon_catalog.refresh(new_keys)
+
+        result = {
+            'total': len(weapon_list),
+            'inserted': inserted,
+            'updated': updated,
+            'unchanged': matched - updated,
+            'skipped': skipped
+        }
+        print(f"{platform}平台武器数据合并完成: 新增 {inserted} 条, 更新 {updated} 条, "
+              f"未变化 {result['unchanged']} 条, 跳过 {skipped} 条")
+        return result
+
     @classmethod
     def batch_insert_or_update(cls, weapon_list: List[Dict[str, Any]], platform: str = 'yyyp') -> int:
         """
         批量插入或更新武器数据（yyyp和steam平台专用）
         
-        悠悠有品逻辑：
-        1. 先通过 steam_hash_name 查找记录
+        悠悠有品逻辑（merge_catalog 集合合并）：
+        1. 通过 steam_hash_name 匹配记录
         2. 如果找到：只更新 yyyp_id 和 yyyp_class_name
         3. 如果未找到：插入全部字段（包括 steam_hash_name, market_listing_item_name, yyyp_id 等）
         
@@ -208,105 +373,49 @@ class WeaponClassIDModel(BaseModel):
         :param platform: 平台标识 ('yyyp', 'steam')
         :return: 成功处理的数量
         """
+        if platform != 'steam':
+            result = cls.merge_catalog(weapon_list, 'yyyp')
+            return result['inserted'] + result['updated'] + result['unchanged']
+
+        # Steam平台：按 steam_id 匹配并更新所有字段，保持原有逻辑
         success_count = 0
         update_count = 0
         insert_count = 0
         skip_count = 0
-        
-        id_field_map = {
-            'yyyp': 'yyyp_id',
-            'steam': 'steam_id'
-        }
-        id_field = id_field_map.get(platform, 'yyyp_id')
-        db = cls().db
 
         for weapon_data in weapon_list:
             try:
-                # 兼容旧数据：如果传入的是'Id'字段，根据平台映射到对应字段
-                if 'Id' in weapon_data and id_field not in weapon_data:
-                    weapon_data[id_field] = weapon_data.pop('Id')
+                # 兼容旧数据：如果传入的是'Id'字段，映射到steam_id
+                if 'Id' in weapon_data and 'steam_id' not in weapon_data:
+                    weapon_data['steam_id'] = weapon_data.pop('Id')
 
-                platform_id = weapon_data.get(id_field)
+                platform_id = weapon_data.get('steam_id')
                 if not platform_id:
-                    print(f"武器数据缺少{id_field}字段，跳过")
+                    print(f"武器数据缺少steam_id字段，跳过")
                     skip_count += 1
                     continue
 
-                # 悠悠有品平台：优先通过 steam_hash_name 查找
-                if platform == 'yyyp':
-                    # 获取 CommodityHashName (对应 steam_hash_name)
-                    steam_hash_name = weapon_data.get('en_weapon_name') or weapon_data.get('steam_hash_name')
-                    
-                    if steam_hash_name:
-                        # 先通过 steam_hash_name 查找
-                        existing_records = cls.find_by_steam_hash_name(steam_hash_name)
-                        
-                        if existing_records:
-                            # 记录已存在，只更新 yyyp_id 和 yyyp_class_name
-                            yyyp_class_name = weapon_data.get('yyyp_class_name', '')
-                            sql_update = f'UPDATE {cls.get_table_name()} SET [yyyp_id] = ?, [yyyp_class_name] = ? WHERE [steam_hash_name] = ?'
-                            affected_rows = db.execute_update(sql_update, (platform_id, yyyp_class_name, steam_hash_name))
-                            
-                            if affected_rows > 0:
-                                success_count += 1
-                                update_count += 1
-                                print(f"✅ 更新悠悠有品数据成功 (steam_hash_name匹配): yyyp_id={platform_id}, steam_hash_name={steam_hash_name}")
-                            continue
-                    
-                    # 如果没有 steam_hash_name 或未找到匹配记录，插入新记录
-                    # 需要映射字段名：en_weapon_name -> steam_hash_name, CommodityName -> market_listing_item_name
-                    insert_data = {}
-                    if 'en_weapon_name' in weapon_data:
-                        insert_data['steam_hash_name'] = weapon_data['en_weapon_name']
-                    elif 'steam_hash_name' in weapon_data:
-                        insert_data['steam_hash_name'] = weapon_data['steam_hash_name']
-                    
-                    if 'CommodityName' in weapon_data:
-                        insert_data['market_listing_item_name'] = weapon_data['CommodityName']
-                    elif 'market_listing_item_name' in weapon_data:
-                        insert_data['market_listing_item_name'] = weapon_data['market_listing_item_name']
-                    
-                    # 复制其他字段
-                    for key in ['yyyp_id', 'yyyp_class_name', 'weapon_type', 'weapon_name', 'item_name', 'float_range', 'Rarity']:
-                        if key in weapon_data:
-                            insert_data[key] = weapon_data[key]
-                    
-                    # 检查是否有必需的主键
-                    if 'steam_hash_name' not in insert_data or not insert_data['steam_hash_name']:
-                        print(f"悠悠有品数据缺少 steam_hash_name 字段，跳过: yyyp_id={platform_id}")
-                        skip_count += 1
-                        continue
-                    
+                existing_list = cls.find_by_steam_id(platform_id)
+                existing = existing_list[0] if existing_list else None
+
+                if existing:
+                    # 更新现有记录（更新所有字段）
+                    for key, value in weapon_data.items():
+                        if hasattr(existing, key):
+                            setattr(existing, key, value)
+
+                    if existing.save():
+                        success_count += 1
+                        update_count += 1
+                else:
                     # 插入新记录
-                    new_weapon = cls(**insert_data)
+                    new_weapon = cls(**weapon_data)
                     if new_weapon.save():
                         success_count += 1
                         insert_count += 1
-                        print(f"✅ 插入新悠悠有品数据: yyyp_id={platform_id}, steam_hash_name={insert_data['steam_hash_name']}")
-                
-                # Steam平台：保持原有逻辑
-                elif platform == 'steam':
-                    existing_list = cls.find_by_steam_id(platform_id)
-                    existing = existing_list[0] if existing_list else None
-
-                    if existing:
-                        # 更新现有记录（更新所有字段）
-                        for key, value in weapon_data.items():
-                            if hasattr(existing, key):
-                                setattr(existing, key, value)
-
-                        if existing.save():
-                            success_count += 1
-                            update_count += 1
-                    else:
-                        # 插入新记录
-                        new_weapon = cls(**weapon_data)
-                        if new_weapon.save():
-                            success_count += 1
-                            insert_count += 1
 
             except Exception as e:
-                print(f"处理武器数据失败 ({id_field}: {weapon_data.get(id_field)}): {e}")
+                print(f"处理武器数据失败 (steam_id: {weapon_data.get('steam_id')}): {e}")
                 import traceback
                 print(f"错误堆栈: {traceback.format_exc()}")
                 continue
@@ -317,110 +426,20 @@ class WeaponClassIDModel(BaseModel):
     @classmethod
     def batch_update_buff_id(cls, weapon_list: List[Dict[str, Any]]) -> int:
         """
-        BUFF专用：批量更新或插入buff_id和相关字段（UPSERT操作）
+        BUFF专用：批量更新或插入buff_id和相关字段（merge_catalog 集合合并）
+        steam_hash_name 已存在时只更新 buff_id 和 buff_class_name，否则插入所有字段
         :param weapon_list: 武器数据列表，每项包含 buff_id, steam_hash_name, market_listing_item_name, 
                            buff_class_name, weapon_type, weapon_name, item_name
         :return: 成功处理的数量
         """
-        success_count = 0
-        skip_count = 0
-        insert_count = 0
-        update_count = 0
-        db = cls().db
-
-        for weapon_data in weapon_list:
-            try:
-                buff_id = weapon_data.get('buff_id')
-                steam_hash_name = weapon_data.get('steam_hash_name')
-                market_listing_item_name = weapon_data.get('market_listing_item_name')
-                buff_class_name = weapon_data.get('buff_class_name')
-                weapon_type = weapon_data.get('weapon_type', '')
-                weapon_name = weapon_data.get('weapon_name', '')
-                item_name = weapon_data.get('item_name', '')
-
-                if not buff_id:
-                    print(f"BUFF数据缺少buff_id字段，跳过")
-                    skip_count += 1
-                    continue
-
-                if not steam_hash_name:
-                    print(f"BUFF数据缺少steam_hash_name字段，跳过: buff_id={buff_id}")
-                    skip_count += 1
-                    continue
-
-                # 先查询是否存在匹配的记录
-                existing_records = cls.find_by_steam_hash_name(steam_hash_name)
-                
-                if existing_records:
-                    # 记录已存在，执行 UPDATE
-                    # 如果steam_hash_name匹配成功，则只写入buff_id和buff_class_name
-                    sql_update = f'UPDATE {cls.get_table_name()} SET [buff_id] = ?, [buff_class_name] = ? WHERE [steam_hash_name] = ?'
-                    affected_rows = db.execute_update(sql_update, (buff_id, buff_class_name, steam_hash_name))
-                    
-                    if affected_rows > 0:
-                        success_count += 1
-                        update_count += 1
-                        print(f"✅ 更新BUFF数据成功 (steam_hash_name匹配): buff_id={buff_id}, steam_hash_name={steam_hash_name}")
-                else:
-                    # 记录不存在，执行 INSERT，写入所有字段
-                    sql_insert = f'''INSERT INTO {cls.get_table_name()} 
-                                    ([steam_hash_name], [market_listing_item_name], [buff_id], [buff_class_name], 
-                                     [weapon_type], [weapon_name], [item_name]) 
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)'''
-                    db.execute_insert(sql_insert, (steam_hash_name, market_listing_item_name, buff_id, 
-                                                   buff_class_name, weapon_type, weapon_name, item_name))
-                    success_count += 1
-                    insert_count += 1
-                    print(f"✅ 插入新BUFF数据 (无steam_hash_name匹配): buff_id={buff_id}, steam_hash_name={steam_hash_name}, "
-                          f"weapon_type={weapon_type}, weapon_name={weapon_name}, item_name={item_name}")
-
-            except Exception as e:
-                print(f"处理BUFF数据失败: buff_id={weapon_data.get('buff_id')}, 错误: {e}")
-                import traceback
-                print(f"错误堆栈: {traceback.format_exc()}")
-                continue
-
-        print(f"BUFF更新完成: 总成功 {success_count} 条 (更新 {update_count} 条, 插入 {insert_count} 条), 跳过 {skip_count} 条")
-        return success_count
+        result = cls.merge_catalog(weapon_list, 'buff')
+        return result['inserted'] + result['updated'] + result['unchanged']
 
     @classmethod
     def batch_update_steam_hash_name(cls, weapon_list: List[Dict[str, Any]]) -> int:
         """
-        Steam专用：批量插入steam_hash_name
+        Steam专用：批量插入steam_hash_name（merge_catalog 集合合并，已存在的记录保持不变）
         :param weapon_list: 武器数据列表，每项包含 data_hash_name, market_listing_item_name, weapon_type, weapon_name, item_name
-        :return: 成功处理的数量
+        :return: 新插入的数量
         """
-        success_count = 0
-        skip_count = 0
-        db = cls().db
-
-        for weapon_data in weapon_list:
-            try:
-                data_hash_name = weapon_data.get('data_hash_name')
-                market_listing_item_name = weapon_data.get('market_listing_item_name')
-                weapon_type = weapon_data.get('weapon_type')
-                weapon_name = weapon_data.get('weapon_name')
-                item_name = weapon_data.get('item_name')
-
-                if not data_hash_name:
-                    skip_count += 1
-                    continue
-
-                # 使用 INSERT OR IGNORE 避免主键冲突
-                sql_insert = f'''INSERT OR IGNORE INTO {cls.get_table_name()} 
-                                ([steam_hash_name], [weapon_type], [weapon_name], [item_name], [market_listing_item_name]) 
-                                VALUES (?, ?, ?, ?, ?)'''
-                affected_rows = db.execute_insert(sql_insert, (data_hash_name, weapon_type, weapon_name, item_name, market_listing_item_name))
-                
-                if affected_rows > 0:
-                    success_count += 1
-                else:
-                    # 数据已存在，被忽略
-                    skip_count += 1
-
-            except Exception as e:
-                print(f"处理Steam数据失败: {e}")
-                continue
-
-        print(f"Steam插入完成: 总成功 {success_count} 条, 跳过 {skip_count} 条（重复）")
-        return success_count
+        return cls.merge_catalog(weapon_list, 'steam')['inserted']
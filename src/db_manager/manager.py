@@ -3,15 +3,21 @@
 数据库管理器 - 统一管理所有表模型
 """
 
-from typing import List, Type
+import hashlib
+from typing import List, Optional, Type
 from .base_model import BaseModel
 from .database import DatabaseManager
+from .search import SEARCH_COLUMNS, ensure_search_indexes
+
+# 保存 schema 指纹的元数据表
+SCHEMA_META_TABLE = 'schema_meta'
 
 # 导入所有模型
-from .index import ConfigModel, FundsModel, BuyModel, SellModel, LeaseModel, WeaponClassIDModel
+from .index import ConfigModel, FundsModel, BuyModel, SellModel, LeaseModel, WeaponClassIDModel, BuyPriceExactModel, BuyPriceIndexModel
+from .index import BuyDailyRollupModel, SellDailyRollupModel, LeaseDailyRollupModel, YyypLentDailyRollupModel
 from .yyyp import YyypBuyModel, YyypSellModel, YyypLentModel, YyypMessageboxModel
 from .buff import BuffBuyModel, BuffSellModel, BuffLentModel
-from .steam import SteamBuyModel, SteamSellModel, SteamInventoryHistoryModel, SteamInventoryHistoryIndexModel, SteamInventoryModel, SteamStockComponentsModel
+from .steam import SteamBuyModel, SteamSellModel, SteamInventoryHistoryModel, SteamInventoryHistoryIndexModel, SteamInventoryModel, SteamInventoryGroupModel, SteamStockComponentsModel
 
 
 class DBManager:
@@ -31,6 +37,8 @@ class DBManager:
             SellModel,
             LeaseModel,
             WeaponClassIDModel,  # 武器ClassID映射表（统一管理）
+            BuyPriceExactModel,  # 购入价格索引（由buy表触发器维护，需在buy之后）
+            BuyPriceIndexModel,
             
             # YYYP表
             YyypBuyModel,
@@ -38,6 +46,12 @@ class DBManager:
             YyypLentModel,
             YyypMessageboxModel,
 
+            # 日汇总表（由来源表触发器维护，需在buy / sell / lease / yyyp_lent之后）
+            BuyDailyRollupModel,
+            SellDailyRollupModel,
+            LeaseDailyRollupModel,
+            YyypLentDailyRollupModel,
+
             # buff表
             BuffBuyModel,
             BuffSellModel,
@@ -49,31 +63,86 @@ class DBManager:
             SteamInventoryHistoryModel,
             SteamInventoryHistoryIndexModel,
             SteamInventoryModel,
+            SteamInventoryGroupModel,
             SteamStockComponentsModel,
         ]
     
+    def _model_fingerprint(self) -> str:
+        """模型定义（表名、字段、索引、触发器）与全文索引定义的指纹，代码中的表结构变化后随之变化"""
+        digest = hashlib.sha256()
+        for model_class in self.models:
+            triggers = [trigger['sql'] for trigger in model_class.get_triggers() + model_class._time_triggers()]
+            digest.update(repr((
+                model_class.get_table_name(), model_class.get_fields(), model_class.get_indexes(), triggers
+            )).encode('utf-8'))
+        digest.update(repr(SEARCH_COLUMNS).encode('utf-8'))
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _schema_fingerprint(conn) -> str:
+        """数据库中实际 schema（sqlite_master）的指纹，表、列、索引、触发器被改动或删除后随之变化"""
+        rows = conn.execute(f"""
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE name != '{SCHEMA_META_TABLE}' AND name NOT LIKE 'sqlite_stat%'
+            ORDER BY type, name
+        """).fetchall()
+        return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
+    
+    def _stored_fingerprints(self, conn) -> Optional[tuple]:
+        """上次初始化成功时保存的 (模型指纹, schema 指纹)，没有时返回 None"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SCHEMA_META_TABLE,)
+        ).fetchone()
+        if not exists:
+            return None
+        stored = dict(conn.execute(f"SELECT key, value FROM {SCHEMA_META_TABLE}").fetchall())
+        return stored.get('model_fingerprint'), stored.get('schema_fingerprint')
+    
     def initialize_database(self) -> bool:
-        """初始化数据库 - 按顺序检查并创建所有表"""
+        """初始化数据库 - 按顺序检查并创建所有表
+        
+        启动时先在一个连接上读取 sqlite_master：模型定义与数据库 schema 都和上次初始化成功时一致，
+        直接跳过所有 DDL；否则在一个事务内检查并创建所有表，成功后保存新的指纹。
+        """
+        model_fingerprint = self._model_fingerprint()
+        with self.db.get_connection() as conn:
+            if self._stored_fingerprints(conn) == (model_fingerprint, self._schema_fingerprint(conn)):
+                print("✅ 数据库结构未变化，跳过初始化检查")
+                return True
+        
         print("正在初始化数据库...")
 
         success_count = 0
         total_count = len(self.models)
         failed_tables = []
 
-        for model_class in self.models:
-            try:
-                table_name = model_class.get_table_name()
+        # 所有 DDL 与数据迁移在同一个连接、同一个事务内执行，结束时一次提交
+        with self.db.transaction() as conn:
+            for model_class in self.models:
+                try:
+                    table_name = model_class.get_table_name()
 
-                if model_class.ensure_table_exists():
-                    success_count += 1
-                else:
-                    failed_tables.append(table_name)
-                    print(f"❌ 表 {table_name} 检查失败")
+                    if model_class.ensure_table_exists():
+                        success_count += 1
+                    else:
+                        failed_tables.append(table_name)
+                        print(f"❌ 表 {table_name} 检查失败")
 
-            except Exception as e:
-                table_name = model_class.get_table_name()
-                failed_tables.append(table_name)
-                print(f"❌ 表 {table_name} 初始化异常: {e}")
+                except Exception as e:
+                    table_name = model_class.get_table_name()
+                    failed_tables.append(table_name)
+                    print(f"❌ 表 {table_name} 初始化异常: {e}")
+
+            # 全文索引依赖主表，放在所有表之后；失败时搜索退回 LIKE，不影响初始化结果
+            ensure_search_indexes()
+
+            # 全部成功时才保存指纹，有失败的表时下次启动重新检查
+            if not failed_tables:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {SCHEMA_META_TABLE} (key TEXT PRIMARY KEY, value TEXT)")
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {SCHEMA_META_TABLE} (key, value) VALUES (?, ?)",
+                    [('model_fingerprint', model_fingerprint), ('schema_fingerprint', self._schema_fingerprint(conn))]
+                )
 
         # 显示最终结果
         if success_count == total_count:
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+游标（keyset）分页
+
+按 (排序键, rowid) 定位上一页最后一行，下一页从该位置之后继续读取，
+不再用 OFFSET 扫描并丢弃前面的所有行；排序键有索引时任意页的代价与第一页相同。
+
+排序键为 NULL 的行单独作为一段：降序时排在最后，升序时排在最前（与 SQLite 默认一致）。
+每段的条件都只有一个范围约束，可以直接在 (排序键, rowid) 索引上定位。
+
+rowid 默认与排序键同向；为保持已有 ORDER BY 下同值行的顺序，可以指定与排序键相反的方向，
+此时游标所在排序键的剩余行单独作为一段读取。
+"""
+
+import base64
+import json
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+
+class CursorPage(list):
+    """一页查询结果，next_cursor 为 None 表示没有下一页"""
+
+    def __init__(self, items: Iterable = (), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(sort_value: Any, rowid: int) -> str:
+    """把 (排序键, rowid) 编码为不透明的游标字符串"""
+    raw = json.dumps([sort_value, rowid], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, rowid = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        if not isinstance(rowid, int):
+            raise ValueError
+        return sort_value, rowid
+    except Exception:
+        raise ValueError('无效的分页游标')
+
+
+def _segments(sort_key: str, rowid: str, descending: bool, rowid_descending: bool,
+              position: Optional[Tuple[Any, int]]):
+    """生成从游标位置开始、按顺序需要读取的各段 (条件, 参数)"""
+    op = '<' if descending else '>'
+    rowid_op = '<' if rowid_descending else '>'
+
+    def seek_value(value, last_rowid):
+        if rowid_descending == descending:
+            return [(f"({sort_key}, {rowid}) {op} (?, ?)", [value, last_rowid])]
+        # 方向相反时不能用行值比较：先读同一排序键的剩余行，再读之后的排序键
+        return [(f"{sort_key} = ? AND {rowid} {rowid_op} ?", [value, last_rowid]),
+                (f"{sort_key} {op} ?", [value])]
+
+    def seek_null(value, last_rowid):
+        return [(f"{sort_key} IS NULL AND {rowid} {rowid_op} ?", [last_rowid])]
+
+    order = [(f"{sort_key} IS NOT NULL", seek_value), (f"{sort_key} IS NULL", seek_null)]
+    if not descending:
+        order.reverse()
+
+    if position is None:
+        start = 0
+    else:
+        start = next(i for i, (_, seek) in enumerate(order) if (seek is seek_null) == (position[0] is None))
+
+    for i, (condition, seek) in enumerate(order[start:]):
+        if i == 0 and position is not None:
+            yield from seek(*position)
+        else:
+            yield condition, []
+
+
+def keyset_fetch(db, columns: str, source: str, where: str, params: Sequence,
+                 sort_key: str, descending: bool = True, cursor: Optional[str] = None,
+                 limit: int = 20, rowid: str = 'rowid',
+                 rowid_descending: Optional[bool] = None) -> Tuple[List[tuple], Optional[str]]:
+    """
+    游标分页查询
+
+    :param db: DatabaseManager
+    :param columns: SELECT 的列（可信 SQL）
+    :param source: FROM 子句（表名或 "表名 别名"）
+    :param where: 过滤条件，不能包含 ORDER BY / LIMIT
+    :param params: 过滤条件的参数
+    :param sort_key: 排序键（可信 SQL：列名或表达式）
+    :param descending: 是否降序
+    :param cursor: 上一页返回的 next_cursor，第一页传 None
+    :param limit: 每页条数
+    :param rowid: rowid 列（带别名时如 "si.rowid"）
+    :param rowid_descending: 同一排序键内 rowid 是否降序，None 表示与 descending 相同
+    :return: (本页行, 下一页游标)
+    """
+    limit = max(1, int(limit))
+    position = decode_cursor(cursor) if cursor else None
+    if rowid_descending is None:
+        rowid_descending = descending
+    direction = 'DESC' if descending else 'ASC'
+    rowid_direction = 'DESC' if rowid_descending else 'ASC'
+    base_where = f"({where})" if where else "1=1"
+
+    rows = []
+    with db.get_connection() as conn:
+        for condition, seek_params in _segments(sort_key, rowid, descending, rowid_descending, position):
+            # 多取一行用于判断是否还有下一页
+            need = limit + 1 - len(rows)
+            sql = (
+                f"SELECT {columns}, {sort_key}, {rowid} FROM {source} "
+                f"WHERE {base_where} AND {condition} "
+                f"ORDER BY {sort_key} {direction}, {rowid} {rowid_direction} LIMIT ?"
+            )
+            rows.extend(conn.execute(sql, tuple(params) + tuple(seek_params) + (need,)).fetchall())
+            if len(rows) > limit:
+                break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[-2], last[-1])
+
+    return [row[:-2] for row in rows], next_cursor
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+价格规范化
+
+steam_inventory、steam_stockComponents 的价格列为 REAL，写入前统一转换为数字：
+平台返回的价格可能带 ￥ 符号、千分位逗号，前端清空价格时提交空字符串或 'None'，都在这里处理，
+保证写入价格列的只有数字或 NULL。
+REAL 列仍可能存有无法解析的文本（如修复前写入的空字符串），读取时同样需要规范化：
+SQL 聚合与触发器使用 price_sql，逐行读取使用 price_or_none，两者规则一致：
+数字原样保留（非有限值除外）；文本去掉 ￥ / ¥ 符号、千分位逗号和首尾空白后，
+只接受由数字和至多一个小数点组成的写法，负数、科学计数法、'nan' / 'inf' 都视为无法解析。
+
+get_auto_price 是按物品名称关键词得出的固定价格（奖牌、徽章等为 0，库存存储组件为 14），
+Steam 库存同步和库存价格回填都从这里取，保证两处规则一致。
+"""
+
+import math
+import re
+from typing import Any, Optional
+
+# 去掉符号、逗号后的首尾空白，与 price_sql 的 TRIM 字符一致
+_WHITESPACE = ' \t\r\n'
+# 与 price_sql 的 GLOB 条件一致：只有数字和至多一个小数点，且至少有一位数字
+_PRICE_PATTERN = re.compile(r'(?=[0-9.]*[0-9])[0-9]*\.?[0-9]*')
+# 最大的有限浮点数，price_sql 用它排除 SQLite 中的无穷大
+_FLOAT_MAX = '1.7976931348623157e308'
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """
+    把价格转换为数字
+
+    :param value: 数字或价格文本（可带 ￥ / ¥ 符号、千分位逗号）
+    :return: 价格；None、空字符串、'None' 返回 None
+    :raises ValueError: 不是数字，或是 NaN / 无穷大、负数和科学计数法文本
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if not math.isfinite(value):
+            raise ValueError(f"价格不是有限数字: {value}")
+        return float(value)
+    text = str(value).replace('￥', '').replace('¥', '').replace(',', '').strip(_WHITESPACE)
+    if text in ('', 'None'):
+        return None
+    if not _PRICE_PATTERN.fullmatch(text):
+        raise ValueError(f"无法解析的价格: {value}")
+    return float(text)
+
+
+def price_or_none(value: Any) -> Optional[float]:
+    """同 parse_price，无法解析时返回 None"""
+    try:
+        return parse_price(value)
+    except ValueError:
+        return None
+
+
+def get_auto_price(item_name):
+    """
+    根据物品名称自动填充价格（Steam 库存同步、库存价格回填共用）
+    返回: float 价格，或 None（需要从buy表查询）
+    """
+    if not item_name:
+        return None
+
+    # 价格为0的物品关键词
+    zero_price_keywords = ['赛季奖牌', '奖牌', '勋章', '徽章', '布章', '硬币']
+    for keyword in zero_price_keywords:
+        if keyword in item_name:
+            return 0
+
+    # 库存存储组件价格为14
+    if '库存存储组件' in item_name:
+        return 14
+
+    # 其他物品返回None，需要从buy表查询
+    return None
+
+def price_sql(expr: str) -> str:
+    """
+    price_or_none 的 SQL 版本：数字原样返回，文本去掉 ￥ / ¥ 符号、千分位逗号和首尾空白后是数字则转换为 REAL，
+    其余（空字符串、'None'、无法解析的文本，以及负数、科学计数法写法）返回 NULL
+    （无穷大返回 NULL；SQLite 不存储 NaN，写入 NaN 时即为 NULL，与 price_or_none 对非有限值返回 None 一致）
+
+    :param expr: 价格列或表达式，如 "NEW.price"
+    """
+    text = f"TRIM(REPLACE(REPLACE(REPLACE({expr}, '￥', ''), '¥', ''), ',', ''), ' ' || char(9, 13, 10))"
+    return (f"(CASE WHEN typeof({expr}) IN ('integer', 'real') "
+            f"AND {expr} BETWEEN -{_FLOAT_MAX} AND {_FLOAT_MAX} THEN {expr} "
+            f"WHEN typeof({expr}) = 'text' AND {text} GLOB '*[0-9]*' "
+            f"AND {text} NOT GLOB '*[^0-9.]*' AND {text} NOT GLOB '*.*.*' "
+            f"THEN CAST({text} AS REAL) END)")
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+全量重建日汇总表
+
+用法:
+    python -m src.db_manager.rebuild_rollups
+
+日汇总表由明细表上的触发器增量维护，首次创建时会自动从明细表重建；
+绕过触发器修改过数据（例如直接替换数据库文件）或怀疑汇总不一致时运行。
+"""
+
+from .index.daily_rollup import rebuild_rollups
+
+
+if __name__ == '__main__':
+    result = rebuild_rollups()
+    print(f"共重建 {len(result)} 张日汇总表, {sum(result.values())} 行")
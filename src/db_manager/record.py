@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+只读记录类型
+
+批量读取只用于展示的数据时不需要模型实例的 _data / _original_data 两份字典，
+这里为每个模型生成一个基于 tuple 的记录类（__slots__ = ()，不带实例字典），
+按列名以属性方式访问，内存占用接近一个普通的行元组。
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, Sequence, Tuple
+
+
+class Record(tuple):
+    """只读记录基类，_fields 为列名，字段值按列顺序存放"""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def _make(cls, row: Sequence[Any]) -> 'Record':
+        """从数据库行创建记录，空字符串与模型一致转换为 None"""
+        return tuple.__new__(cls, [
+            None if value.__class__ is str and not value.strip() else value
+            for value in row
+        ])
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """按列名取值，列不存在时返回 default"""
+        return getattr(self, name, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return dict(zip(self._fields, self))
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={value!r}" for name, value in zip(self._fields, self))
+        return f"{self.__class__.__name__}({values})"
+
+
+def make_record_class(name: str, columns: Sequence[str]) -> type:
+    """生成带列名属性的只读记录类；列名可以是 Python 关键字（如 from），用 getattr 访问"""
+    namespace = {'__slots__': (), '_fields': tuple(columns)}
+    for i, column in enumerate(columns):
+        namespace[column] = property(itemgetter(i), doc=f"列 {column}")
+    return type(name, (Record,), namespace)
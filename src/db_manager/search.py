@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+全文搜索服务
+
+各页面的搜索框都是 item_name LIKE '%x%' OR weapon_name LIKE '%x%' 这样的条件，
+前后带通配符的 LIKE 用不上任何索引，每次都要扫描整张表。
+这里为需要搜索的表各建一张 FTS5 外部内容表（<表名>_fts，trigram 分词，支持任意子串匹配），
+由主表上的触发器同步，查询时先用 MATCH 取出候选 rowid，再用原来的 LIKE 条件校验，
+结果与原来的 LIKE 完全一致。
+
+以下情况自动退回原来的 LIKE 条件：
+- SQLite 没有编译 FTS5 或不支持 trigram 分词（SQLite < 3.34）
+- 关键词不足 3 个字（trigram 无法匹配）
+- 该表的 FTS 表不存在（例如建表失败）
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .database import DatabaseManager
+
+
+# 表名 -> 参与搜索的列
+SEARCH_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'steam_inventoryhistory': ('trade_title', 'item_name', 'weapon_name'),
+    'buy': ('item_name', 'weapon_name'),
+    'sell': ('item_name', 'weapon_name'),
+    'steam_buy': ('item_name', 'weapon_name'),
+    'steam_sell': ('item_name', 'weapon_name'),
+    'lease': ('item_name', 'weapon_name'),
+    'steam_inventory': ('item_name', 'weapon_name'),
+}
+
+# trigram 分词最短可匹配的关键词长度
+MIN_MATCH_LENGTH = 3
+
+_lock = threading.Lock()
+_fts5_available: Optional[bool] = None
+_ready_tables: Dict[str, bool] = {}
+
+
+def fts5_available() -> bool:
+    """当前 SQLite 是否支持 FTS5 trigram 分词（每个进程检测一次）"""
+    global _fts5_available
+    if _fts5_available is None:
+        try:
+            with DatabaseManager().get_connection() as conn:
+                conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+                conn.execute("DROP TABLE temp.fts5_probe")
+            _fts5_available = True
+        except Exception as e:
+            print(f"⚠️  SQLite 不支持 FTS5 trigram 分词，搜索使用 LIKE: {e}")
+            _fts5_available = False
+    return _fts5_available
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def _trigger_sql(table: str, columns: Sequence[str]) -> List[Tuple[str, str]]:
+    """主表的插入 / 删除 / 更新触发器，外部内容表删除时要传入旧值"""
+    fts = fts_table(table)
+    names = ', '.join(columns)
+    new_values = ', '.join(f'NEW.{c}' for c in columns)
+    old_values = ', '.join(f'OLD.{c}' for c in columns)
+    insert_new = f"INSERT INTO {fts} (rowid, {names}) VALUES (NEW.rowid, {new_values});"
+    delete_old = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.rowid, {old_values});"
+    return [
+        (f"{fts}_ai", f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END"),
+        (f"{fts}_ad", f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END"),
+        (f"{fts}_au", f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} "
+                      f"BEGIN {delete_old} {insert_new} END"),
+    ]
+
+
+def ensure_search_indexes() -> bool:
+    """
+    创建缺失的 FTS 表与同步触发器；FTS 表或触发器是新建的时从主表全量重建
+    需在各模型建表之后调用，不支持 FTS5 时直接返回 True（搜索使用 LIKE）
+    """
+    if not fts5_available():
+        return True
+
+    db = DatabaseManager()
+    existing = {row[0] for row in db.execute_query(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+    )}
+    ok = True
+    for table, columns in SEARCH_COLUMNS.items():
+        if table not in existing:
+            continue
+        fts = fts_table(table)
+        triggers = _trigger_sql(table, columns)
+        needs_rebuild = fts not in existing or any(name not in existing for name, _ in triggers)
+        try:
+            with db.transaction() as conn:
+                conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"{', '.join(columns)}, content='{table}', content_rowid='rowid', tokenize='trigram')"
+                )
+                for _, sql in triggers:
+                    conn.execute(sql)
+                if needs_rebuild:
+                    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+            if needs_rebuild:
+                print(f"✅ 全文索引 {fts} 已重建")
+        except Exception as e:
+            print(f"❌ 创建全文索引 {fts} 失败: {e}")
+            ok = False
+    with _lock:
+        _ready_tables.clear()
+    return ok
+
+
+def rebuild_search_index(table: str):
+    """从主表全量重建某张表的全文索引"""
+    fts = fts_table(table)
+    DatabaseManager().execute_update(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def _fts_ready(table: str) -> bool:
+    """该表的 FTS 表是否可用（每个进程按表检测一次）"""
+    ready = _ready_tables.get(table)
+    if ready is None:
+        ready = table in SEARCH_COLUMNS and fts5_available() and DatabaseManager().table_exists(fts_table(table))
+        with _lock:
+            _ready_tables[table] = ready
+    return ready
+
+
+def like_condition(columns: Sequence[str], keyword: str, alias: Optional[str] = None) -> Tuple[str, List[str]]:
+    """原来的 LIKE 条件：任意一列包含关键词"""
+    prefix = f"{alias}." if alias else ''
+    condition = ' OR '.join(f"{prefix}{c} LIKE ?" for c in columns)
+    return f"({condition})", [f"%{keyword}%"] * len(columns)
+
+
+def search_condition(table: str, keyword: str, columns: Optional[Sequence[str]] = None,
+                     alias: Optional[str] = None) -> Tuple[str, List[str]]:
+    """
+    生成“任意一列包含关键词”的 WHERE 条件
+
+    :param table: 表名（需在 SEARCH_COLUMNS 中才会使用全文索引）
+    :param keyword: 搜索关键词
+    :param columns: 参与搜索的列，默认 SEARCH_COLUMNS[table]
+    :param alias: 查询中主表的别名
+    :return: (条件, 参数)，条件已加括号，可直接用 AND 拼接
+    """
+    columns = tuple(columns or SEARCH_COLUMNS[table])
+    like, like_params = like_condition(columns, keyword, alias)
+    if len(keyword) < MIN_MATCH_LENGTH or not _fts_ready(table):
+        return like, like_params
+
+    fts = fts_table(table)
+    prefix = f"{alias}." if alias else ''
+    # 只在指定列中匹配整个关键词（双引号短语，内部双引号转义）
+    query = '{' + ' '.join(columns) + '} : "' + keyword.replace('"', '""') + '"'
+    condition = f"({prefix}rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?) AND {like})"
+    return condition, [query] + like_params
@@ -8,6 +8,7 @@ from .steam_sell import SteamSellModel
 from .steam_inventory_history import SteamInventoryHistoryModel
 from .steam_inventory_history_index import SteamInventoryHistoryIndexModel
 from .steam_inventory import SteamInventoryModel
+from .steam_inventory_group import SteamInventoryGroupModel
 from .steam_stock_components import SteamStockComponentsModel
 
 __all__ = [
@@ -16,6 +17,7 @@ __all__ = [
     'SteamInventoryHistoryModel',
     'SteamInventoryHistoryIndexModel',
     'SteamInventoryModel',
+    'SteamInventoryGroupModel',
     'SteamStockComponentsModel'
 ]
 
@@ -5,6 +5,7 @@ Steam购买记录表模型
 
 from typing import Dict, Any, List
 from ..base_model import BaseModel
+from ..search import search_condition
 
 
 class SteamBuyModel(BaseModel):
@@ -81,6 +82,11 @@ class SteamBuyModel(BaseModel):
                 'type': 'TEXT',
                 'not_null': False,
                 'default': None
+            },
+            'trade_date_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None
             }
         }
     
@@ -102,9 +108,18 @@ class SteamBuyModel(BaseModel):
             {
                 'name': 'steam_buy_idx_user',
                 'columns': ['data_user']
+            },
+            # 时间范围查询
+            {
+                'name': 'steam_buy_idx_trade_date_ts',
+                'columns': ['trade_date_ts']
             }
         ]
     
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'trade_date': 'trade_date_ts'}
+    
     @classmethod
     def find_by_user(cls, data_user: str, limit: int = None, offset: int = None):
         """根据用户查找购买记录"""
@@ -117,12 +132,14 @@ class SteamBuyModel(BaseModel):
         params = []
         
         if weapon_name:
-            where_conditions.append("weapon_name LIKE ?")
-            params.append(f"%{weapon_name}%")
+            condition, search_params = search_condition(cls.get_table_name(), weapon_name, columns=('weapon_name',))
+            where_conditions.append(condition)
+            params.extend(search_params)
         
         if item_name:
-            where_conditions.append("item_name LIKE ?")
-            params.append(f"%{item_name}%")
+            condition, search_params = search_condition(cls.get_table_name(), item_name, columns=('item_name',))
+            where_conditions.append(condition)
+            params.extend(search_params)
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         return cls.find_all(where_clause, tuple(params), limit, offset)
@@ -143,7 +160,7 @@ class SteamBuyModel(BaseModel):
     @classmethod
     def get_purchase_statistics(cls, data_user: str = None) -> Dict[str, Any]:
         """获取购买统计信息"""
-        db = cls().db
+        db = cls.get_db()
         where_clause = ""
         params = []
         
@@ -3,12 +3,21 @@
 Steam库存表模型
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from ..base_model import BaseModel
+from ..database import DatabaseManager
+from ..prices import price_sql
+from ..versions import data_versions
 
 
 class SteamInventoryModel(BaseModel):
     """Steam库存表模型"""
+
+    # sync_inventory 暂存表的列，顺序即 stage 行元组的顺序
+    SYNC_COLUMNS = (
+        'assetid', 'instanceid', 'classid', 'item_name', 'weapon_name', 'float_range',
+        'weapon_type', 'weapon_float', 'remark', 'buy_price'
+    )
     
     @classmethod
     def get_table_name(cls) -> str:
@@ -78,25 +87,25 @@ class SteamInventoryModel(BaseModel):
                 'comment': '用户Steam ID'
             },
             'buy_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': '购入价格'
             },
             'yyyp_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': '悠悠价格'
             },
             'buff_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': 'BUFF价格'
             },
             'steam_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': 'Steam价格'
@@ -129,6 +138,10 @@ class SteamInventoryModel(BaseModel):
             {
                 'name': 'steam_inventory_idx_data_user',
                 'columns': ['data_user']
+            },
+            {
+                'name': 'steam_inventory_idx_user_item',
+                'columns': ['data_user', 'item_name']
             }
         ]
 
@@ -143,6 +156,36 @@ class SteamInventoryModel(BaseModel):
         records = cls.find_all("assetid = ?", (assetid,))
         return records[0] if records else None
 
+    @classmethod
+    def update_by_assetids(cls, columns: Sequence[str], rows: List[tuple]) -> Dict[str, Optional[str]]:
+        """
+        按 assetid 批量更新部分列：先一次查出已存在的 assetid，再在同一个事务内执行一次 executemany
+
+        :param columns: 要更新的列
+        :param rows: (assetid, 各列的值...) 元组列表，值为 None 的列保持原值；同一 assetid 多次出现时按顺序依次生效
+        :return: 已存在的 assetid -> 所属用户（不在其中的即为数据库中不存在的 assetid）
+        """
+        table = cls.get_table_name()
+        assetids = list(dict.fromkeys(row[0] for row in rows))
+        db = DatabaseManager()
+        with db.transaction() as conn:
+            existing = {}
+            # 单条 SQL 的参数上限为 999，分块查询
+            for start in range(0, len(assetids), 500):
+                chunk = assetids[start:start + 500]
+                existing.update(conn.execute(
+                    f"SELECT assetid, data_user FROM {table} WHERE assetid IN ({', '.join(['?'] * len(chunk))})",
+                    chunk
+                ).fetchall())
+
+            params = [tuple(row[1:]) + (row[0],) for row in rows if row[0] in existing]
+            if params:
+                conn.executemany(
+                    f"UPDATE {table} SET {', '.join(f'{c} = COALESCE(?, {c})' for c in columns)} WHERE assetid = ?",
+                    params
+                )
+        return existing
+
     @classmethod
     def find_by_weapon_type(cls, weapon_type: str, data_user: str = None, limit: int = None, offset: int = None):
         """根据武器类型查找库存记录"""
@@ -175,3 +218,136 @@ class SteamInventoryModel(BaseModel):
             limit=limit
         )
 
+
+    @classmethod
+    def sync_inventory(cls, data_user: str, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        以集合方式把一次完整的库存快照同步到 steam_inventory
+
+        1. 一次 executemany 把快照写入临时暂存表（assetid 重复时以最后一条为准）
+        2. 补全 buy_price：提交值 > 已有记录的价格 > auto_price > 购入价格索引（buy_price_index）
+        3. 通过与 steam_inventory 的连接一次性得到 移出 / 更新 / 新增 / 未变化 四个集合，
+           每个集合只执行一条语句，全部在同一个事务内完成
+
+        :param data_user: 用户Steam ID
+        :param items: 字典列表，键为 SYNC_COLUMNS，另可带 auto_price（关键词规则得出的价格）
+        :return: inserted / updated / unchanged / removed / price_filled / price_not_filled 计数
+        """
+        table = cls.get_table_name()
+        columns = cls.SYNC_COLUMNS
+        stage = 'temp.steam_inventory_sync_stage'
+        # 与 steam_inventory 比较是否变化的列（data_user / if_inventory 单独处理）
+        compare = ' AND '.join(f's.{c} IS i.{c}' for c in columns if c != 'assetid')
+
+        rows = []
+        for item in items:
+            weapon_float = item.get('weapon_float')
+            rows.append(tuple(item.get(c) for c in columns) + (
+                item.get('auto_price'),
+                1 if weapon_float else 0
+            ))
+
+        db = DatabaseManager()
+        with db.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS steam_inventory_sync_stage (
+                    assetid TEXT PRIMARY KEY, instanceid TEXT, classid TEXT, item_name TEXT,
+                    weapon_name TEXT, float_range TEXT, weapon_type TEXT, weapon_float TEXT,
+                    remark TEXT, buy_price REAL, auto_price REAL, has_float INTEGER,
+                    need_price INTEGER DEFAULT 0
+                )
+            """)
+            # 临时表跟随连接存在，连接池复用连接时先清空上一次的残留
+            cursor.execute(f"DELETE FROM {stage}")
+            placeholders = ', '.join(['?'] * (len(columns) + 2))
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {stage} ({', '.join(columns)}, auto_price, has_float) "
+                f"VALUES ({placeholders})",
+                rows
+            )
+
+            # ---------- 补全 buy_price ----------
+            cursor.execute(f"""
+                UPDATE {stage} SET buy_price = (
+                    SELECT {price_sql('i.buy_price')} FROM {table} i WHERE i.assetid = {stage}.assetid
+                )
+                WHERE buy_price IS NULL
+            """)
+            cursor.execute(f"UPDATE {stage} SET need_price = 1, buy_price = auto_price WHERE buy_price IS NULL")
+            # 有磨损值：购入价格索引中 item_name + weapon_float 精确匹配
+            cursor.execute(f"""
+                UPDATE {stage} SET buy_price = (
+                    SELECT e.price FROM buy_price_exact e
+                    WHERE e.item_name = {stage}.item_name AND e.weapon_float = {stage}.weapon_float
+                )
+                WHERE buy_price IS NULL AND has_float = 1
+            """)
+            # 无磨损值：购入价格索引中同名物品平均价格
+            cursor.execute(f"""
+                UPDATE {stage} SET buy_price = (
+                    SELECT ROUND(p.price_sum / p.price_count, 2) FROM buy_price_index p
+                    WHERE p.item_name = {stage}.item_name AND p.price_count > 0
+                )
+                WHERE buy_price IS NULL AND has_float = 0
+            """)
+            price_filled, price_not_filled = cursor.execute(f"""
+                SELECT COALESCE(SUM(buy_price IS NOT NULL), 0), COALESCE(SUM(buy_price IS NULL), 0)
+                FROM {stage} WHERE need_price = 1
+            """).fetchone()
+
+            # 已存在的记录 = 更新 + 未变化（已在该用户库存中且所有列一致）
+            matched = cursor.execute(
+                f"SELECT COUNT(*) FROM {stage} s JOIN {table} i ON i.assetid = s.assetid"
+            ).fetchone()[0]
+
+            # ---------- 移出：库存中有但快照里没有 ----------
+            removed = 0
+            if rows:
+                removed = cursor.execute(f"""
+                    UPDATE {table} SET if_inventory = '0'
+                    WHERE data_user = ? AND if_inventory = '1'
+                    AND NOT EXISTS (SELECT 1 FROM {stage} s WHERE s.assetid = {table}.assetid)
+                """, (data_user,)).rowcount
+
+            # 物品从其他用户转入时，原用户的库存同样发生了变化
+            previous_users = [row[0] for row in cursor.execute(f"""
+                SELECT DISTINCT i.data_user FROM {stage} s JOIN {table} i ON i.assetid = s.assetid
+                WHERE i.data_user IS NOT ?
+            """, (data_user,))]
+
+            # ---------- 更新：已存在但有列发生变化 ----------
+            set_columns = [c for c in columns if c != 'assetid']
+            updated = cursor.execute(f"""
+                UPDATE {table} SET
+                    ({', '.join(set_columns)}) = (
+                        SELECT {', '.join('s.' + c for c in set_columns)}
+                        FROM {stage} s WHERE s.assetid = {table}.assetid
+                    ),
+                    data_user = ?, if_inventory = '1'
+                WHERE assetid IN (
+                    SELECT s.assetid FROM {stage} s JOIN {table} i ON i.assetid = s.assetid
+                    WHERE NOT (i.data_user IS ? AND i.if_inventory = '1' AND {compare})
+                )
+            """, (data_user, data_user)).rowcount
+
+            # ---------- 新增：快照里有但表中没有 ----------
+            inserted = cursor.execute(f"""
+                INSERT INTO {table} ({', '.join(columns)}, data_user, if_inventory)
+                SELECT {', '.join('s.' + c for c in columns)}, ?, '1'
+                FROM {stage} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table} i WHERE i.assetid = s.assetid)
+            """, (data_user,)).rowcount
+
+            cursor.execute(f"DELETE FROM {stage}")
+
+        for user in [data_user] + previous_users:
+            data_versions.bump(table, user)
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'unchanged': matched - updated,
+            'removed': removed,
+            'price_filled': price_filled,
+            'price_not_filled': price_not_filled
+        }
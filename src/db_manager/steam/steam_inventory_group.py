@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Steam库存分组汇总表模型
+
+库存分组接口按 (item_name, weapon_name, weapon_type, float_range) 分组展示用户在库存中的物品，
+原来每次请求都对该用户的全部库存做一次带多个 GROUP_CONCAT 的 GROUP BY，再在 Python 中拆分字符串。
+这里把每个分组的物品数量与各价格总和维护在汇总表中，由 steam_inventory 上的触发器增量更新
+（物品进入 / 移出库存、改价、改名都会同步），分组列表直接读汇总表并按分组分页，
+分组内的物品明细只为当前页的分组按 (data_user, item_name) 索引读取。
+
+分组键中的 NULL 按空字符串保存。
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..base_model import BaseModel
+from ..database import DatabaseManager
+from ..prices import price_sql
+
+
+# 单条 SQL 的参数上限为 999，分块查询时每块的条数
+_CHUNK_SIZE = 500
+
+# 分组键（与 steam_inventory 的列同名）
+GROUP_COLUMNS = ('item_name', 'weapon_name', 'weapon_type', 'float_range')
+# 汇总的价格列：steam_inventory 列 -> 汇总表列
+PRICE_COLUMNS = {
+    'buy_price': 'buy_price_sum',
+    'yyyp_price': 'yyyp_price_sum',
+    'buff_price': 'buff_price_sum',
+    'steam_price': 'steam_price_sum',
+}
+# 分组内物品明细的列
+MEMBER_COLUMNS = ('assetid', 'weapon_float', 'remark', 'buy_price', 'yyyp_price', 'buff_price', 'steam_price',
+                  'order_time')
+
+
+def _key_values(ref: str) -> List[str]:
+    return [f"COALESCE({ref}.data_user, '')"] + [f"COALESCE({ref}.{c}, '')" for c in GROUP_COLUMNS]
+
+
+def _add_sql() -> str:
+    keys = ', '.join(('data_user',) + GROUP_COLUMNS)
+    sums = ', '.join(PRICE_COLUMNS.values())
+    values = _key_values('NEW') + ["NEW.weapon_type IS '未知物品'", '1'] + [
+        f"COALESCE({price_sql(f'NEW.{c}')}, 0)" for c in PRICE_COLUMNS
+    ]
+    updates = ', '.join(['item_count = item_count + 1'] + [f"{s} = {s} + excluded.{s}" for s in PRICE_COLUMNS.values()])
+    return f"""
+        INSERT INTO steam_inventory_group ({keys}, is_unknown, item_count, {sums})
+        SELECT {', '.join(values)}
+        WHERE NEW.if_inventory = '1'
+        ON CONFLICT({keys}) DO UPDATE SET {updates};
+    """
+
+
+def _subtract_sql() -> str:
+    key = ' AND '.join(f"{column} = {value}" for column, value in zip(('data_user',) + GROUP_COLUMNS,
+                                                                        _key_values('OLD')))
+    updates = ', '.join(['item_count = item_count - 1'] + [
+        f"{s} = {s} - COALESCE({price_sql(f'OLD.{c}')}, 0)" for c, s in PRICE_COLUMNS.items()
+    ])
+    return f"""
+        UPDATE steam_inventory_group SET {updates} WHERE OLD.if_inventory = '1' AND {key};
+        DELETE FROM steam_inventory_group WHERE OLD.if_inventory = '1' AND {key} AND item_count <= 0;
+    """
+
+
+class SteamInventoryGroupModel(BaseModel):
+    """Steam库存分组汇总表：(用户, 物品名称, 武器名称, 武器类型, 磨损等级) -> 数量、价格总和"""
+
+    @classmethod
+    def get_table_name(cls) -> str:
+        return "steam_inventory_group"
+
+    @classmethod
+    def get_fields(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            'data_user': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '用户Steam ID'
+            },
+            'item_name': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '物品名称'
+            },
+            'weapon_name': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '武器名称'
+            },
+            'weapon_type': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '武器类型'
+            },
+            'float_range': {
+                'type': 'TEXT',
+                'primary_key': True,
+                'not_null': True,
+                'comment': '磨损等级'
+            },
+            'is_unknown': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '是否为未知物品（排序时放在最后）'
+            },
+            'item_count': {
+                'type': 'INTEGER',
+                'not_null': True,
+                'default': 0,
+                'comment': '在库存中的物品数量'
+            },
+            'buy_price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': '购入价格总和'
+            },
+            'yyyp_price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': '悠悠有品价格总和'
+            },
+            'buff_price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': 'BUFF价格总和'
+            },
+            'steam_price_sum': {
+                'type': 'REAL',
+                'not_null': True,
+                'default': 0,
+                'comment': 'Steam价格总和'
+            }
+        }
+
+    @classmethod
+    def get_indexes(cls) -> List[Dict[str, Any]]:
+        return [
+            {
+                'name': 'steam_inventory_group_idx_user_order',
+                'columns': ['data_user', 'is_unknown', 'item_name']
+            }
+        ]
+
+    @classmethod
+    def get_triggers(cls) -> List[Dict[str, Any]]:
+        watched = ', '.join(('data_user', 'if_inventory') + GROUP_COLUMNS + tuple(PRICE_COLUMNS))
+        return [
+            {
+                'name': 'steam_inventory_group_ai',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS steam_inventory_group_ai AFTER INSERT ON steam_inventory "
+                       f"BEGIN {_add_sql()} END"
+            },
+            {
+                'name': 'steam_inventory_group_ad',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS steam_inventory_group_ad AFTER DELETE ON steam_inventory "
+                       f"BEGIN {_subtract_sql()} END"
+            },
+            {
+                'name': 'steam_inventory_group_au',
+                'sql': f"CREATE TRIGGER IF NOT EXISTS steam_inventory_group_au "
+                       f"AFTER UPDATE OF {watched} ON steam_inventory "
+                       f"BEGIN {_subtract_sql()} {_add_sql()} END"
+            }
+        ]
+
+    @classmethod
+    def ensure_table_exists(cls) -> bool:
+        """建表并创建触发器；触发器是新建的（首次部署或被删除过）或定义已变化时从 steam_inventory 全量重建"""
+        needs_rebuild = bool(cls._outdated_triggers())
+
+        if not super().ensure_table_exists():
+            return False
+
+        if needs_rebuild:
+            cls.rebuild()
+        return True
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """从 steam_inventory 全量重建分组汇总表，返回分组数"""
+        keys = ', '.join(('data_user',) + GROUP_COLUMNS)
+        values = _key_values('i')
+        sums = [f"SUM(COALESCE({price_sql(f'i.{c}')}, 0))" for c in PRICE_COLUMNS]
+        with DatabaseManager().transaction() as conn:
+            conn.execute("DELETE FROM steam_inventory_group")
+            count = conn.execute(f"""
+                INSERT INTO steam_inventory_group ({keys}, is_unknown, item_count, {', '.join(PRICE_COLUMNS.values())})
+                SELECT {', '.join(values)}, MAX(i.weapon_type IS '未知物品'), COUNT(*), {', '.join(sums)}
+                FROM steam_inventory i
+                WHERE i.if_inventory = '1'
+                GROUP BY {', '.join(values)}
+            """).rowcount
+        print(f"✅ 库存分组汇总重建完成: {count} 个分组")
+        return count
+
+    @classmethod
+    def find_groups(cls, data_user: str, limit: Optional[int] = None, offset: int = 0) -> Tuple[List[tuple], int]:
+        """
+        按展示顺序（未知物品在最后，其余按物品名称）读取用户的分组
+
+        :param limit: 每页分组数，None 表示全部
+        :return: (分组行列表, 分组总数)；分组行为 (data_user, item_name, weapon_name, weapon_type, float_range,
+                 item_count, buy_price_sum, yyyp_price_sum, buff_price_sum, steam_price_sum)
+        """
+        db = DatabaseManager()
+        sql = f"""
+            SELECT data_user, {', '.join(GROUP_COLUMNS)}, item_count, {', '.join(PRICE_COLUMNS.values())}
+            FROM steam_inventory_group
+            WHERE data_user = ?
+            ORDER BY is_unknown, {', '.join(GROUP_COLUMNS)}
+        """
+        params = (data_user,)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += (limit, offset)
+        groups = db.execute_query(sql, params)
+        if limit is None:
+            total = len(groups)
+        else:
+            total = db.execute_query("SELECT COUNT(*) FROM steam_inventory_group WHERE data_user = ?",
+                                     (data_user,))[0][0]
+        return groups, total
+
+    @classmethod
+    def find_members(cls, data_user: str, groups: Optional[Sequence[tuple]] = None) -> Dict[tuple, List[tuple]]:
+        """
+        读取分组内的物品明细（按写入顺序）
+
+        :param groups: find_groups 返回的分组行，None 表示该用户的全部分组
+        :return: {分组键 (item_name, weapon_name, weapon_type, float_range，NULL 为空字符串): [MEMBER_COLUMNS 行]}
+        """
+        key_size = len(GROUP_COLUMNS)
+        columns = ', '.join(f"COALESCE({c}, '')" for c in GROUP_COLUMNS) + ', ' + ', '.join(MEMBER_COLUMNS)
+        base = f"SELECT {columns}, rowid FROM steam_inventory WHERE data_user = ? AND if_inventory = '1'"
+        db = DatabaseManager()
+
+        if groups is None:
+            rows = db.execute_query(base, (data_user,))
+        else:
+            # 按当前页分组的物品名称走 (data_user, item_name) 索引，再按完整分组键过滤
+            names = list(dict.fromkeys(group[1] for group in groups))
+            rows = []
+            for start in range(0, len(names), _CHUNK_SIZE):
+                chunk_names = names[start:start + _CHUNK_SIZE]
+                chunk = [name for name in chunk_names if name]
+                conditions = []
+                if chunk:
+                    conditions.append(f"item_name IN ({', '.join(['?'] * len(chunk))})")
+                if '' in chunk_names:
+                    conditions.append("item_name IS NULL OR item_name = ''")
+                rows += db.execute_query(f"{base} AND ({' OR '.join(conditions)})", (data_user, *chunk))
+            wanted = {tuple(group[1:1 + key_size]) for group in groups}
+            rows = [row for row in rows if tuple(row[:key_size]) in wanted]
+
+        # 与原 GROUP_CONCAT 的顺序一致：按写入顺序
+        rows = sorted(rows, key=lambda row: row[-1])
+        members: Dict[tuple, List[tuple]] = {}
+        for row in rows:
+            members.setdefault(tuple(row[:key_size]), []).append(row[key_size:-1])
+        return members
@@ -88,6 +88,12 @@ class SteamInventoryHistoryModel(BaseModel):
                 'not_null': False,
                 'default': None,
                 'comment': 'Steam用户ID'
+            },
+            'order_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None,
+                'comment': 'order_time 的整数时间戳（由触发器维护，用于时间范围查询）'
             }
         }
     
@@ -113,15 +119,25 @@ class SteamInventoryHistoryModel(BaseModel):
             {
                 'name': 'steam_inventoryhistory_idx_data_user',
                 'columns': ['data_user']
+            },
+            # 时间范围查询
+            {
+                'name': 'steam_inventoryhistory_idx_order_time_ts',
+                'columns': ['order_time_ts']
             }
         ]
 
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'order_time': 'order_time_ts'}
+
     @classmethod
     def find_by_time_range(cls, start_time: str, end_time: str, limit: int = None, offset: int = None):
         """根据时间范围查找历史记录"""
+        condition, params = cls.time_range('order_time', start_time, end_time)
         return cls.find_all(
-            "DATE(order_time) BETWEEN ? AND ? ORDER BY order_time DESC",
-            (start_time, end_time),
+            f"{condition} ORDER BY order_time DESC",
+            tuple(params),
             limit,
             offset
         )
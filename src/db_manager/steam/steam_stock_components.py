@@ -5,11 +5,15 @@ Steam库存配件表模型
 
 from typing import Dict, Any, List
 from ..base_model import BaseModel
+from ..prices import price_sql
 
 
 class SteamStockComponentsModel(BaseModel):
     """Steam库存配件表模型"""
     
+    # 价格列（REAL），写入前用 src.db_manager.prices 转换为数字
+    PRICE_COLUMNS = ('buy_price', 'yyyp_price', 'buff_price', 'steam_price')
+    
     @classmethod
     def get_table_name(cls) -> str:
         return "steam_stockComponents"
@@ -80,19 +84,19 @@ class SteamStockComponentsModel(BaseModel):
                 'comment': '用户Steam ID'
             },
             'buy_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': '购入价格'
             },
             'yyyp_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': '悠悠价格'
             },
             'buff_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': 'BUFF价格'
@@ -104,10 +108,16 @@ class SteamStockComponentsModel(BaseModel):
                 'comment': '入库时间'
             },
             'steam_price': {
-                'type': 'TEXT',
+                'type': 'REAL',
                 'not_null': False,
                 'default': None,
                 'comment': 'Steam价格'
+            },
+            'order_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None,
+                'comment': 'order_time 的整数时间戳（由触发器维护，用于时间范围查询）'
             }
         }
     
@@ -125,9 +135,18 @@ class SteamStockComponentsModel(BaseModel):
             {
                 'name': 'steam_stockComponents_idx_order_time',
                 'columns': ['order_time']
+            },
+            # 时间范围查询
+            {
+                'name': 'steam_stockComponents_idx_user_order_time_ts',
+                'columns': ['data_user', 'order_time_ts']
             }
         ]
 
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'order_time': 'order_time_ts'}
+
     @classmethod
     def find_by_assetid(cls, assetid: str):
         """根据assetid查找配件记录"""
@@ -217,7 +236,7 @@ class SteamStockComponentsModel(BaseModel):
     @classmethod
     def get_statistics_by_user(cls, data_user: str) -> Dict[str, Any]:
         """获取用户的配件统计信息"""
-        db = cls().db
+        db = cls.get_db()
         
         # 总数
         total_count = cls.count_by_user(data_user)
@@ -243,32 +262,33 @@ class SteamStockComponentsModel(BaseModel):
     @classmethod
     def get_price_statistics(cls, data_user: str = None) -> Dict[str, Any]:
         """获取价格统计信息"""
-        db = cls().db
+        db = cls.get_db()
         
+        # 价格列中残留的文本值经 price_sql 转换，无法解析的不计入
         if data_user:
-            sql = """
+            sql = f"""
                 SELECT 
                     COUNT(*) as total,
-                    SUM(CAST([buy_price] AS REAL)) as total_buy_price,
-                    AVG(CAST([buy_price] AS REAL)) as avg_buy_price,
-                    SUM(CAST([yyyp_price] AS REAL)) as total_yyyp_price,
-                    SUM(CAST([buff_price] AS REAL)) as total_buff_price,
-                    SUM(CAST([steam_price] AS REAL)) as total_steam_price
+                    SUM({price_sql('[buy_price]')}) as total_buy_price,
+                    AVG({price_sql('[buy_price]')}) as avg_buy_price,
+                    SUM({price_sql('[yyyp_price]')}) as total_yyyp_price,
+                    SUM({price_sql('[buff_price]')}) as total_buff_price,
+                    SUM({price_sql('[steam_price]')}) as total_steam_price
                 FROM steam_stockComponents
-                WHERE [data_user] = ? AND [buy_price] IS NOT NULL
+                WHERE [data_user] = ? AND {price_sql('[buy_price]')} IS NOT NULL
             """
             result = db.execute_query(sql, (data_user,))
         else:
-            sql = """
+            sql = f"""
                 SELECT 
                     COUNT(*) as total,
-                    SUM(CAST([buy_price] AS REAL)) as total_buy_price,
-                    AVG(CAST([buy_price] AS REAL)) as avg_buy_price,
-                    SUM(CAST([yyyp_price] AS REAL)) as total_yyyp_price,
-                    SUM(CAST([buff_price] AS REAL)) as total_buff_price,
-                    SUM(CAST([steam_price] AS REAL)) as total_steam_price
+                    SUM({price_sql('[buy_price]')}) as total_buy_price,
+                    AVG({price_sql('[buy_price]')}) as avg_buy_price,
+                    SUM({price_sql('[yyyp_price]')}) as total_yyyp_price,
+                    SUM({price_sql('[buff_price]')}) as total_buff_price,
+                    SUM({price_sql('[steam_price]')}) as total_steam_price
                 FROM steam_stockComponents
-                WHERE [buy_price] IS NOT NULL
+                WHERE {price_sql('[buy_price]')} IS NOT NULL
             """
             result = db.execute_query(sql, ())
         
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+时间列规范化
+
+各表的时间列是平台原样写入的文本（'2024-05-01'、'2024-05-01 12:00:00'、'2024/05/01 12:00' 等），
+个别来源是秒或毫秒时间戳。按日期筛选时只能写 DATE(order_time) BETWEEN ? AND ?，
+或者拿不同格式的字符串直接比较，都用不上索引。
+
+这里把时间统一换算为整数时间戳列（<列名>_ts），由触发器在写入时维护并建索引，
+范围查询改为在时间戳列上比较，可以直接在索引上定位。
+
+时间戳的含义是“按 UTC 解读的本地时间”：文本时间不做时区换算（与 DATE() 的日期一致），
+数字时间戳先换算为本地时间。SQL 表达式与 Python 换算规则保持一致。
+"""
+
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+# 大于该值的数字按毫秒时间戳处理
+_MILLISECONDS_THRESHOLD = 100000000000
+# 与 epoch_sql 一致：至少 9 位的纯数字文本按时间戳处理
+_NUMBER_PATTERN = re.compile(r'[0-9]{9,}(\.[0-9]*)?')
+# 不带时间的日期文本（'2024-05-01'、'2024/05/01'）
+_DATE_PATTERN = re.compile(r'[0-9]{4}[-/][0-9]{1,2}[-/][0-9]{1,2}')
+
+
+def epoch_sql(expr: str) -> str:
+    """把时间列表达式换算为整数时间戳的 SQL，无法解析时为 NULL"""
+    # 数字或至少 9 位的纯数字文本按时间戳处理，其余按日期时间文本解析
+    is_number = (f"(typeof({expr}) IN ('integer', 'real') OR "
+                 f"({expr} GLOB '{'[0-9]' * 9}*' AND {expr} NOT GLOB '*[^0-9.]*'))")
+    number = f"CAST({expr} AS REAL)"
+    return (
+        f"(CASE WHEN {is_number} THEN "
+        f"CAST(strftime('%s', CASE WHEN {number} > {_MILLISECONDS_THRESHOLD} THEN {number} / 1000 ELSE {number} END, "
+        f"'unixepoch', 'localtime') AS INTEGER) "
+        f"ELSE CAST(strftime('%s', REPLACE(TRIM({expr}), '/', '-')) AS INTEGER) END)"
+    )
+
+
+def is_date_only(value: Any) -> bool:
+    """是否为不带时间的日期（'2024-05-01' 或 date 对象）；10 位数字的时间戳文本不算"""
+    if isinstance(value, datetime):
+        return False
+    if isinstance(value, date):
+        return True
+    return isinstance(value, str) and _DATE_PATTERN.fullmatch(value.strip()) is not None
+
+
+def to_epoch(value: Any) -> Optional[int]:
+    """
+    把日期 / 时间换算为整数时间戳，规则与 epoch_sql 一致
+
+    :param value: 文本时间、date / datetime、秒或毫秒时间戳
+    :return: 时间戳，无法解析时为 None（用作查询参数时不匹配任何行，与 DATE() 返回 NULL 一致）
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > _MILLISECONDS_THRESHOLD else value
+        value = datetime.fromtimestamp(seconds)
+    elif isinstance(value, str) and _NUMBER_PATTERN.fullmatch(value.strip()):
+        return to_epoch(float(value))
+    elif isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace('/', '-'))
+        except ValueError:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        # 带时区的时间与 SQLite 一致换算为 UTC
+        return int(value.timestamp())
+    return calendar.timegm(value.timetuple())
+
+
+def day_end_epoch(value: Any) -> Optional[int]:
+    """日期当天结束（次日零点）的时间戳，用于“截止到某天（含）”的开区间上界"""
+    start = to_epoch(value)
+    if start is None:
+        return None
+    return start + int(timedelta(days=1).total_seconds())
+
+
+def range_condition(expr: str, start: Any = None, end: Any = None) -> Tuple[str, List[Any]]:
+    """
+    时间戳表达式的范围条件
+
+    :param expr: 整数时间戳列或表达式
+    :param start: 开始日期 / 时间（含），None 表示不限
+    :param end: 结束日期 / 时间（含）；只有日期时包含当天全天，None 表示不限
+    :return: (条件, 参数)；日期无法解析时参数为 NULL，不匹配任何行
+    """
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append(f"{expr} >= ?")
+        params.append(to_epoch(start))
+    if end is not None:
+        if is_date_only(end):
+            conditions.append(f"{expr} < ?")
+            params.append(day_end_epoch(end))
+        else:
+            conditions.append(f"{expr} <= ?")
+            params.append(to_epoch(end))
+    if not conditions:
+        return "1=1", []
+    return f"({' AND '.join(conditions)})", params
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+数据版本号
+
+按 (表名, 用户) 维护进程内单调递增的版本号，写入方在事务提交后调用 bump()。
+读取方把版本号作为缓存键：版本号没有变化，说明这段时间内没有写入方修改过该用户的数据，
+可以直接复用上一次的计算结果，不必再访问数据库。
+
+版本号只在进程内有效，进程重启后从 0 开始，缓存也随之清空。
+"""
+
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class DataVersions:
+    """(表名, 用户) -> 版本号，线程安全"""
+
+    def __init__(self):
+        self._versions: Dict[Tuple[str, Optional[str]], int] = {}
+        # 所有键共用一个序列，保证 bump 之后的版本号一定大于之前任何一次 get 的结果
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, table: str, data_user: Optional[str] = None) -> int:
+        """当前版本号；整表的版本号（bump 时未指定用户）同样计入"""
+        return max(self._versions.get((table, data_user), 0), self._versions.get((table, None), 0))
+
+    def bump(self, table: str, data_user: Optional[str] = None) -> int:
+        """
+        标记数据已变化
+
+        :param table: 表名
+        :param data_user: 用户，为 None 时表示该表所有用户的数据都可能变化
+        :return: 新的版本号
+        """
+        with self._lock:
+            version = next(self._sequence)
+            self._versions[(table, data_user)] = version
+        return version
+
+
+class VersionedCache:
+    """按用户缓存计算结果，该用户在 table 上的版本号变化后自动失效（超过容量时淘汰最久未使用的用户）"""
+
+    def __init__(self, table: str, max_entries: int = 256):
+        self.table = table
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[int, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, data_user: str, compute: Callable[[], Any]) -> Any:
+        """版本号未变化时返回缓存结果，否则调用 compute() 重新计算并缓存"""
+        # 先取版本号再计算：计算期间有写入时缓存的是旧版本号，下一次读取会重新计算
+        version = data_versions.get(self.table, data_user)
+        with self._lock:
+            entry = self._entries.get(data_user)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(data_user)
+                return entry[1]
+
+        value = compute()
+        with self._lock:
+            self._entries[data_user] = (version, value)
+            self._entries.move_to_end(data_user)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局数据版本号
+data_versions = DataVersions()
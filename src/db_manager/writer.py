@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+单写线程
+
+所有写操作交给一个专用线程，在它独占的写连接上执行：
+- submit/execute/executemany 把写任务放入队列，立即返回 Future；写线程把队列中积压的任务
+  合并为一批，在一个事务内依次执行（每个任务一个 SAVEPOINT，失败只回滚该任务），整批一次提交
+- lease() 把写连接整段借给调用线程（DatabaseManager.transaction() 使用），借出期间写线程暂停，
+  队列中的任务等归还后继续执行
+
+读操作仍使用连接池中的连接，WAL 模式下读写互不阻塞；进程内的写操作不再在 SQLite 写锁上
+按 busy timeout 轮询重试，写连接的 busy timeout 只用于等待其他进程的写事务。
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class _Job:
+    """写任务：fn(conn) 的返回值或异常写入 future"""
+
+    __slots__ = ('fn', 'future')
+
+    def __init__(self, fn: Optional[Callable[[sqlite3.Connection], Any]]):
+        self.fn = fn
+        self.future = Future()
+
+
+class _Lease(_Job):
+    """借出写连接：写线程把连接交给调用方，等待 released 后继续"""
+
+    __slots__ = ('released',)
+
+    def __init__(self):
+        super().__init__(None)
+        self.released = threading.Event()
+
+
+_STOP = object()
+
+
+class DatabaseWriter:
+    """单写线程 - 独占一个写连接，分批执行写任务并一次提交（group commit）"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_batch: int = 256,
+                 max_delay: float = 0.0):
+        """
+        :param connect: 创建写连接的函数
+        :param max_batch: 每批最多合并的任务数
+        :param max_delay: 取到第一个任务后最多再等待的秒数；为 0 时只合并已在队列中积压的任务
+            （WAL + synchronous=NORMAL 下提交很便宜，等待反而拉低吞吐）
+        """
+        self._connect = connect
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, max_delay)
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 当前持有写连接的线程（写线程本身或借出的线程），该线程提交的任务直接执行
+        self._owner: Optional[int] = None
+        self._closed = False
+        self._jobs = 0
+        self._batches = 0
+        self._leases = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("写线程已关闭")
+                if self._thread is None:
+                    self._conn = self._connect()
+                    self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                    self._thread.start()
+
+    # ==================== 提交任务 ====================
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """提交写任务，fn(conn) 在写线程的事务中执行，返回值或异常通过 Future 返回"""
+        if self._owner == threading.get_ident():
+            # 持有写连接的线程再提交任务会等待自己，直接在当前事务中执行
+            return self._run_inline(fn)
+        self._ensure_started()
+        job = _Job(fn)
+        self._queue.put(job)
+        return job.future
+
+    def execute(self, sql: str, params: tuple = ()) -> Future:
+        """提交一条写语句，Future 结果为游标（rowcount / lastrowid）"""
+        return self.submit(lambda conn: conn.execute(sql, params))
+
+    def executemany(self, sql: str, params_list: List[tuple]) -> Future:
+        """提交一条批量写语句，Future 结果为游标"""
+        return self.submit(lambda conn: conn.executemany(sql, params_list))
+
+    @contextmanager
+    def lease(self):
+        """借出写连接，块内由调用线程自行管理事务；写线程在归还前不执行其他任务"""
+        if self._owner == threading.get_ident():
+            yield self._conn
+            return
+        self._ensure_started()
+        lease = _Lease()
+        self._queue.put(lease)
+        conn = lease.future.result()
+        self._owner = threading.get_ident()
+        try:
+            yield conn
+        finally:
+            self._owner = None
+            lease.released.set()
+
+    def _run_inline(self, fn) -> Future:
+        future = Future()
+        try:
+            future.set_result(self._savepoint(self._conn, fn))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    # ==================== 写线程 ====================
+
+    def _run(self):
+        self._owner = threading.get_ident()
+        pending = None
+        while True:
+            job = pending if pending is not None else self._queue.get()
+            pending = None
+            if job is _STOP:
+                break
+            if isinstance(job, _Lease):
+                self._lend(job)
+                continue
+
+            # 合并队列中已积压以及 max_delay 内到达的任务，遇到借出请求或停止信号时截断
+            batch = [job]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    job = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is _STOP or isinstance(job, _Lease):
+                    pending = job
+                    break
+                batch.append(job)
+            self._run_batch(batch)
+
+        self._owner = None
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _lend(self, lease: _Lease):
+        self._leases += 1
+        self._owner = None
+        lease.future.set_result(self._conn)
+        lease.released.wait()
+        if self._conn.in_transaction:
+            # 借用方遗留的未提交事务
+            self._conn.rollback()
+        self._owner = threading.get_ident()
+
+    @staticmethod
+    def _savepoint(conn: sqlite3.Connection, fn):
+        """在保存点中执行任务，失败只回滚该任务"""
+        conn.execute('SAVEPOINT writer_job')
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute('ROLLBACK TO writer_job')
+            conn.execute('RELEASE writer_job')
+            raise
+        conn.execute('RELEASE writer_job')
+        return result
+
+    def _run_batch(self, batch: List[_Job]):
+        results = []
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                try:
+                    results.append((job, self._savepoint(self._conn, job.fn), None))
+                except Exception as e:
+                    results.append((job, None, e))
+            self._conn.commit()
+        except Exception as e:
+            # 开始或提交事务失败，整批任务都没有写入
+            try:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+            except sqlite3.Error:
+                pass
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        self._jobs += len(batch)
+        self._batches += 1
+        for job, result, error in results:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(error)
+
+    # ==================== 状态 / 关闭 ====================
+
+    def stats(self) -> Dict[str, Any]:
+        """写线程统计"""
+        return {
+            'jobs': self._jobs,
+            'batches': self._batches,
+            'avg_batch_size': round(self._jobs / self._batches, 2) if self._batches else 0,
+            'leases': self._leases,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self, timeout: float = 30.0):
+        """执行完已提交的任务后停止写线程并关闭写连接"""
+        with self._start_lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
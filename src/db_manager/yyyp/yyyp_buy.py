@@ -151,7 +151,7 @@ class YyypBuyModel(BaseModel):
     @classmethod
     def get_latest_order_time(cls, data_user: str):
         """获取最新订单时间"""
-        db = cls().db
+        db = cls.get_db()
         sql = "SELECT order_time FROM yyyp_buy WHERE data_user = ? ORDER BY order_time DESC LIMIT 1"
         
         try:
@@ -106,6 +106,16 @@ class YyypLentModel(BaseModel):
                 'type': 'TEXT',
                 'not_null': False,
                 'default': None
+            },
+            'lean_start_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None
+            },
+            'lean_end_time_ts': {
+                'type': 'INTEGER',
+                'not_null': False,
+                'default': None
             }
         }
     
@@ -115,5 +125,18 @@ class YyypLentModel(BaseModel):
             {
                 'name': 'yyyp_lent_idx',
                 'columns': ['weapon_name', 'weapon_float', 'float_range', 'price', 'lenter_name', 'lean_start_time', 'status', 'from']
+            },
+            # 时间范围查询
+            {
+                'name': 'yyyp_lent_idx_lean_start_time_ts',
+                'columns': ['lean_start_time_ts']
+            },
+            {
+                'name': 'yyyp_lent_idx_lean_end_time_ts',
+                'columns': ['lean_end_time_ts']
             }
         ]
+    
+    @classmethod
+    def get_time_columns(cls) -> Dict[str, str]:
+        return {'lean_start_time': 'lean_start_time_ts', 'lean_end_time': 'lean_end_time_ts'}
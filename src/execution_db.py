@@ -14,6 +14,10 @@ class Date_base:
     def get_database_name(self):
         return self.database_name
 
+    def transaction(self):
+        """开启工作单元，块内的 insert/update/delete 共用一个事务"""
+        return self.db.transaction()
+
     def insert(self, sql):
         try:
             sql = sql.replace("'None'", "NULL")
@@ -44,9 +48,9 @@ class Date_base:
                 self.print_log.write_log(f'{sql}', 'error')
             return False
 
-    def select(self, sql):
+    def select(self, sql, params=()):
         try:
-            result = self.db.execute_query(sql)
+            result = self.db.execute_query(sql, params)
             return True, result
         except Exception as e:
             err2(e)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+模块导入耗时统计
+
+与 python -X importtime 类似，但不依赖解释器参数，打包后的 exe 中也能使用：
+在 sys.meta_path 最前面插入一个查找器，把找到的模块加载器包装一层，记录每个模块执行的
+累计耗时（含其导入的子模块）与自身耗时。
+
+用法:
+    from src.import_timer import import_timer
+    import_timer.install()
+    ...  # 导入要统计的模块
+    import_timer.report()
+"""
+
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+from typing import List, Optional, Tuple
+
+
+class _TimedLoader:
+    """包装模块加载器，exec_module 时计时，其余属性透传给原加载器"""
+
+    def __init__(self, loader, timer: 'ImportTimer'):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer._exec(self._loader, module)
+
+
+class ImportTimer(MetaPathFinder):
+    """记录导入耗时的查找器，只统计安装之后首次导入的模块"""
+
+    def __init__(self):
+        # (模块名, 自身耗时, 累计耗时, 嵌套深度)，按导入完成的顺序
+        self.records: List[Tuple[str, float, float, int]] = []
+        self._local = threading.local()
+        self._installed_at: Optional[float] = None
+
+    @property
+    def installed(self) -> bool:
+        return self in sys.meta_path
+
+    def install(self):
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self._installed_at = time.perf_counter()
+
+    def uninstall(self):
+        if self.installed:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        # 交给其余查找器查找，找到后包装加载器
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _exec(self, loader, module):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # 栈中每层记录其子模块的累计耗时，用于计算自身耗时
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.records.append((module.__name__, elapsed - children, elapsed, len(stack)))
+
+    def report(self, limit: int = 30):
+        """打印累计耗时最长的模块"""
+        if not self.records:
+            print("📦 导入耗时统计: 没有记录")
+            return
+        total = sum(cumulative for _, _, cumulative, depth in self.records if depth == 0)
+        since_install = time.perf_counter() - self._installed_at if self._installed_at else total
+        print(f"📦 导入耗时统计: {len(self.records)} 个模块, 导入合计 {total * 1000:.1f} ms, "
+              f"统计开始至今 {since_install * 1000:.1f} ms")
+        print(f"{'自身 (ms)':>10} | {'累计 (ms)':>10} | 模块")
+        for name, own, cumulative, depth in sorted(self.records, key=lambda r: r[2], reverse=True)[:limit]:
+            print(f"{own * 1000:>10.1f} | {cumulative * 1000:>10.1f} | {'  ' * depth}{name}")
+
+
+# 全局导入耗时统计
+import_timer = ImportTimer()
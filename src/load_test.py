@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+服务压测：爬虫并发入库 + 看板并发读取
+
+用法:
+    python -m src.load_test [服务地址] [写线程数] [读线程数] [持续秒数] [每份库存物品数]
+    python -m src.load_test http://127.0.0.1:9001 4 16 20 300
+
+写线程模拟爬虫：轮流提交整份库存快照（/api/v1/steam/inventory/batch）和悠悠有品批量价格
+（/webInventoryV1/inventory/batch_update_yyyp_price）；读线程模拟看板：轮流请求分组库存、
+库存统计和账号列表。每个写线程使用独立的压测账号 loadtest_<n>，结束后删除这些账号的库存。
+会真实写入数据库，请对测试库运行。
+
+输出每类请求的吞吐量、失败数与 p50/p95/p99/最大延迟。
+"""
+
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import requests
+
+LOAD_TEST_USER_PREFIX = 'loadtest_'
+
+
+def _snapshot(steam_id: str, item_count: int) -> List[dict]:
+    """构造一份库存快照，assetid 按账号固定，便于反复同步同一批物品"""
+    items = []
+    for i in range(item_count):
+        weapon = f"LT-{i % 25}"
+        items.append({
+            'assetid': f"{steam_id}_{i}",
+            'instanceid': str(i),
+            'classid': str(i % 25),
+            'name': f"{weapon} | Load Test",
+            'weapon_float': round(random.random(), 6),
+            'tags': {
+                'parsed_name': {
+                    'item_name': f"{weapon} | Load Test (Field-Tested)",
+                    'weapon_name': weapon,
+                    'weapon_type': 'Load Test',
+                },
+                'Exterior': {'localized_tag_name': 'Field-Tested'},
+            },
+        })
+    return items
+
+
+def _yyyp_prices(steam_id: str, item_count: int) -> List[dict]:
+    return [{'SteamAssetId': f"{steam_id}_{i}", 'ShowMarkPrice': f"{random.uniform(1, 500):.2f}"}
+            for i in range(item_count)]
+
+
+class _Stats:
+    """按请求类别收集延迟"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+
+    def record(self, name: str, elapsed: float, ok: bool):
+        with self._lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.failures[name] = self.failures.get(name, 0) + 1
+
+    def report(self, duration: float):
+        print(f"{'请求':<24} | {'次数':>6} | {'失败':>4} | {'req/s':>7} | "
+              f"{'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+        total = 0
+        for name in sorted(self.latencies):
+            values = sorted(self.latencies[name])
+            total += len(values)
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+            print(f"{name:<24} | {len(values):>6} | {self.failures.get(name, 0):>4} | "
+                  f"{len(values) / duration:>7.1f} | {pick(0.50):>8.1f} | {pick(0.95):>8.1f} | "
+                  f"{pick(0.99):>8.1f} | {values[-1] * 1000:>8.1f}")
+        print(f"合计 {total} 次请求, {total / duration:.1f} req/s")
+
+
+def _timed(session: requests.Session, stats: _Stats, name: str, method: str, url: str, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=60, **kwargs)
+        ok = response.status_code < 400 and response.json().get('success', True)
+    except (requests.RequestException, ValueError):
+        ok = False
+    stats.record(name, time.perf_counter() - start, ok)
+
+
+def _writer(base_url: str, steam_id: str, item_count: int, stop: threading.Event, stats: _Stats):
+    session = requests.Session()
+    while not stop.is_set():
+        _timed(session, stats, 'write inventory/batch', 'POST', f"{base_url}/api/v1/steam/inventory/batch",
+               json={'steamId': steam_id, 'items': _snapshot(steam_id, item_count)})
+        if stop.is_set():
+            break
+        _timed(session, stats, 'write yyyp_price', 'POST',
+               f"{base_url}/webInventoryV1/inventory/batch_update_yyyp_price",
+               json={'weapon_list': _yyyp_prices(steam_id, item_count)})
+
+
+def _reader(base_url: str, steam_ids: List[str], stop: threading.Event, stats: _Stats):
+    session = requests.Session()
+    while not stop.is_set():
+        steam_id = random.choice(steam_ids)
+        name, path = random.choice([
+            ('read grouped', f"/webInventoryV1/inventory/grouped/{steam_id}?limit=50"),
+            ('read stats', f"/webInventoryV1/inventory/stats/{steam_id}"),
+            ('read steam_ids', "/webInventoryV1/steam_ids"),
+        ])
+        _timed(session, stats, name, 'GET', f"{base_url}{path}")
+
+
+def run(base_url: str = 'http://127.0.0.1:9001', writers: int = 4, readers: int = 16,
+        duration: float = 20.0, item_count: int = 300) -> _Stats:
+    """
+    对运行中的服务压测
+
+    :param base_url: 服务地址
+    :param writers: 爬虫写线程数
+    :param readers: 看板读线程数
+    :param duration: 持续秒数
+    :param item_count: 每份库存快照的物品数
+    """
+    base_url = base_url.rstrip('/')
+    steam_ids = [f"{LOAD_TEST_USER_PREFIX}{i}" for i in range(max(1, writers))]
+    print(f"压测 {base_url}: 写线程 {writers}, 读线程 {readers}, 持续 {duration}s, 每份库存 {item_count} 件")
+
+    # 先写入一份库存，读线程从一开始就有数据可读
+    session = requests.Session()
+    for steam_id in steam_ids:
+        session.post(f"{base_url}/api/v1/steam/inventory/batch", timeout=60,
+                     json={'steamId': steam_id, 'items': _snapshot(steam_id, item_count)})
+
+    stats = _Stats()
+    stop = threading.Event()
+    threads: List[threading.Thread] = []
+    for steam_id in steam_ids[:writers]:
+        threads.append(threading.Thread(target=_writer, args=(base_url, steam_id, item_count, stop, stats)))
+    for _ in range(readers):
+        threads.append(threading.Thread(target=_reader, args=(base_url, steam_ids, stop, stats)))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats.report(elapsed)
+
+    for steam_id in steam_ids:
+        session.delete(f"{base_url}/api/v1/steam/inventory/user/{steam_id}", timeout=60)
+    return stats
+
+
+def _parse_args(argv: List[str]) -> Tuple:
+    defaults = ['http://127.0.0.1:9001', 4, 16, 20.0, 300]
+    types = [str, int, int, float, int]
+    return tuple(types[i](argv[i]) if i < len(argv) else defaults[i] for i in range(len(defaults)))
+
+
+if __name__ == '__main__':
+    run(*_parse_args(sys.argv[1:]))
@@ -72,6 +72,23 @@ class read_conf:
         number = self.config.get('processes', 'number')
         return number
 
+    def server(self):
+        """Web 服务配置，[server] 段缺省时使用开发模式"""
+        return {
+            # development：Werkzeug 开发服务器（调试器 + 自动重载）；production：waitress 线程池
+            'mode': self.config.get('server', 'mode', fallback='development').strip().lower(),
+            'host': self.config.get('server', 'host', fallback='0.0.0.0'),
+            'port': self.config.getint('server', 'port', fallback=9001),
+            # 工作线程数，同时处理的请求数
+            'threads': self.config.getint('server', 'threads', fallback=8),
+            # 同时保持的连接数上限（含 keep-alive 空闲连接），超出后新连接在 backlog 中排队
+            'connection_limit': self.config.getint('server', 'connection_limit', fallback=100),
+            # 监听队列长度
+            'backlog': self.config.getint('server', 'backlog', fallback=1024),
+            # keep-alive 连接空闲超过该秒数后关闭
+            'channel_timeout': self.config.getint('server', 'channel_timeout', fallback=120),
+        }
+
     def get_database_name(self):
         sqlite_file = self.config.get('database', 'sqlite_file', fallback='csweaponmanager.db')
         return os.path.basename(sqlite_file)
@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.execution_db import Date_base
+from src.db_manager.database import DatabaseManager, TransactionRollback
 from src.db_manager.buff.buff_buy import BuffBuyModel
 from src.db_manager.index.buy import BuyModel
 
@@ -10,7 +11,8 @@ def selectNotEnd(user_id):
     try:
         records = BuffBuyModel.find_all(
             "status NOT IN ('已完成', '已取消') AND data_user = ?", 
-            (user_id,)
+            (user_id,),
+            columns=('ID',)
         )
         not_end_orders = [record.ID for record in records]
         return jsonify({"not_end_orders": not_end_orders}), 200
@@ -25,7 +27,8 @@ def ApexTimeUrl(user_id):
         records = BuffBuyModel.find_all(
             "data_user = ? ORDER BY order_time DESC", 
             (user_id,), 
-            limit=1
+            limit=1,
+            columns=('order_time',)
         )
         last_order_time = records[0].order_time if records else None
         return jsonify({"last_order_time": last_order_time}), 200
@@ -40,7 +43,8 @@ def getLatestData(user_id):
         records = BuffBuyModel.find_all(
             "data_user = ? ORDER BY order_time DESC", 
             (user_id,), 
-            limit=1
+            limit=1,
+            columns=('ID', 'order_time')
         )
         
         if records and len(records) > 0:
@@ -65,19 +69,20 @@ def updateOrderStatus():
         status = data['state']
         status_sub = data.get('state_sub')
         
-        # 更新buff_buy表
-        buff_record = BuffBuyModel.find_by_id(ID=item_id)
-        if buff_record:
-            buff_record.status = status
-            buff_record.status_sub = status_sub
-            buff_record.save()
-        
-        # 更新通用buy表
-        buy_record = BuyModel.find_by_id(ID=item_id)
-        if buy_record:
-            buy_record.status = status
-            buy_record.status_sub = status_sub
-            buy_record.save()
+        with DatabaseManager().transaction():
+            # 更新buff_buy表
+            buff_record = BuffBuyModel.find_by_id(ID=item_id)
+            if buff_record:
+                buff_record.status = status
+                buff_record.status_sub = status_sub
+                buff_record.save()
+            
+            # 更新通用buy表
+            buy_record = BuyModel.find_by_id(ID=item_id)
+            if buy_record:
+                buy_record.status = status
+                buy_record.status_sub = status_sub
+                buy_record.save()
         
         return jsonify({'success': True, 'message': '更新成功'}), 200
     except Exception as e:
@@ -106,45 +111,51 @@ def insert_db():
         weapon_float = data['weapon_float']
         data_user = data['data_user']
 
-        # 插入到buff_buy表
-        print(f"插入BUFF购买记录到buff_buy表，ID: {item_id}")
-        buff_buy_record = BuffBuyModel()
-        buff_buy_record.ID = item_id
-        buff_buy_record.weapon_name = weaponitem_name
-        buff_buy_record.weapon_type = weapon_type
-        buff_buy_record.item_name = item_name
-        buff_buy_record.weapon_float = weapon_float
-        buff_buy_record.float_range = float_range
-        buff_buy_record.price = price
-        buff_buy_record.seller_name = seller_id
-        buff_buy_record.status = state
-        buff_buy_record.order_time = created_at
-        buff_buy_record.payment = pay_method_text
-        buff_buy_record.data_user = data_user
-        buff_buy_record.status_sub = state_sub
-        setattr(buff_buy_record, 'from', 'buff')
-        buff_saved = buff_buy_record.save()
-        print(f"buff_buy表保存结果: {buff_saved}")
+        # 两张表在同一个事务中写入，任一失败则整体回滚
+        buff_saved = buy_saved = False
+        with DatabaseManager().transaction():
+            # 插入到buff_buy表
+            print(f"插入BUFF购买记录到buff_buy表，ID: {item_id}")
+            buff_buy_record = BuffBuyModel()
+            buff_buy_record.ID = item_id
+            buff_buy_record.weapon_name = weaponitem_name
+            buff_buy_record.weapon_type = weapon_type
+            buff_buy_record.item_name = item_name
+            buff_buy_record.weapon_float = weapon_float
+            buff_buy_record.float_range = float_range
+            buff_buy_record.price = price
+            buff_buy_record.seller_name = seller_id
+            buff_buy_record.status = state
+            buff_buy_record.order_time = created_at
+            buff_buy_record.payment = pay_method_text
+            buff_buy_record.data_user = data_user
+            buff_buy_record.status_sub = state_sub
+            setattr(buff_buy_record, 'from', 'buff')
+            buff_saved = buff_buy_record.save(mode='upsert')
+            print(f"buff_buy表保存结果: {buff_saved}")
+
+            # 插入到通用buy表
+            print(f"插入购买记录到buy表，ID: {item_id}")
+            buy_record = BuyModel()
+            buy_record.ID = item_id
+            buy_record.weapon_name = weaponitem_name
+            buy_record.weapon_type = weapon_type
+            buy_record.item_name = item_name
+            buy_record.weapon_float = weapon_float
+            buy_record.float_range = float_range
+            buy_record.price = price
+            buy_record.seller_name = seller_id
+            buy_record.status = state
+            buy_record.order_time = created_at
+            buy_record.payment = pay_method_text
+            buy_record.data_user = data_user
+            buy_record.status_sub = state_sub
+            setattr(buy_record, 'from', 'buff')
+            buy_saved = buy_record.save(mode='upsert')
+            print(f"buy表保存结果: {buy_saved}")
 
-        # 插入到通用buy表
-        print(f"插入购买记录到buy表，ID: {item_id}")
-        buy_record = BuyModel()
-        buy_record.ID = item_id
-        buy_record.weapon_name = weaponitem_name
-        buy_record.weapon_type = weapon_type
-        buy_record.item_name = item_name
-        buy_record.weapon_float = weapon_float
-        buy_record.float_range = float_range
-        buy_record.price = price
-        buy_record.seller_name = seller_id
-        buy_record.status = state
-        buy_record.order_time = created_at
-        buy_record.payment = pay_method_text
-        buy_record.data_user = data_user
-        buy_record.status_sub = state_sub
-        setattr(buy_record, 'from', 'buff')
-        buy_saved = buy_record.save()
-        print(f"buy表保存结果: {buy_saved}")
+            if not (buff_saved and buy_saved):
+                raise TransactionRollback()
 
         if buff_saved and buy_saved:
             return jsonify({
@@ -169,8 +180,7 @@ def insert_db():
 @buff163BuyV1.route('/countData/<user_id>', methods=['get'])
 def countData(user_id):
     try:
-        records = BuffBuyModel.find_all("data_user = ?", (user_id,))
-        count = len(records)
+        count = BuffBuyModel.count("data_user = ?", (user_id,))
         print(count)
         return jsonify({"count": count}), 200
     except Exception as e:
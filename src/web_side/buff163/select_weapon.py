@@ -154,14 +154,16 @@ def batchInsertOrUpdate():
                 'error': '无效的JSON数据，需要数组格式'
             }), 400
 
-        # 使用BUFF专用的更新方法
-        success_count = WeaponClassIDModel.batch_update_buff_id(data)
+        # 一个事务内按 steam_hash_name 集合合并
+        result = WeaponClassIDModel.merge_catalog(data, 'buff')
+        success_count = result['inserted'] + result['updated'] + result['unchanged']
 
         return jsonify({
             'success': True,
             'message': f'成功更新 {success_count}/{len(data)} 条BUFF数据的buff_id',
             'success_count': success_count,
-            'total_count': len(data)
+            'total_count': len(data),
+            'merge': result
         }), 200
     except Exception as e:
         print(f"批量更新BUFF buff_id失败: {e}")
@@ -254,8 +256,7 @@ def getWeaponCount():
     """获取BUFF武器总数"""
     try:
         # 统计有buff_id的记录数
-        all_records = WeaponClassIDModel.find_all()
-        count = sum(1 for record in all_records if record.buff_id)
+        count = WeaponClassIDModel.count("buff_id IS NOT NULL AND buff_id <> 0 AND buff_id <> ''")
         return jsonify({
             'success': True,
             'count': count
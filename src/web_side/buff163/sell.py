@@ -10,7 +10,8 @@ def selectNotEnd(user_id):
     try:
         records = BuffSellModel.find_all(
             "status NOT IN ('已完成', '已取消') AND data_user = ?", 
-            (user_id,)
+            (user_id,),
+            columns=('ID',)
         )
         not_end_orders = [record.ID for record in records]
         return jsonify({"not_end_orders": not_end_orders}), 200
@@ -25,7 +26,8 @@ def ApexTimeUrl(user_id):
         records = BuffSellModel.find_all(
             "data_user = ? ORDER BY order_time DESC", 
             (user_id,), 
-            limit=1
+            limit=1,
+            columns=('order_time',)
         )
         last_order_time = records[0].order_time if records else None
         return jsonify({"last_order_time": last_order_time}), 200
@@ -40,7 +42,8 @@ def getLatestData(user_id):
         records = BuffSellModel.find_all(
             "data_user = ? ORDER BY order_time DESC", 
             (user_id,), 
-            limit=1
+            limit=1,
+            columns=('ID', 'order_time')
         )
         
         if records and len(records) > 0:
@@ -122,7 +125,7 @@ def insert_db():
         buff_sell_record.data_user = data_user
         buff_sell_record.status_sub = state_sub
         setattr(buff_sell_record, 'from', 'buff')
-        buff_saved = buff_sell_record.save()
+        buff_saved = buff_sell_record.save(mode='upsert')
         print(f"buff_sell表保存结果: {buff_saved}")
 
         # 插入到通用sell表
@@ -142,7 +145,7 @@ def insert_db():
         sell_record.data_user = data_user
         sell_record.status_sub = state_sub
         setattr(sell_record, 'from', 'buff')
-        sell_saved = sell_record.save()
+        sell_saved = sell_record.save(mode='upsert')
         print(f"sell表保存结果: {sell_saved}")
 
         if buff_saved and sell_saved:
@@ -169,8 +172,7 @@ def insert_db():
 @buff163SellV1.route('/countData/<user_id>', methods=['get'])
 def countData(user_id):
     try:
-        records = BuffSellModel.find_all("data_user = ?", (user_id,))
-        count = len(records)
+        count = BuffSellModel.count("data_user = ?", (user_id,))
         print(count)
         return jsonify({"count": count}), 200
     except Exception as e:
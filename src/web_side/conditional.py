@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+条件请求（ETag / 304）
+
+前端每隔几秒轮询库存、组件等接口，而这些数据只在同步或改价时才变化。
+这里用 (表名, 用户) 的数据版本号（见 src.db_manager.versions）生成 ETag：
+请求头 If-None-Match 与当前版本一致时直接返回 304，不访问数据库。
+
+ETag 中带有进程启动标识，进程重启后版本号从 0 开始也不会与之前发出的 ETag 混淆。
+"""
+
+import uuid
+from functools import wraps
+
+from flask import g, make_response, request
+
+from src.db_manager.versions import data_versions
+
+
+# 进程启动标识
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def version_etag(table: str, data_user: str) -> str:
+    """该用户在 table 上当前数据版本对应的 ETag（不含引号）"""
+    return f"{table}-{_BOOT_ID}-{data_versions.get(table, data_user)}"
+
+
+def skip_etag():
+    """本次响应不可缓存（例如包含未写入数据库的计算结果），不附带 ETag"""
+    g.skip_etag = True
+
+
+def versioned(table: str, user_arg: str = 'steam_id'):
+    """
+    按数据版本号支持条件请求的视图装饰器
+
+    :param table: 视图读取的表
+    :param user_arg: 视图参数中用户 ID 的名称
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # 先取版本号再执行视图：执行期间有写入时响应带的是旧版本号，下一次请求会重新查询
+            etag = version_etag(table, kwargs[user_arg])
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not g.pop('skip_etag', False):
+                response.set_etag(etag)
+                # 允许浏览器缓存，但每次使用前都要带 If-None-Match 重新验证
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
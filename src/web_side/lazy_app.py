@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+按需加载蓝图
+
+启动时导入全部蓝图模块会连带导入 requests、日志、各模型模块，占去大部分启动时间。
+这里按 URL 前缀分发请求：某个前缀第一次被访问时才导入对应的蓝图模块，
+为它创建一个只注册该蓝图的 Flask 应用（Flask 不允许在处理过请求之后再注册蓝图）；
+服务启动后再由后台线程依次预热其余蓝图，第一次访问时不必等待导入。
+"""
+
+import importlib
+import threading
+import time
+from typing import Callable, Dict, Sequence, Tuple
+
+from flask import Flask
+
+
+class LazyBlueprintDispatcher:
+    """按 URL 前缀把请求分发给按需创建的 Flask 应用（WSGI 应用）"""
+
+    def __init__(self, blueprints: Sequence[Tuple[str, str, str]], create_app: Callable[[], Flask]):
+        """
+        :param blueprints: (模块路径, 蓝图变量名, URL 前缀) 列表
+        :param create_app: 创建空 Flask 应用的函数（CORS 等应用级设置在其中完成）
+        """
+        self.blueprints = {prefix: (module, name) for module, name, prefix in blueprints}
+        # 长前缀优先匹配
+        self.prefixes = sorted(self.blueprints, key=len, reverse=True)
+        self.create_app = create_app
+        self._apps: Dict[str, Flask] = {}
+        self._lock = threading.Lock()
+        # 不属于任何前缀的请求由空应用返回 404
+        self._fallback = create_app()
+
+    def _get_app(self, prefix: str) -> Flask:
+        app = self._apps.get(prefix)
+        if app is None:
+            with self._lock:
+                app = self._apps.get(prefix)
+                if app is None:
+                    start = time.perf_counter()
+                    module, name = self.blueprints[prefix]
+                    app = self.create_app()
+                    app.register_blueprint(getattr(importlib.import_module(module), name), url_prefix=prefix)
+                    self._apps[prefix] = app
+                    print(f"🔌 蓝图 {name} 已加载 ({prefix}), 耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        return app
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix + '/'):
+                return self._get_app(prefix)(environ, start_response)
+        return self._fallback(environ, start_response)
+
+    def warm_up(self, after: Callable[[], None] = None):
+        """依次加载全部蓝图，完成后调用 after"""
+        start = time.perf_counter()
+        for prefix in self.blueprints:
+            try:
+                self._get_app(prefix)
+            except Exception as e:
+                print(f"❌ 预热蓝图 {prefix} 失败: {e}")
+                import traceback
+                print(traceback.format_exc())
+        print(f"✅ 蓝图预热完成: {len(self._apps)}/{len(self.blueprints)} 个, "
+              f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+        if after is not None:
+            after()
+
+    def start_warm_up(self, after: Callable[[], None] = None) -> threading.Thread:
+        """在后台线程中预热"""
+        thread = threading.Thread(target=self.warm_up, args=(after,), name='blueprint-warm-up', daemon=True)
+        thread.start()
+        return thread
@@ -9,6 +9,9 @@ import sys
 sys.path.append('..')
 
 from src.db_manager.steam import SteamStockComponentsModel
+from src.db_manager.database import DatabaseManager
+from src.db_manager.prices import price_or_none
+from src.db_manager.versions import data_versions
 
 prefectWorldStockComponentsV1 = Blueprint('prefectWorldStockComponentsV1', __name__)
 
@@ -51,70 +54,82 @@ def batch_insert_components():
         insert_count = 0
         update_count = 0
         failed_items = []
+        # 数据有变化的用户（记录改属其他用户时原用户也算），事务提交后统一标记版本号
+        changed_users = set()
         
-        # 处理所有数据
-        for item_index, item in enumerate(items):
-            try:
-                # 过滤出数据库中存在的字段
-                filtered_item = {}
-                for key, value in item.items():
-                    if key in db_fields:
-                        # 转换数据类型为字符串（数据库字段都是TEXT类型）
-                        if value is not None:
-                            filtered_item[key] = str(value)
-                        else:
-                            filtered_item[key] = None
-                
-                # 检查是否有主键 assetid
-                if 'assetid' not in filtered_item or not filtered_item['assetid']:
-                    failed_count += 1
-                    failed_items.append({
-                        'index': item_index,
-                        'error': '缺少主键 assetid'
-                    })
-                    continue
-                
-                # 检查记录是否已存在
-                assetid = filtered_item['assetid']
-                existing_record = SteamStockComponentsModel.find_by_assetid(assetid)
+        # 整批数据在一个事务中写入，只提交一次
+        with DatabaseManager().transaction():
+            # 处理所有数据
+            for item_index, item in enumerate(items):
+                try:
+                    # 过滤出数据库中存在的字段
+                    filtered_item = {}
+                    for key, value in item.items():
+                        if key in db_fields:
+                            # 价格列为 REAL，转换为数字；其余字段为 TEXT，转换为字符串
+                            if key in SteamStockComponentsModel.PRICE_COLUMNS:
+                                filtered_item[key] = price_or_none(value)
+                            elif value is not None:
+                                filtered_item[key] = str(value)
+                            else:
+                                filtered_item[key] = None
                 
-                if existing_record:
-                    # 如果记录已存在，更新记录
-                    for key, value in filtered_item.items():
-                        setattr(existing_record, key, value)
-                    
-                    if existing_record.save():
-                        success_count += 1
-                        update_count += 1
-                    else:
+                    # 检查是否有主键 assetid
+                    if 'assetid' not in filtered_item or not filtered_item['assetid']:
                         failed_count += 1
                         failed_items.append({
                             'index': item_index,
-                            'assetid': assetid,
-                            'error': '更新记录失败'
+                            'error': '缺少主键 assetid'
                         })
-                else:
-                    # 创建新记录
-                    new_record = SteamStockComponentsModel(**filtered_item)
+                        continue
+                
+                    # 检查记录是否已存在
+                    assetid = filtered_item['assetid']
+                    existing_record = SteamStockComponentsModel.find_by_assetid(assetid)
+                
+                    if existing_record:
+                        changed_users.add(existing_record.data_user)
+                        # 如果记录已存在，更新记录
+                        for key, value in filtered_item.items():
+                            setattr(existing_record, key, value)
                     
-                    if new_record.save():
-                        success_count += 1
-                        insert_count += 1
+                        if existing_record.save():
+                            success_count += 1
+                            update_count += 1
+                            changed_users.add(existing_record.data_user)
+                        else:
+                            failed_count += 1
+                            failed_items.append({
+                                'index': item_index,
+                                'assetid': assetid,
+                                'error': '更新记录失败'
+                            })
                     else:
-                        failed_count += 1
-                        failed_items.append({
-                            'index': item_index,
-                            'assetid': assetid,
-                            'error': '插入记录失败'
-                        })
+                        # 创建新记录
+                        new_record = SteamStockComponentsModel(**filtered_item)
+                    
+                        if new_record.save():
+                            success_count += 1
+                            insert_count += 1
+                            changed_users.add(new_record.data_user)
+                        else:
+                            failed_count += 1
+                            failed_items.append({
+                                'index': item_index,
+                                'assetid': assetid,
+                                'error': '插入记录失败'
+                            })
                 
-            except Exception as e:
-                failed_count += 1
-                failed_items.append({
-                    'index': item_index,
-                    'error': str(e)
-                })
-        
+                except Exception as e:
+                    failed_count += 1
+                    failed_items.append({
+                        'index': item_index,
+                        'error': str(e)
+                    })
+
+        for user in changed_users:
+            data_versions.bump(SteamStockComponentsModel.get_table_name(), user)
+
         return jsonify({
             'code': 0,
             'message': 'success',
@@ -181,8 +196,10 @@ def insert_single_component():
         filtered_data = {}
         for key, value in data.items():
             if key in db_fields:
-                # 转换数据类型为字符串（数据库字段都是TEXT类型）
-                if value is not None:
+                # 价格列为 REAL，转换为数字；其余字段为 TEXT，转换为字符串
+                if key in SteamStockComponentsModel.PRICE_COLUMNS:
+                    filtered_data[key] = price_or_none(value)
+                elif value is not None:
                     filtered_data[key] = str(value)
                 else:
                     filtered_data[key] = None
@@ -200,11 +217,14 @@ def insert_single_component():
         existing_record = SteamStockComponentsModel.find_by_assetid(assetid)
         
         if existing_record:
+            previous_user = existing_record.data_user
             # 如果记录已存在，更新记录
             for key, value in filtered_data.items():
                 setattr(existing_record, key, value)
             
             if existing_record.save():
+                for user in {previous_user, existing_record.data_user}:
+                    data_versions.bump(SteamStockComponentsModel.get_table_name(), user)
                 return jsonify({
                     'code': 0,
                     'message': '记录更新成功',
@@ -224,6 +244,7 @@ def insert_single_component():
             new_record = SteamStockComponentsModel(**filtered_data)
             
             if new_record.save():
+                data_versions.bump(SteamStockComponentsModel.get_table_name(), new_record.data_user)
                 return jsonify({
                     'code': 0,
                     'message': '记录插入成功',
@@ -269,6 +290,7 @@ def delete_component(assetid):
             }), 404
         
         if record.delete():
+            data_versions.bump(SteamStockComponentsModel.get_table_name(), record.data_user)
             return jsonify({
                 'code': 0,
                 'message': '删除成功',
@@ -336,6 +358,7 @@ def delete_component_by_assetid_and_user(assetid, steam_id):
         """
         
         db.execute_update(delete_sql, (assetid, steam_id))
+        data_versions.bump(SteamStockComponentsModel.get_table_name(), steam_id)
         
         print(f"✅ 删除成功 - assetid: {assetid}, steam_id: {steam_id}, 删除数量: {count}")
         
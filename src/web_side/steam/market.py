@@ -9,13 +9,11 @@ steamMarketV1 = Blueprint('steamMarketV1', __name__)
 @steamMarketV1.route('/countData/<data_user>', methods=['get'])
 def countData(data_user):
     try:
-        # 使用对象化方式查询购买记录数量
-        buy_records = SteamBuyModel.find_all("data_user = ?", (data_user,))
-        buy_count = len(buy_records)
+        # 在数据库中统计购买记录数量
+        buy_count = SteamBuyModel.aggregate("data_user = ?", (data_user,), count=True)['count']
         
-        # 使用对象化方式查询销售记录数量
-        sell_records = SteamSellModel.find_all("data_user = ?", (data_user,))
-        sell_count = len(sell_records)
+        # 在数据库中统计销售记录数量
+        sell_count = SteamSellModel.aggregate("data_user = ?", (data_user,), count=True)['count']
         
         # 计算总数量
         total_count = buy_count + sell_count
@@ -244,7 +242,7 @@ def insertNewData():
             buy_record.float_range = data.get('exterior_wear')
             buy_record.inspect_link = data.get('inspect_link')
             buy_record.data_user = data.get('steamId')
-            saved = buy_record.save()
+            saved = buy_record.save(mode='upsert')
             operation_type = '购买'
             
         elif trade_type == '-':
@@ -264,7 +262,7 @@ def insertNewData():
             sell_record.inspect_link = data.get('inspect_link')
             sell_record.data_user = data.get('steamId')
         
-            saved = sell_record.save()
+            saved = sell_record.save(mode='upsert')
             # print(f"销售记录保存结果: {saved}")
             operation_type = '销售'
         else:
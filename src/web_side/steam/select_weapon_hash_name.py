@@ -50,14 +50,16 @@ def batchInsertSteamHashName():
                 'error': 'weapons数组不能为空'
             }), 400
         
-        # 批量插入或更新
-        success_count = WeaponClassIDModel.batch_update_steam_hash_name(weapons)
+        # 一个事务内集合合并，已存在的 steam_hash_name 保持不变
+        result = WeaponClassIDModel.merge_catalog(weapons, 'steam')
+        success_count = result['inserted']
         
         return jsonify({
             'success': True,
             'message': f'成功处理 {success_count} 条数据',
             'success_count': success_count,
-            'total_count': len(weapons)
+            'total_count': len(weapons),
+            'merge': result
         }), 200
         
     except Exception as e:
@@ -1,6 +1,7 @@
 from flask import jsonify, request, Blueprint
 from src.db_manager.steam.steam_inventory_history import SteamInventoryHistoryModel
 from src.db_manager.steam.steam_inventory_history_index import SteamInventoryHistoryIndexModel
+from src.db_manager.database import DatabaseManager
 from datetime import datetime
 import json
 import traceback
@@ -19,7 +20,8 @@ def selectMaxTime(steam_ID):
         records = SteamInventoryHistoryIndexModel.find_all(
             "data_user = ? ORDER BY order_time DESC",
             (steam_ID,),
-            limit=1
+            limit=1,
+            columns=('ID', 'order_time', 'trade_type', 'data_user')
         )
         
         if records and len(records) > 0:
@@ -60,7 +62,8 @@ def selectMinTime(steam_ID):
         records = SteamInventoryHistoryIndexModel.find_all(
             "data_user = ? ORDER BY order_time ASC",
             (steam_ID,),
-            limit=1
+            limit=1,
+            columns=('ID', 'order_time', 'trade_type', 'data_user')
         )
         
         if records and len(records) > 0:
@@ -134,67 +137,69 @@ def insert_inventory_history():
         success_count = 0
         failed_count = 0
         
-        # 3. 先插入所有物品详情到 steam_inventoryhistory 表
-        for i in items:
-            try:
-                # 创建库存历史记录模型实例
-                inventory_record = SteamInventoryHistoryModel()
-                inventory_record.instanceid = i.get('instanceid')
-                inventory_record.classid = i.get('classid')
-                inventory_record.ID = item_ID
-                inventory_record.order_time = order_time
-                inventory_record.trade_title = trade_title
-                inventory_record.appid = i.get('appid')
-                inventory_record.item_name = i.get('item_name')
-                inventory_record.weapon_name = i.get('weapon_name')
-                inventory_record.weapon_type = i.get('weapon_type')
-                inventory_record.float_range = i.get('float_range')
-                inventory_record.trade_type = trade_type
-                inventory_record.data_user = data_user
+        # 物品详情与索引记录在同一个事务中写入，只提交一次
+        with DatabaseManager().transaction():
+            # 3. 先插入所有物品详情到 steam_inventoryhistory 表
+            for i in items:
+                try:
+                    # 创建库存历史记录模型实例
+                    inventory_record = SteamInventoryHistoryModel()
+                    inventory_record.instanceid = i.get('instanceid')
+                    inventory_record.classid = i.get('classid')
+                    inventory_record.ID = item_ID
+                    inventory_record.order_time = order_time
+                    inventory_record.trade_title = trade_title
+                    inventory_record.appid = i.get('appid')
+                    inventory_record.item_name = i.get('item_name')
+                    inventory_record.weapon_name = i.get('weapon_name')
+                    inventory_record.weapon_type = i.get('weapon_type')
+                    inventory_record.float_range = i.get('float_range')
+                    inventory_record.trade_type = trade_type
+                    inventory_record.data_user = data_user
                 
-                # 保存记录
-                saved = inventory_record.save()
+                    # 保存记录
+                    saved = inventory_record.save()
                 
-                if saved:
-                    success_count += 1
-                else:
-                    failed_count += 1
-                    print(f"[失败] 插入库存历史记录失败")
-                    print(f"  记录数据: {json.dumps(inventory_record.to_dict(), ensure_ascii=False, indent=2, default=str)}")
+                    if saved:
+                        success_count += 1
+                    else:
+                        failed_count += 1
+                        print(f"[失败] 插入库存历史记录失败")
+                        print(f"  记录数据: {json.dumps(inventory_record.to_dict(), ensure_ascii=False, indent=2, default=str)}")
                     
-            except Exception as item_error:
-                failed_count += 1
-                print(f"[异常] 处理单条记录时发生异常")
-                print(f"  异常类型: {type(item_error).__name__}")
-                print(f"  异常信息: {str(item_error)}")
-                print(f"  Item数据: {json.dumps(i, ensure_ascii=False, indent=2)}")
-                print(f"  堆栈跟踪:\n{traceback.format_exc()}")
+                except Exception as item_error:
+                    failed_count += 1
+                    print(f"[异常] 处理单条记录时发生异常")
+                    print(f"  异常类型: {type(item_error).__name__}")
+                    print(f"  异常信息: {str(item_error)}")
+                    print(f"  Item数据: {json.dumps(i, ensure_ascii=False, indent=2)}")
+                    print(f"  堆栈跟踪:\n{traceback.format_exc()}")
         
-        # 4. 如果有物品成功插入或items为空，则在索引表中创建记录
-        if success_count > 0 or len(items) == 0:
-            try:
-                index_record = SteamInventoryHistoryIndexModel()
-                index_record.ID = item_ID
-                index_record.order_time = order_time
-                index_record.trade_type = trade_type
-                index_record.data_user = data_user
+            # 4. 如果有物品成功插入或items为空，则在索引表中创建记录
+            if success_count > 0 or len(items) == 0:
+                try:
+                    index_record = SteamInventoryHistoryIndexModel()
+                    index_record.ID = item_ID
+                    index_record.order_time = order_time
+                    index_record.trade_type = trade_type
+                    index_record.data_user = data_user
                 
-                index_saved = index_record.save()
+                    index_saved = index_record.save()
                 
-                if index_saved:
-                    if len(items) == 0:
-                        print(f"[成功] 空交易记录索引创建成功: ID={item_ID}")
+                    if index_saved:
+                        if len(items) == 0:
+                            print(f"[成功] 空交易记录索引创建成功: ID={item_ID}")
+                        else:
+                            print(f"[成功] 索引记录创建成功: ID={item_ID}")
                     else:
-                        print(f"[成功] 索引记录创建成功: ID={item_ID}")
-                else:
-                    print(f"[警告] 索引记录创建失败: ID={item_ID}")
+                        print(f"[警告] 索引记录创建失败: ID={item_ID}")
                     
-            except Exception as index_error:
-                print(f"[异常] 创建索引记录时发生异常")
-                print(f"  异常类型: {type(index_error).__name__}")
-                print(f"  异常信息: {str(index_error)}")
-                print(f"  堆栈跟踪:\n{traceback.format_exc()}")
-        
+                except Exception as index_error:
+                    print(f"[异常] 创建索引记录时发生异常")
+                    print(f"  异常类型: {type(index_error).__name__}")
+                    print(f"  异常信息: {str(index_error)}")
+                    print(f"  堆栈跟踪:\n{traceback.format_exc()}")
+
         # 5. 返回结果
         if success_count > 0 or len(items) == 0:
             message = '空交易记录已保存' if len(items) == 0 else f'成功插入{success_count}条记录'
@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.execution_db import Date_base
+from src.db_manager.index.daily_rollup import BuyDailyRollupModel, average, combine
 import logging
 
 # 设置日志
@@ -244,59 +245,17 @@ def getStatsByTypeAndWear():
         weapon_types = data.get('weapon_types', [])
         float_ranges = data.get('float_ranges', [])
         
-        # 构建查询条件
-        conditions = []
-        
-        if weapon_types and len(weapon_types) > 0:
-            # 构建IN条件，支持多个武器类型
-            weapon_type_conditions = "', '".join(weapon_types)
-            conditions.append(f"weapon_type IN ('{weapon_type_conditions}')")
-            
-        if float_ranges and len(float_ranges) > 0:
-            # 构建IN条件，支持多个磨损等级
-            float_range_conditions = "', '".join(float_ranges)
-            conditions.append(f"float_range IN ('{float_range_conditions}')")
-        
-        where_clause = ""
-        if conditions:
-            where_clause = "WHERE " + " AND ".join(conditions)
-        
-        db = Date_base()
-        
-        # 获取统计数据
-        sql = f"""
-        SELECT 
-            COUNT(*) as total_count,
-            COALESCE(SUM(price), 0) as total_amount,
-            COALESCE(AVG(price), 0) as avg_price,
-            COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-            COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-            COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-        FROM buy 
-        {where_clause}
-        """
-        
-        success, result = db.select(sql)
-        
-        if success and result:
-            row = result[0]
-            stats = {
-                'totalCount': row[0],
-                'totalAmount': round(row[1], 2),
-                'avgPrice': round(row[2], 2),
-                'completedCount': row[3],
-                'cancelledCount': row[4],
-                'pendingCount': row[5]
-            }
-        else:
-            stats = {
-                'totalCount': 0,
-                'totalAmount': 0,
-                'avgPrice': 0,
-                'completedCount': 0,
-                'cancelledCount': 0,
-                'pendingCount': 0
-            }
+        # 从日汇总表按状态合计
+        groups = BuyDailyRollupModel.summarize_by(weapon_types, float_ranges)
+        totals = combine(groups)
+        stats = {
+            'totalCount': totals['record_count'],
+            'totalAmount': round(totals['price_sum'], 2),
+            'avgPrice': round(average(totals['price_sum'], totals['price_count']), 2),
+            'completedCount': groups.get('已完成', {}).get('record_count', 0),
+            'cancelledCount': groups.get('已取消', {}).get('record_count', 0),
+            'pendingCount': groups.get('待收货', {}).get('record_count', 0)
+        }
         
         return jsonify({
             'success': True,
@@ -1,31 +1,17 @@
 from flask import jsonify, request, Blueprint
 from src.db_manager.steam.steam_inventory import SteamInventoryModel
+from src.db_manager.steam.steam_inventory_group import SteamInventoryGroupModel
 from src.db_manager.database import DatabaseManager
+from src.db_manager.pagination import keyset_fetch
+from src.db_manager.prices import parse_price, price_or_none, price_sql
+from src.db_manager.search import search_condition
+from src.db_manager.versions import VersionedCache, data_versions
+from src.web_side.conditional import skip_etag, versioned
+from src.web_side.webSide.inventory_backfill import compute_buy_prices, price_backfill
 
 webInventoryV1 = Blueprint('webInventoryV1', __name__)
 
 
-def get_auto_price(item_name):
-    """
-    根据物品名称自动填充价格
-    返回: float 价格，或 None（需要从buy表查询）
-    """
-    if not item_name:
-        return None
-    
-    # 价格为0的物品关键词
-    zero_price_keywords = ['赛季奖牌', '奖牌', '勋章', '徽章', '布章', '硬币']
-    for keyword in zero_price_keywords:
-        if keyword in item_name:
-            return 0
-    
-    # 库存存储组件价格为14
-    if '库存存储组件' in item_name:
-        return 14
-    
-    # 其他物品返回None，需要从buy表查询
-    return None
-
 @webInventoryV1.route('/steam_ids', methods=['GET'])
 def get_steam_ids():
     """从config表获取所有不同的Steam ID列表"""
@@ -87,6 +73,7 @@ def get_steam_ids():
         }), 500
 
 @webInventoryV1.route('/inventory/<steam_id>', methods=['GET'])
+@versioned(SteamInventoryModel.get_table_name())
 def get_inventory(steam_id):
     """获取指定用户的库存列表"""
     try:
@@ -97,15 +84,18 @@ def get_inventory(steam_id):
         classid = request.args.get('classid', '')  # 新增：classid筛选参数
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        # 带 cursor 参数时使用游标分页（第一页传空值），忽略 offset
+        cursor_mode = 'cursor' in request.args
+        cursor = request.args.get('cursor') or None
         
         # 构建查询条件
         where_conditions = ["data_user = ?", "if_inventory = '1'"]  # 只查询在库存中的物品
         params = [steam_id]
         
         if search_text:
-            where_conditions.append("(item_name LIKE ? OR weapon_name LIKE ?)")
-            search_pattern = f"%{search_text}%"
-            params.extend([search_pattern, search_pattern])
+            condition, search_params = search_condition('steam_inventory', search_text)
+            where_conditions.append(condition)
+            params.extend(search_params)
         
         if weapon_type:
             where_conditions.append("weapon_type = ?")
@@ -125,99 +115,102 @@ def get_inventory(steam_id):
         from src.db_manager.database import DatabaseManager
         db = DatabaseManager()
         
-        sql = f"""
-        SELECT 
+        columns = """
             si.assetid, si.instanceid, si.classid, si.item_name, si.weapon_name, si.float_range, 
             si.weapon_type, si.weapon_float, si.remark, si.data_user, si.buy_price, si.yyyp_price, si.buff_price, si.steam_price, si.order_time
-        FROM {SteamInventoryModel.get_table_name()} si
-        WHERE {where_clause.replace('data_user', 'si.data_user').replace('weapon_type', 'si.weapon_type').replace('float_range', 'si.float_range').replace('item_name', 'si.item_name').replace('weapon_name', 'si.weapon_name')}
-        ORDER BY 
-            CASE 
-                WHEN si.weapon_type = '未知物品' THEN 1
-                ELSE 0
-            END,
-            si.ROWID
-        LIMIT ? OFFSET ?
         """
-        params.extend([limit, offset])
-        results = db.execute_query(sql, tuple(params))
-        
-        # 将结果转换为模型对象和字典
+        source = f"{SteamInventoryModel.get_table_name()} si"
+        si_where = where_clause.replace('data_user', 'si.data_user').replace('weapon_type', 'si.weapon_type').replace('float_range', 'si.float_range').replace('item_name', 'si.item_name').replace('weapon_name', 'si.weapon_name')
+        unknown_last = "CASE WHEN si.weapon_type = '未知物品' THEN 1 ELSE 0 END"
+        
+        next_cursor = None
+        total = None
+        if cursor_mode:
+            results, next_cursor = keyset_fetch(
+                db, columns, source, si_where, params,
+                unknown_last, descending=False, cursor=cursor, limit=limit, rowid='si.ROWID'
+            )
+            # 游标分页只在第一页统计总数
+            if not cursor:
+                total = SteamInventoryModel.count(where_clause, tuple(params))
+        else:
+            sql = f"""
+            SELECT {columns}, COUNT(*) OVER () AS total
+            FROM {source}
+            WHERE {si_where}
+            ORDER BY {unknown_last}, si.ROWID
+            LIMIT ? OFFSET ?
+            """
+            results = db.execute_query(sql, tuple(params) + (limit, offset))
+            # 总数由窗口函数随数据一并返回；只有翻页越界（本页无数据）时才单独统计
+            if results:
+                total = results[0][15]
+            else:
+                total = SteamInventoryModel.count(where_clause, tuple(params))
+        
+        # 优先读取steam_inventory表中的buy_price字段，为空时在内存中计算（自动价格、购入价格索引）
+        # 本接口只读不写，计算出的价格由后台回填任务写回数据库
+        # 使用 is None 判断，因为 buy_price 可能为 0；残留的文本价格无法解析时按未填写处理
+        buy_prices = []
+        price_sources = []
+        unpriced = []  # buy_price 为空的行下标
+        for i, row in enumerate(results):
+            buy_price = price_or_none(row[10])
+            if buy_price is None:
+                unpriced.append(i)
+            buy_prices.append(buy_price)
+            price_sources.append('stored' if buy_price is not None else None)
+        
+        if unpriced:
+            computed = compute_buy_prices([(results[i][3], results[i][7]) for i in unpriced])
+            for i, price in zip(unpriced, computed):
+                if price is not None:
+                    buy_prices[i] = price
+                    price_sources[i] = 'computed'
+            # 有可回填的价格时提交后台任务（已在队列中则忽略）
+            if any(price is not None for price in computed):
+                price_backfill.submit(steam_id)
+            # 计算出的价格依赖 buy 表，不随库存版本号变化，这样的响应不带 ETag
+            skip_etag()
+        
+        # 将结果转换为字典
         records = []
-        if results:
-            for row in results:
-                # 优先读取steam_inventory表中的buy_price字段
-                # 使用 is None 判断，因为 buy_price 可能为 "0"（字符串）
-                buy_price_raw = row[10] if len(row) > 10 else None
-                buy_price = buy_price_raw if buy_price_raw not in [None, '', 'None'] else None
-                item_name = row[3]  # item_name
-                
-                # 只有当buy_price为空（None或空字符串）时，才进行后续处理
-                if buy_price is None:
-                    # 自动填充特殊物品价格
-                    auto_price = get_auto_price(item_name)
-                    
-                    if auto_price is not None:
-                        # 特殊物品，使用自动价格
-                        buy_price = auto_price
-                    else:
-                        # 普通物品，从buy表查询
-                        weapon_float = row[7]  # weapon_float
-                        
-                        if weapon_float:
-                            # 有磨损值，查询精确匹配
-                            price_sql = "SELECT price FROM buy WHERE item_name = ? AND weapon_float = ? LIMIT 1"
-                            price_result = db.execute_query(price_sql, (item_name, weapon_float))
-                            if price_result and len(price_result) > 0:
-                                buy_price = price_result[0][0]
-                        else:
-                            # 没有磨损值，查询平均价格
-                            avg_price_sql = "SELECT AVG(CAST(price AS REAL)) FROM buy WHERE item_name = ?"
-                            avg_result = db.execute_query(avg_price_sql, (item_name,))
-                            if avg_result and len(avg_result) > 0 and avg_result[0][0] is not None:
-                                buy_price = round(avg_result[0][0], 2)
-                    
-                    # 如果有价格（自动填充或从buy表查到），更新到steam_inventory数据库
-                    # 注意：buy_price可能为0（如勋章、硬币等），所以用 is not None 判断
-                    if buy_price is not None:
-                        update_sql = "UPDATE steam_inventory SET buy_price = ? WHERE assetid = ?"
-                        affected = db.execute_update(update_sql, (buy_price, row[0]))
-                        if affected > 0:
-                            print(f"自动填充价格: {item_name} -> ¥{buy_price}")
-                
-                record = {
-                    'assetid': row[0],
-                    'instanceid': row[1],
-                    'classid': row[2],
-                    'item_name': row[3],
-                    'weapon_name': row[4],
-                    'float_range': row[5],
-                    'weapon_type': row[6],
-                    'weapon_float': row[7],
-                    'remark': row[8],
-                    'data_user': row[9],
-                    'buy_price': buy_price,
-                    'yyyp_price': row[11] if len(row) > 11 else None,
-                    'buff_price': row[12] if len(row) > 12 else None,
-                    'steam_price': row[13] if len(row) > 13 else None,
-                    'order_time': row[14] if len(row) > 14 else None
-                }
-                records.append(record)
+        for row, buy_price, price_source in zip(results, buy_prices, price_sources):
+            record = {
+                'assetid': row[0],
+                'instanceid': row[1],
+                'classid': row[2],
+                'item_name': row[3],
+                'weapon_name': row[4],
+                'float_range': row[5],
+                'weapon_type': row[6],
+                'weapon_float': row[7],
+                'remark': row[8],
+                'data_user': row[9],
+                'buy_price': buy_price,
+                'price_source': price_source,  # stored=数据库中的价格，computed=本次计算的价格
+                'yyyp_price': price_or_none(row[11]) if len(row) > 11 else None,
+                'buff_price': price_or_none(row[12]) if len(row) > 12 else None,
+                'steam_price': price_or_none(row[13]) if len(row) > 13 else None,
+                'order_time': row[14] if len(row) > 14 else None
+            }
+            records.append(record)
         
         # records 已经是字典列表了
         inventory_list = records
         
-        # 获取总数 - 需要使用相同的where条件和参数，但排除limit和offset
-        # 因为params在后面添加了limit和offset，所以需要去掉最后两个参数
-        count_params = params[:-2] if len(params) >= 2 else params
-        total = SteamInventoryModel.count(where_clause, tuple(count_params))
-        
         return jsonify({
             'success': True,
             'data': inventory_list,
-            'total': total
+            'total': total,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         print(f"查询库存失败: {e}")
         import traceback
@@ -228,78 +221,96 @@ def get_inventory(steam_id):
         }), 500
 
 
+@webInventoryV1.route('/inventory/price_backfill/<steam_id>', methods=['POST'])
+def start_price_backfill(steam_id):
+    """提交购入价格后台回填任务"""
+    try:
+        queued = price_backfill.submit(steam_id)
+        return jsonify({
+            'success': True,
+            'queued': queued,
+            'message': '已提交回填任务' if queued else '回填任务已在队列中',
+            'data': price_backfill.get_progress(steam_id)
+        }), 202
+    except Exception as e:
+        print(f"提交价格回填任务失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'提交失败: {str(e)}'
+        }), 500
+
+
+@webInventoryV1.route('/inventory/price_backfill/<steam_id>', methods=['GET'])
+def get_price_backfill_progress(steam_id):
+    """查询购入价格后台回填任务进度"""
+    progress = price_backfill.get_progress(steam_id)
+    if progress is None:
+        return jsonify({
+            'success': False,
+            'error': '该用户没有回填任务'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': progress
+    }), 200
+
+
+def _concat_list(values):
+    """与原 GROUP_CONCAT + split 的结果一致：跳过 NULL，值转为文本，只有一个空字符串时为空列表"""
+    values = [str(value) for value in values if value is not None]
+    return [] if values == [''] else values
+
+
 @webInventoryV1.route('/inventory/grouped/<steam_id>', methods=['GET'])
+@versioned(SteamInventoryModel.get_table_name())
 def get_grouped_inventory(steam_id):
-    """获取按item_name分组的库存列表"""
+    """获取按item_name分组的库存列表（读取分组汇总表，可选 limit / offset 按分组分页）"""
     try:
-        from src.db_manager.database import DatabaseManager
-        
-        db = DatabaseManager()
-        
-        # 查询分组数据，只查询在库存中的物品（if_inventory = '1'）
-        sql = """
-        SELECT 
-            si.item_name,
-            si.weapon_name,
-            si.weapon_type,
-            si.float_range,
-            COUNT(*) as count,
-            GROUP_CONCAT(si.assetid) as assetids,
-            GROUP_CONCAT(si.weapon_float) as weapon_floats,
-            GROUP_CONCAT(si.remark, '|||') as remarks,
-            GROUP_CONCAT(si.buy_price) as buy_prices,
-            GROUP_CONCAT(si.yyyp_price) as yyyp_prices,
-            GROUP_CONCAT(si.buff_price) as buff_prices,
-            GROUP_CONCAT(si.steam_price) as steam_prices,
-            GROUP_CONCAT(si.order_time) as order_times
-        FROM steam_inventory si
-        WHERE si.data_user = ? AND si.if_inventory = '1'
-        GROUP BY si.item_name, si.weapon_name, si.weapon_type, si.float_range
-        ORDER BY 
-            CASE 
-                WHEN si.weapon_type = '未知物品' THEN 1
-                ELSE 0
-            END,
-            si.item_name
-        """
-        
-        results = db.execute_query(sql, (steam_id,))
-        
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit is not None and limit <= 0:
+            limit = None
+
+        groups, total = SteamInventoryGroupModel.find_groups(steam_id, limit, max(offset, 0))
+        # 不分页时一次读出该用户全部明细，分页时只读当前页分组的明细
+        members = SteamInventoryGroupModel.find_members(steam_id, groups if limit is not None else None)
+
         # 转换为字典列表
         grouped_list = []
-        for row in results:
-            item_name, weapon_name, weapon_type, float_range, count, assetids, weapon_floats, remarks, buy_prices, yyyp_prices, buff_prices, steam_prices, order_times = row
-            
-            # 分割字符串为列表
-            assetid_list = assetids.split(',') if assetids else []
-            float_list = weapon_floats.split(',') if weapon_floats else []
-            remark_list = remarks.split('|||') if remarks else []
-            price_list = buy_prices.split(',') if buy_prices else []
-            yyyp_price_list = yyyp_prices.split(',') if yyyp_prices else []
-            buff_price_list = buff_prices.split(',') if buff_prices else []
-            steam_price_list = steam_prices.split(',') if steam_prices else []
-            order_time_list = order_times.split(',') if order_times else []
-            
+        for row in groups:
+            key = tuple(row[1:5])
+            item_name, weapon_name, weapon_type, float_range = (value or None for value in key)
+            count, buy_price_sum, yyyp_price_sum, buff_price_sum, steam_price_sum = row[5:]
+            items = members.get(key, [])
+            assetids, weapon_floats, remarks, buy_prices, yyyp_prices, buff_prices, steam_prices, order_times = (
+                zip(*items) if items else ([],) * 8
+            )
+
             grouped_list.append({
                 'item_name': item_name,
                 'weapon_name': weapon_name,
                 'weapon_type': weapon_type,
                 'float_range': float_range,
                 'count': count,
-                'assetids': assetid_list,
-                'weapon_floats': float_list,
-                'remarks': remark_list,
-                'buy_prices': price_list,
-                'yyyp_prices': yyyp_price_list,
-                'buff_prices': buff_price_list,
-                'steam_prices': steam_price_list,
-                'order_times': order_time_list
+                'assetids': _concat_list(assetids),
+                'weapon_floats': _concat_list(weapon_floats),
+                'remarks': _concat_list(remarks),
+                # 价格列表只列出数字价格，残留的文本值与 NULL 一样跳过
+                'buy_prices': _concat_list(map(price_or_none, buy_prices)),
+                'yyyp_prices': _concat_list(map(price_or_none, yyyp_prices)),
+                'buff_prices': _concat_list(map(price_or_none, buff_prices)),
+                'steam_prices': _concat_list(map(price_or_none, steam_prices)),
+                'order_times': _concat_list(order_times),
+                'buy_price_total': round(buy_price_sum, 2),
+                'yyyp_price_total': round(yyyp_price_sum, 2),
+                'buff_price_total': round(buff_price_sum, 2),
+                'steam_price_total': round(steam_price_sum, 2)
             })
         
         return jsonify({
             'success': True,
             'data': grouped_list,
-            'total': len(grouped_list)
+            'total': total
         }), 200
         
     except Exception as e:
@@ -312,146 +323,99 @@ def get_grouped_inventory(steam_id):
         }), 500
 
 
+# 统计接口的价格列：(返回键, 列名, 是否统计最小 / 最大值)
+STATS_PRICE_COLUMNS = (
+    ('price_stats', 'buy_price', True),
+    ('yyyp_price_stats', 'yyyp_price', False),
+    ('buff_price_stats', 'buff_price', False),
+)
+
+# 库存统计结果缓存，库存版本号变化（同步、改价）后重新计算
+_stats_cache = VersionedCache(SteamInventoryModel.get_table_name())
+
+
+def _compute_inventory_stats(steam_id):
+    """
+    一次扫描计算库存统计：按 (武器类型, 磨损等级) 分组取得各价格列的计数、总和与最值，
+    总数、按类型 / 磨损统计和价格统计都由分组结果在内存中合并得到。
+    价格列中残留的文本值经 price_sql 转换，无法解析的不计入，分组结果中的价格只有数字或 NULL
+    """
+    price_columns = []
+    for _, column, with_range in STATS_PRICE_COLUMNS:
+        price = price_sql(column)
+        price_columns += [f"COUNT(CASE WHEN {price} > 0 THEN 1 END)", f"SUM({price})", f"COUNT({price})"]
+        if with_range:
+            price_columns += [f"MIN({price})", f"MAX({price})"]
+    sql = f"""
+    SELECT weapon_type, float_range, COUNT(*), {', '.join(price_columns)}
+    FROM steam_inventory
+    WHERE data_user = ? AND if_inventory = '1'
+    GROUP BY weapon_type, float_range
+    """
+    rows = DatabaseManager().execute_query(sql, (steam_id,))
+
+    total_count = 0
+    type_counts = {}
+    wear_counts = {}
+    totals = {key: {'priced_count': 0, 'total_price': None, 'value_count': 0, 'min_price': None, 'max_price': None}
+              for key, _, _ in STATS_PRICE_COLUMNS}
+    for row in rows:
+        weapon_type, float_range, count = row[:3]
+        total_count += count
+        if weapon_type:
+            type_counts[weapon_type] = type_counts.get(weapon_type, 0) + count
+        if float_range:
+            wear_counts[float_range] = wear_counts.get(float_range, 0) + count
+
+        values = iter(row[3:])
+        for key, _, with_range in STATS_PRICE_COLUMNS:
+            stats = totals[key]
+            stats['priced_count'] += next(values)
+            price_sum = next(values)
+            if price_sum is not None:
+                stats['total_price'] = (stats['total_price'] or 0) + price_sum
+            stats['value_count'] += next(values)
+            if with_range:
+                for name, pick in (('min_price', min), ('max_price', max)):
+                    value = next(values)
+                    if value is not None:
+                        stats[name] = value if stats[name] is None else pick(stats[name], value)
+
+    def ranked(counts, name):
+        # 与 ORDER BY count DESC 一致，数量相同时按名称排序
+        ordered = sorted(sorted(counts.items()), key=lambda item: item[1], reverse=True)
+        return [{name: key, 'count': count} for key, count in ordered]
+
+    data = {
+        'total_count': total_count,
+        'by_type': ranked(type_counts, 'weapon_type'),
+        'by_wear': ranked(wear_counts, 'float_range'),
+    }
+    for key, _, with_range in STATS_PRICE_COLUMNS:
+        stats = totals[key]
+        total_price = stats['total_price']
+        avg_price = total_price / stats['value_count'] if total_price is not None and stats['value_count'] else None
+        result = {
+            'priced_count': stats['priced_count'],
+            'total_price': round(total_price, 2) if total_price else 0,
+            'avg_price': round(avg_price, 2) if avg_price else 0
+        }
+        if with_range:
+            result['min_price'] = round(stats['min_price'], 2) if stats['min_price'] else 0
+            result['max_price'] = round(stats['max_price'], 2) if stats['max_price'] else 0
+        data[key] = result
+    return data
+
+
 @webInventoryV1.route('/inventory/stats/<steam_id>', methods=['GET'])
+@versioned(SteamInventoryModel.get_table_name())
 def get_inventory_stats(steam_id):
-    """获取库存统计信息"""
+    """获取库存统计信息（只统计在库存中的物品）"""
     try:
-        from src.db_manager.database import DatabaseManager
-        
-        db = DatabaseManager()
-        
-        # 统计总数（只统计在库存中的物品）
-        total_sql = "SELECT COUNT(*) FROM steam_inventory WHERE data_user = ? AND if_inventory = '1'"
-        total_result = db.execute_query(total_sql, (steam_id,))
-        total_count = total_result[0][0] if total_result else 0
-        
-        # 按武器类型统计（只统计在库存中的物品）
-        type_sql = """
-        SELECT weapon_type, COUNT(*) as count 
-        FROM steam_inventory 
-        WHERE data_user = ? AND if_inventory = '1' AND weapon_type IS NOT NULL AND weapon_type != ''
-        GROUP BY weapon_type
-        ORDER BY count DESC
-        """
-        type_results = db.execute_query(type_sql, (steam_id,))
-        
-        type_stats = []
-        for row in type_results:
-            weapon_type, count = row
-            type_stats.append({
-                'weapon_type': weapon_type,
-                'count': count
-            })
-        
-        # 按磨损等级统计（只统计在库存中的物品）
-        wear_sql = """
-        SELECT float_range, COUNT(*) as count 
-        FROM steam_inventory 
-        WHERE data_user = ? AND if_inventory = '1' AND float_range IS NOT NULL AND float_range != ''
-        GROUP BY float_range
-        ORDER BY count DESC
-        """
-        wear_results = db.execute_query(wear_sql, (steam_id,))
-        
-        wear_stats = []
-        for row in wear_results:
-            float_range, count = row
-            wear_stats.append({
-                'float_range': float_range,
-                'count': count
-            })
-        
-        # 统计购入价格总和（只统计在库存中的物品）
-        price_sql = """
-        SELECT 
-            COUNT(CASE WHEN CAST(buy_price AS REAL) > 0 THEN 1 END) as priced_count,
-            SUM(CAST(buy_price AS REAL)) as total_price,
-            AVG(CAST(buy_price AS REAL)) as avg_price,
-            MIN(CAST(buy_price AS REAL)) as min_price,
-            MAX(CAST(buy_price AS REAL)) as max_price
-        FROM steam_inventory
-        WHERE data_user = ? AND if_inventory = '1'
-        """
-        price_result = db.execute_query(price_sql, (steam_id,))
-        
-        price_stats = {
-            'priced_count': 0,
-            'total_price': 0,
-            'avg_price': 0,
-            'min_price': 0,
-            'max_price': 0
-        }
-        
-        if price_result and len(price_result) > 0:
-            priced_count, total_price, avg_price, min_price, max_price = price_result[0]
-            price_stats = {
-                'priced_count': priced_count if priced_count else 0,
-                'total_price': round(total_price, 2) if total_price else 0,
-                'avg_price': round(avg_price, 2) if avg_price else 0,
-                'min_price': round(min_price, 2) if min_price else 0,
-                'max_price': round(max_price, 2) if max_price else 0
-            }
-        
-        # 统计悠悠有品价格总和
-        yyyp_price_sql = """
-        SELECT 
-            COUNT(CASE WHEN CAST(yyyp_price AS REAL) > 0 THEN 1 END) as priced_count,
-            SUM(CAST(yyyp_price AS REAL)) as total_price,
-            AVG(CAST(yyyp_price AS REAL)) as avg_price
-        FROM steam_inventory
-        WHERE data_user = ? AND if_inventory = '1'
-        """
-        yyyp_price_result = db.execute_query(yyyp_price_sql, (steam_id,))
-        
-        yyyp_price_stats = {
-            'priced_count': 0,
-            'total_price': 0,
-            'avg_price': 0
-        }
-        
-        if yyyp_price_result and len(yyyp_price_result) > 0:
-            priced_count, total_price, avg_price = yyyp_price_result[0]
-            yyyp_price_stats = {
-                'priced_count': priced_count if priced_count else 0,
-                'total_price': round(total_price, 2) if total_price else 0,
-                'avg_price': round(avg_price, 2) if avg_price else 0
-            }
-        
-        # 统计BUFF价格总和
-        buff_price_sql = """
-        SELECT 
-            COUNT(CASE WHEN CAST(buff_price AS REAL) > 0 THEN 1 END) as priced_count,
-            SUM(CAST(buff_price AS REAL)) as total_price,
-            AVG(CAST(buff_price AS REAL)) as avg_price
-        FROM steam_inventory
-        WHERE data_user = ? AND if_inventory = '1'
-        """
-        buff_price_result = db.execute_query(buff_price_sql, (steam_id,))
-        
-        buff_price_stats = {
-            'priced_count': 0,
-            'total_price': 0,
-            'avg_price': 0
-        }
-        
-        if buff_price_result and len(buff_price_result) > 0:
-            priced_count, total_price, avg_price = buff_price_result[0]
-            buff_price_stats = {
-                'priced_count': priced_count if priced_count else 0,
-                'total_price': round(total_price, 2) if total_price else 0,
-                'avg_price': round(avg_price, 2) if avg_price else 0
-            }
-        
+        data = _stats_cache.get_or_compute(steam_id, lambda: _compute_inventory_stats(steam_id))
         return jsonify({
             'success': True,
-            'data': {
-                'total_count': total_count,
-                'by_type': type_stats,
-                'by_wear': wear_stats,
-                'price_stats': price_stats,
-                'yyyp_price_stats': yyyp_price_stats,
-                'buff_price_stats': buff_price_stats
-            }
+            'data': data
         }), 200
         
     except Exception as e:
@@ -469,7 +433,13 @@ def update_buy_price(steam_id, assetid):
     """更新库存物品的购入价格"""
     try:
         data = request.get_json()
-        buy_price = data.get('buy_price', '')
+        try:
+            buy_price = parse_price(data.get('buy_price'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': '价格格式不正确'
+            }), 400
         
         from src.db_manager.database import DatabaseManager
         db = DatabaseManager()
@@ -483,6 +453,7 @@ def update_buy_price(steam_id, assetid):
         affected_rows = db.execute_update(sql, (buy_price, steam_id, assetid))
         
         if affected_rows > 0:
+            data_versions.bump(SteamInventoryModel.get_table_name(), steam_id)
             return jsonify({
                 'success': True,
                 'message': '更新成功'
@@ -573,9 +544,66 @@ def get_steam_config(steam_id):
         }), 500
 
 
-@webInventoryV1.route('/inventory/batch_update_yyyp_price', methods=['POST'])
-def batch_update_yyyp_price():
-    """批量更新悠悠有品价格"""
+def _batch_update_inventory(weapon_list, id_key, fields):
+    """
+    批量更新库存字段：整个列表先在内存中一次解析规范化，再一次 executemany 写入（同一事务），
+    数据库中不存在的 assetid 由一次查询的集合差得到
+
+    :param weapon_list: 请求中的物品列表
+    :param id_key: 物品中 assetid 对应的键
+    :param fields: (物品中的键, 列名, 是否为价格) 列表；值为空的字段不更新
+    :return: 返回给前端的统计信息
+    """
+    # 每个物品的解析结果：(assetid, 各列的值) 或错误信息，按原顺序输出错误
+    parsed = []
+    rows = []
+    for weapon in weapon_list:
+        if not isinstance(weapon, dict):
+            parsed.append(f"格式错误: {weapon!r}")
+            continue
+        assetid = weapon.get(id_key)
+        if not assetid:
+            parsed.append(f"缺少 {id_key}")
+            continue
+        values = []
+        try:
+            for key, _, is_price in fields:
+                value = weapon.get(key)
+                values.append(parse_price(value or None) if is_price else (value or None))
+        except ValueError:
+            parsed.append(f"{id_key} {assetid} 价格格式无效")
+            continue
+        row = (str(assetid),) + tuple(values)
+        parsed.append(row)
+        rows.append(row)
+
+    existing = SteamInventoryModel.update_by_assetids([column for _, column, _ in fields], rows)
+    missing = {row[0] for row in rows} - existing.keys()
+
+    success_count = 0
+    error_messages = []
+    for item in parsed:
+        if isinstance(item, str):
+            error_messages.append(item)
+        elif item[0] in missing:
+            error_messages.append(f"{id_key} {item[0]} 在数据库中不存在")
+        else:
+            success_count += 1
+
+    # 价格有变化的用户统一标记库存版本号
+    for user in set(existing.values()):
+        data_versions.bump(SteamInventoryModel.get_table_name(), user)
+
+    return {
+        'total': len(weapon_list),
+        'success_count': success_count,
+        'failed_count': len(error_messages),
+        'error_messages': error_messages[:10]  # 只返回前10条错误信息
+    }
+
+
+def _batch_update_request(id_key, fields, name):
+    """批量更新接口的公共部分：校验 weapon_list 并调用 _batch_update_inventory"""
     try:
         # 获取请求数据
         data = request.get_json()
@@ -594,69 +622,13 @@ def batch_update_yyyp_price():
                 'error': 'weapon_list 必须是数组'
             }), 400
         
-        # 统计信息
-        success_count = 0
-        failed_count = 0
-        error_messages = []
-        
-        # 遍历列表，更新每个武器的价格
-        for weapon in weapon_list:
-            try:
-                # 获取必要字段
-                steam_asset_id = weapon.get('SteamAssetId')
-                asset_add_time = weapon.get('AssetAddTime')
-                show_mark_price = weapon.get('ShowMarkPrice')
-                
-                if not steam_asset_id:
-                    failed_count += 1
-                    error_messages.append(f"缺少 SteamAssetId")
-                    continue
-                
-                # 查找库存记录
-                inventory = SteamInventoryModel.find_by_assetid(steam_asset_id)
-                
-                if inventory:
-                    # 更新已存在的记录
-                    if asset_add_time:
-                        inventory.order_time = asset_add_time
-                    if show_mark_price:
-                        # 提取价格数字部分（去掉 ￥ 符号）
-                        if isinstance(show_mark_price, str) and show_mark_price.startswith('￥'):
-                            price_value = show_mark_price.replace('￥', '').strip()
-                        else:
-                            price_value = str(show_mark_price)
-                        inventory.yyyp_price = price_value
-                    
-                    if inventory.save():
-                        success_count += 1
-                    else:
-                        failed_count += 1
-                        error_messages.append(f"SteamAssetId {steam_asset_id} 更新失败")
-                else:
-                    # 记录不存在
-                    failed_count += 1
-                    error_messages.append(f"SteamAssetId {steam_asset_id} 在数据库中不存在")
-                    
-            except Exception as e:
-                failed_count += 1
-                error_messages.append(f"处理 SteamAssetId {weapon.get('SteamAssetId', 'Unknown')} 时出错: {str(e)}")
-                print(f"批量更新时出错: {e}")
-                import traceback
-                print(traceback.format_exc())
-        
-        # 返回结果
         return jsonify({
             'success': True,
-            'data': {
-                'total': len(weapon_list),
-                'success_count': success_count,
-                'failed_count': failed_count,
-                'error_messages': error_messages[:10]  # 只返回前10条错误信息
-            }
+            'data': _batch_update_inventory(weapon_list, id_key, fields)
         }), 200
         
     except Exception as e:
-        print(f"批量更新悠悠有品价格失败: {e}")
+        print(f"批量更新{name}价格失败: {e}")
         import traceback
         print(f"详细错误信息: {traceback.format_exc()}")
         return jsonify({
@@ -665,95 +637,20 @@ def batch_update_yyyp_price():
         }), 500
 
 
+@webInventoryV1.route('/inventory/batch_update_yyyp_price', methods=['POST'])
+def batch_update_yyyp_price():
+    """批量更新悠悠有品价格"""
+    return _batch_update_request('SteamAssetId', [
+        ('AssetAddTime', 'order_time', False),
+        ('ShowMarkPrice', 'yyyp_price', True),
+    ], '悠悠有品')
+
+
 @webInventoryV1.route('/inventory/batch_update_buff_price', methods=['POST'])
 def batch_update_buff_price():
     """批量更新BUFF价格"""
-    try:
-        # 获取请求数据
-        data = request.get_json()
-        
-        if not data or 'weapon_list' not in data:
-            return jsonify({
-                'success': False,
-                'error': '缺少必要参数 weapon_list'
-            }), 400
-        
-        weapon_list = data['weapon_list']
-        
-        if not isinstance(weapon_list, list):
-            return jsonify({
-                'success': False,
-                'error': 'weapon_list 必须是数组'
-            }), 400
-        
-        # 统计信息
-        success_count = 0
-        failed_count = 0
-        error_messages = []
-        
-        # 遍历列表，更新每个武器的价格
-        for weapon in weapon_list:
-            try:
-                # 获取必要字段
-                assetid = weapon.get('assetid')
-                instanceid = weapon.get('instanceid')
-                steam_price = weapon.get('steam_price')
-                buff_price = weapon.get('buff_price')
-                
-                if not assetid:
-                    failed_count += 1
-                    error_messages.append(f"缺少 assetid")
-                    continue
-                
-                # 查找库存记录
-                inventory = SteamInventoryModel.find_by_assetid(assetid)
-                
-                if inventory:
-                    # 更新已存在的记录
-                    if instanceid:
-                        inventory.instanceid = instanceid
-                    
-                    if steam_price:
-                        # 确保价格是字符串格式
-                        inventory.steam_price = str(steam_price)
-                    
-                    if buff_price:
-                        # 确保价格是字符串格式
-                        inventory.buff_price = str(buff_price)
-                    
-                    if inventory.save():
-                        success_count += 1
-                    else:
-                        failed_count += 1
-                        error_messages.append(f"assetid {assetid} 更新失败")
-                else:
-                    # 记录不存在
-                    failed_count += 1
-                    error_messages.append(f"assetid {assetid} 在数据库中不存在")
-                    
-            except Exception as e:
-                failed_count += 1
-                error_messages.append(f"处理 assetid {weapon.get('assetid', 'Unknown')} 时出错: {str(e)}")
-                print(f"批量更新时出错: {e}")
-                import traceback
-                print(traceback.format_exc())
-        
-        # 返回结果
-        return jsonify({
-            'success': True,
-            'data': {
-                'total': len(weapon_list),
-                'success_count': success_count,
-                'failed_count': failed_count,
-                'error_messages': error_messages[:10]  # 只返回前10条错误信息
-            }
-        }), 200
-        
-    except Exception as e:
-        print(f"批量更新BUFF价格失败: {e}")
-        import traceback
-        print(f"详细错误信息: {traceback.format_exc()}")
-        return jsonify({
-            'success': False,
-            'error': f'更新失败: {str(e)}'
-        }), 500
\ No newline at end of file
+    return _batch_update_request('assetid', [
+        ('instanceid', 'instanceid', False),
+        ('steam_price', 'steam_price', True),
+        ('buff_price', 'buff_price', True),
+    ], 'BUFF')
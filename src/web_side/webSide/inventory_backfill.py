@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+库存购入价格后台回填
+
+GET /webInventoryV1/inventory/<steam_id> 只读：buy_price 为空的行在内存中计算价格返回，
+并把该用户提交到这里的队列，由后台线程分批写回 steam_inventory。
+"""
+
+import queue
+import threading
+import time
+import traceback
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from src.db_manager.database import DatabaseManager
+from src.db_manager.index.buy_price_index import BuyPriceIndexModel
+from src.db_manager.prices import get_auto_price, price_or_none
+from src.db_manager.versions import data_versions
+
+
+# buy_price 视为“未填写”的条件
+UNPRICED_CONDITION = "(buy_price IS NULL OR buy_price IN ('', 'None'))"
+
+
+def compute_buy_prices(items: Sequence[Tuple[Optional[str], Any]]) -> List[Optional[float]]:
+    """
+    批量计算未填写购入价格的物品价格：先用自动价格，再查购入价格索引
+
+    :param items: (item_name, weapon_float) 列表
+    :return: 与 items 一一对应的价格（数字），无法计算为 None
+    """
+    prices = [get_auto_price(item_name) for item_name, _ in items]
+    lookup = [i for i, price in enumerate(prices) if price is None]
+    if lookup:
+        resolved = BuyPriceIndexModel.resolve_prices([items[i] for i in lookup])
+        for i, price in zip(lookup, resolved):
+            prices[i] = price
+    # buy_price 为 REAL 列，与同步、PUT 接口一致只写入数字
+    return [price_or_none(price) for price in prices]
+
+
+class InventoryPriceBackfill:
+    """按用户排队、分批写回 buy_price 的后台任务（单个守护线程）"""
+
+    def __init__(self, batch_size: int = 200):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._pending = set()  # 已排队或正在处理的 steam_id，避免重复提交
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, steam_id: str) -> bool:
+        """提交一个用户的回填任务，已在队列中时返回 False"""
+        with self._lock:
+            if steam_id in self._pending:
+                return False
+            self._pending.add(steam_id)
+            self._progress[steam_id] = {
+                'status': 'queued',
+                'total': None,
+                'processed': 0,
+                'filled': 0,
+                'queued_at': time.time(),
+                'finished_at': None,
+                'error': None
+            }
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inventory-price-backfill', daemon=True)
+                self._thread.start()
+        self._queue.put(steam_id)
+        return True
+
+    def get_progress(self, steam_id: str) -> Optional[Dict[str, Any]]:
+        """查询某个用户最近一次回填任务的进度"""
+        with self._lock:
+            progress = self._progress.get(steam_id)
+            return dict(progress) if progress else None
+
+    def _update(self, steam_id: str, **fields):
+        with self._lock:
+            self._progress[steam_id].update(fields)
+
+    def _run(self):
+        while True:
+            steam_id = self._queue.get()
+            try:
+                self._backfill(steam_id)
+            except Exception as e:
+                print(f"❌ 购入价格回填失败 - steam_id: {steam_id}: {e}")
+                print(f"详细错误信息: {traceback.format_exc()}")
+                self._update(steam_id, status='failed', error=str(e), finished_at=time.time())
+            finally:
+                with self._lock:
+                    self._pending.discard(steam_id)
+                self._queue.task_done()
+
+    def _backfill(self, steam_id: str):
+        db = DatabaseManager()
+        total = db.execute_query(
+            f"SELECT COUNT(*) FROM steam_inventory WHERE data_user = ? AND if_inventory = '1' AND {UNPRICED_CONDITION}",
+            (steam_id,)
+        )[0][0]
+        self._update(steam_id, status='running', total=total)
+
+        processed = filled = 0
+        last_rowid = 0
+        while True:
+            # 按 rowid 向后翻页，已处理但仍无价格的行不会被重复读取
+            rows = db.execute_query(f"""
+                SELECT rowid, assetid, item_name, weapon_float FROM steam_inventory
+                WHERE data_user = ? AND if_inventory = '1' AND {UNPRICED_CONDITION} AND rowid > ?
+                ORDER BY rowid LIMIT ?
+            """, (steam_id, last_rowid, self.batch_size))
+            if not rows:
+                break
+
+            prices = compute_buy_prices([(row[2], row[3]) for row in rows])
+            # 无法计算出数字价格的行保持未填写
+            updates = [(price, row[1]) for row, price in zip(rows, prices) if price is not None]
+            if updates:
+                # 只回填仍为空的行，不覆盖期间被用户手动修改的价格
+                filled += db.execute_many(
+                    f"UPDATE steam_inventory SET buy_price = ? WHERE assetid = ? AND {UNPRICED_CONDITION}",
+                    updates
+                )
+                data_versions.bump('steam_inventory', steam_id)
+
+            processed += len(rows)
+            last_rowid = rows[-1][0]
+            self._update(steam_id, processed=processed, filled=filled)
+
+        self._update(steam_id, status='done', finished_at=time.time())
+        print(f"📊 购入价格回填完成 - steam_id: {steam_id}, 处理: {processed}, 填充: {filled}")
+
+
+# 全局回填任务实例
+price_backfill = InventoryPriceBackfill()
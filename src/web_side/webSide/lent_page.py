@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.execution_db import Date_base
+from src.db_manager.index.daily_rollup import LeaseDailyRollupModel, average, combine
 from src.db_manager.index.lease import LeaseModel
 
 webLentPageV1 = Blueprint('webLentPageV1', __name__)
@@ -249,62 +250,17 @@ def getStatsByTypeAndWear():
         weapon_types = data.get('weapon_type', [])  # 现在接收数组
         float_ranges = data.get('float_range', [])  # 现在接收数组
         
-        # 构建查询条件
-        conditions = []
-        params = []
-        
-        # 处理武器类型（多选）
-        if weapon_types and len(weapon_types) > 0:
-            placeholders = ','.join(['?' for _ in weapon_types])
-            conditions.append(f"weapon_type IN ({placeholders})")
-            params.extend(weapon_types)
-            
-        # 处理磨损等级（多选）
-        if float_ranges and len(float_ranges) > 0:
-            placeholders = ','.join(['?' for _ in float_ranges])
-            conditions.append(f"float_range IN ({placeholders})")
-            params.extend(float_ranges)
-        
-        where_clause = ""
-        if conditions:
-            where_clause = "WHERE " + " AND ".join(conditions)
-        
-        db = Date_base()
-        
-        # 获取统计数据
-        sql = f"""
-        SELECT 
-            COUNT(*) as total_count,
-            COALESCE(SUM(unit_price * lease_day), 0) as total_amount,
-            COALESCE(AVG(unit_price), 0) as avg_price,
-            COALESCE(SUM(lease_day), 0) as total_lease_days,
-            COALESCE(AVG(lease_day), 0) as avg_lease_days,
-            COUNT(CASE WHEN status = '租赁中' THEN 1 END) as renting_count
-        FROM lease 
-        {where_clause}
-        """
-        
-        result = db.execute_query(sql, tuple(params))
-        
-        if result:
-            row = result[0]
-            stats = {
-                'totalCount': row[0],
-                'totalAmount': round(row[1], 2),
-                'avgPrice': round(row[2], 2),
-                'totalLeaseDays': row[3],
-                'avgLeaseDays': round(row[4], 2),
-                'rentingCount': row[5]
-            }
-        else:
-            stats = {
-                'totalCount': 0,
-                'totalAmount': 0,
-                'avgPrice': 0,
-                'totalLeaseDays': 0,
-                'avgLeaseDays': 0,
-                'rentingCount': 0
-            }
+        # 从日汇总表按状态合计
+        groups = LeaseDailyRollupModel.summarize_by(weapon_types, float_ranges)
+        totals = combine(groups)
+        stats = {
+            'totalCount': totals['record_count'],
+            'totalAmount': round(totals['amount_sum'], 2),
+            'avgPrice': round(average(totals['price_sum'], totals['price_count']), 2),
+            'totalLeaseDays': totals['days_sum'],
+            'avgLeaseDays': round(average(totals['days_sum'], totals['days_count']), 2),
+            'rentingCount': groups.get('租赁中', {}).get('record_count', 0)
+        }
         
         return jsonify({
             'success': True,
@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.execution_db import Date_base
+from src.db_manager.index.daily_rollup import SellDailyRollupModel, average, combine
 from src.db_manager.index.sell import SellModel
 
 webSellPageV1 = Blueprint('webSellPageV1', __name__)
@@ -231,55 +232,19 @@ def getStatsByTypeAndWear():
         weapon_type = data.get('weapon_type', '')
         float_range = data.get('float_range', '')
         
-        # 构建查询条件
-        conditions = []
-        
-        if weapon_type:
-            conditions.append(f"weapon_type = '{weapon_type}'")
-            
-        if float_range:
-            conditions.append(f"float_range = '{float_range}'")
-        
-        where_clause = ""
-        if conditions:
-            where_clause = "WHERE " + " AND ".join(conditions)
-        
-        db = Date_base()
-        
-        # 获取统计数据
-        sql = f"""
-        SELECT 
-            COUNT(*) as total_count,
-            COALESCE(SUM(price), 0) as total_amount,
-            COALESCE(AVG(price), 0) as avg_price,
-            COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-            COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-            COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-        FROM sell 
-        {where_clause}
-        """
-        
-        success, result = db.select(sql)
-        
-        if success and result:
-            row = result[0]
-            stats = {
-                'totalCount': row[0],
-                'totalAmount': round(row[1], 2),
-                'avgPrice': round(row[2], 2),
-                'completedCount': row[3],
-                'cancelledCount': row[4],
-                'pendingCount': row[5]
-            }
-        else:
-            stats = {
-                'totalCount': 0,
-                'totalAmount': 0,
-                'avgPrice': 0,
-                'completedCount': 0,
-                'cancelledCount': 0,
-                'pendingCount': 0
-            }
+        # 从日汇总表按状态合计（单选，空表示不限）
+        weapon_types = [weapon_type] if weapon_type else None
+        float_ranges = [float_range] if float_range else None
+        groups = SellDailyRollupModel.summarize_by(weapon_types, float_ranges)
+        totals = combine(groups)
+        stats = {
+            'totalCount': totals['record_count'],
+            'totalAmount': round(totals['price_sum'], 2),
+            'avgPrice': round(average(totals['price_sum'], totals['price_count']), 2),
+            'completedCount': groups.get('已完成', {}).get('record_count', 0),
+            'cancelledCount': groups.get('已取消', {}).get('record_count', 0),
+            'pendingCount': groups.get('待收货', {}).get('record_count', 0)
+        }
         
         return jsonify({
             'success': True,
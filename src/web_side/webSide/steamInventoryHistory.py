@@ -2,31 +2,25 @@ from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.execution_db import Date_base
 from src.db_manager.steam.steam_inventory_history import SteamInventoryHistoryModel
+from src.db_manager.search import search_condition
 import traceback
 
 webSteamInventoryHistoryV1 = Blueprint('webSteamInventoryHistoryV1', __name__)
 
 # ==================== Helper Functions ====================
 
-def calculate_stats(records):
-    """计算统计数据"""
-    if not records:
-        return {
-            "total_count": 0,
-            "gain_count": 0,
-            "loss_count": 0
-        }
-    
-    total_count = len(records)
-    gain_count = sum(1 for record in records if record.trade_type == '+')
-    loss_count = sum(1 for record in records if record.trade_type == '-')
-    
+def calculate_stats(where="1=1", params=()):
+    """计算统计数据（在数据库中计数，不加载记录）"""
     return {
-        "total_count": total_count,
-        "gain_count": gain_count,
-        "loss_count": loss_count
+        "total_count": SteamInventoryHistoryModel.count(where, params),
+        "gain_count": SteamInventoryHistoryModel.count(f"({where}) AND trade_type = ?", tuple(params) + ('+',)),
+        "loss_count": SteamInventoryHistoryModel.count(f"({where}) AND trade_type = ?", tuple(params) + ('-',))
     }
 
+# record_to_dict 用到的列，列表接口只查询这些列
+DICT_COLUMNS = ('instanceid', 'classid', 'ID', 'order_time', 'trade_title', 'appid',
+                'item_name', 'weapon_name', 'weapon_type', 'float_range', 'trade_type')
+
 def record_to_dict(record):
     """将记录转换为字典格式"""
     return {
@@ -43,6 +37,16 @@ def record_to_dict(record):
         "trade_type": record.trade_type
     }
 
+def rowid_descending(sort_field, descending, by_trade_type):
+    """
+    同一排序值的记录是否按 rowid 降序排列（ORDER BY 的最后一个排序键）
+
+    与原有查询的顺序保持一致：沿排序列的索引扫描时 rowid 与排序同向；
+    按 trade_type 索引筛选后排序，或排序列没有索引时，rowid 升序
+    """
+    indexed = {index['columns'][0] for index in SteamInventoryHistoryModel.get_indexes()}
+    return descending and not by_trade_type and sort_field in indexed
+
 # ==================== Steam Inventory History APIs ====================
 
 @webSteamInventoryHistoryV1.route('/count', methods=['GET'])
@@ -69,6 +73,13 @@ def get_list():
         sort_field = request.args.get('sort_field', 'order_time')
         sort_order = request.args.get('sort_order', 'desc')
         need_stats = request.args.get('need_stats', 'true').lower() == 'true'
+        # 带 cursor 参数时使用游标分页（第一页传空值），忽略 page
+        cursor_mode = 'cursor' in request.args
+        cursor = request.args.get('cursor') or None
+        
+        # 排序字段只允许表中存在的列
+        if sort_field not in SteamInventoryHistoryModel.get_fields():
+            sort_field = 'order_time'
         
         # 构建查询条件
         where_conditions = []
@@ -81,16 +92,15 @@ def get_list():
         
         # 搜索条件（交易标题、物品名、武器名）
         if search:
-            where_conditions.append("(trade_title LIKE ? OR item_name LIKE ? OR weapon_name LIKE ?)")
-            params.append(f"%{search}%")
-            params.append(f"%{search}%")
-            params.append(f"%{search}%")
+            condition, search_params = search_condition('steam_inventoryhistory', search)
+            where_conditions.append(condition)
+            params.extend(search_params)
         
         # 时间范围筛选
         if start_date and end_date:
-            where_conditions.append("DATE(order_time) BETWEEN ? AND ?")
-            params.append(start_date)
-            params.append(end_date)
+            condition, range_params = SteamInventoryHistoryModel.time_range('order_time', start_date, end_date)
+            where_conditions.append(condition)
+            params.extend(range_params)
         
         # 组合WHERE子句
         if where_conditions:
@@ -100,21 +110,40 @@ def get_list():
         
         # 添加排序
         sort_direction = "DESC" if sort_order.lower() == 'desc' else "ASC"
-        where_clause_with_order = where_clause + f" ORDER BY {sort_field} {sort_direction}"
-        
-        # 计算偏移量
-        offset = (page - 1) * page_size
+        tiebreak_descending = rowid_descending(sort_field, sort_direction == "DESC",
+                                               bool(trade_type and trade_type in ['+', '-']))
         
         # 查询数据（主查询）
-        records = SteamInventoryHistoryModel.find_all(
-            where_clause_with_order,
-            tuple(params),
-            limit=page_size,
-            offset=offset
-        )
+        if cursor_mode:
+            records = SteamInventoryHistoryModel.find_all(
+                where_clause,
+                tuple(params),
+                limit=page_size,
+                order_by=sort_field,
+                descending=sort_direction == "DESC",
+                cursor=cursor,
+                columns=DICT_COLUMNS,
+                rowid_descending=tiebreak_descending
+            )
+        else:
+            # 同值记录按 rowid 排序，顺序固定且与游标分页一致
+            where_clause_with_order = (where_clause + f" ORDER BY {sort_field} {sort_direction}, "
+                                       f"rowid {'DESC' if tiebreak_descending else 'ASC'}")
+            offset = (page - 1) * page_size
+            records = SteamInventoryHistoryModel.find_all(
+                where_clause_with_order,
+                tuple(params),
+                limit=page_size,
+                offset=offset,
+                columns=DICT_COLUMNS
+            )
         
         # 查询总数（使用 COUNT 查询，不获取所有数据）
-        total_count = SteamInventoryHistoryModel.count(where_clause, tuple(params))
+        # 游标分页只在第一页统计总数，后续页返回 null，避免每页都扫描全表
+        if cursor_mode and cursor:
+            total_count = None
+        else:
+            total_count = SteamInventoryHistoryModel.count(where_clause, tuple(params))
         
         # 转换为字典格式（优化：直接构建字典而不是调用函数）
         data = []
@@ -139,14 +168,8 @@ def get_list():
         
         if need_stats:
             # 使用 SQL COUNT 查询代替获取所有数据
-            gain_where = where_clause + " AND trade_type = '+'"
-            loss_where = where_clause + " AND trade_type = '-'"
-            
-            gain_params = list(params) + ['+'] if params else ['+']
-            loss_params = list(params) + ['-'] if params else ['-']
-            
-            gain_count = SteamInventoryHistoryModel.count(gain_where, tuple(gain_params))
-            loss_count = SteamInventoryHistoryModel.count(loss_where, tuple(loss_params))
+            gain_count = SteamInventoryHistoryModel.count(where_clause + " AND trade_type = ?", tuple(params) + ('+',))
+            loss_count = SteamInventoryHistoryModel.count(where_clause + " AND trade_type = ?", tuple(params) + ('-',))
         
         return jsonify({
             "success": True,
@@ -155,11 +178,17 @@ def get_list():
                 "total": total_count,
                 "page": page,
                 "page_size": page_size,
+                "next_cursor": records.next_cursor if cursor_mode else None,
                 "gain_count": gain_count,
                 "loss_count": loss_count
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         print(f"查询Steam交易历史列表失败: {e}")
         print(traceback.format_exc())
@@ -184,7 +213,8 @@ def get_detail(instanceid, classid):
         records = SteamInventoryHistoryModel.find_all(
             "instanceid = ? AND classid = ?",
             (instanceid, classid),
-            limit=1
+            limit=1,
+            columns=DICT_COLUMNS
         )
         
         if records and len(records) > 0:
@@ -210,9 +240,7 @@ def get_detail(instanceid, classid):
 def get_stats():
     """获取Steam交易历史统计数据"""
     try:
-        # 获取所有记录
-        all_records = SteamInventoryHistoryModel.find_all()
-        stats = calculate_stats(all_records)
+        stats = calculate_stats()
         
         return jsonify({
             "success": True,
@@ -245,9 +273,11 @@ def search():
             }), 400
         
         # 搜索交易标题、物品名、武器名
+        condition, params = search_condition('steam_inventoryhistory', keyword)
         records = SteamInventoryHistoryModel.find_all(
-            "trade_title LIKE ? OR item_name LIKE ? OR weapon_name LIKE ? ORDER BY order_time DESC",
-            (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%")
+            f"{condition} ORDER BY order_time DESC, rowid DESC",
+            tuple(params),
+            columns=DICT_COLUMNS
         )
         
         data = [record_to_dict(record) for record in records]
@@ -287,10 +317,11 @@ def get_by_trade_type(trade_type):
             }), 400
         
         records = SteamInventoryHistoryModel.find_all(
-            "trade_type = ? ORDER BY order_time DESC",
+            "trade_type = ? ORDER BY order_time DESC, rowid ASC",
             (trade_type,),
             limit=page_size,
-            offset=offset
+            offset=offset,
+            columns=DICT_COLUMNS
         )
         
         total = SteamInventoryHistoryModel.count("trade_type = ?", (trade_type,))
@@ -335,17 +366,16 @@ def get_by_time_range():
                 "error": "开始日期和结束日期不能为空"
             }), 400
         
+        condition, params = SteamInventoryHistoryModel.time_range('order_time', start_date, end_date)
         records = SteamInventoryHistoryModel.find_all(
-            "DATE(order_time) BETWEEN ? AND ? ORDER BY order_time DESC",
-            (start_date, end_date),
+            f"{condition} ORDER BY order_time DESC, rowid DESC",
+            tuple(params),
             limit=page_size,
-            offset=offset
+            offset=offset,
+            columns=DICT_COLUMNS
         )
         
-        total = SteamInventoryHistoryModel.count(
-            "DATE(order_time) BETWEEN ? AND ?",
-            (start_date, end_date)
-        )
+        total = SteamInventoryHistoryModel.count(condition, tuple(params))
         
         data = [record_to_dict(record) for record in records]
         
@@ -4,6 +4,7 @@ from src.execution_db import Date_base
 from src.now_time import today
 from src.db_manager.steam.steam_buy import SteamBuyModel
 from src.db_manager.steam.steam_sell import SteamSellModel
+from src.db_manager.search import search_condition
 import requests
 
 webSteamMarketV1 = Blueprint('webSteamMarketV1', __name__)
@@ -13,7 +14,7 @@ webSteamMarketV1 = Blueprint('webSteamMarketV1', __name__)
 def get_distinct_game_names(model_class):
     """获取不重复的游戏名称列表"""
     try:
-        records = model_class.find_all("game_name IS NOT NULL")
+        records = model_class.find_all("game_name IS NOT NULL", columns=('game_name',))
         game_names = list(set([record.game_name for record in records if record.game_name]))
         game_names.sort()
         # 将 Counter-Strike 2 排在第一位
@@ -25,20 +26,11 @@ def get_distinct_game_names(model_class):
         print(f"获取游戏名称失败: {e}")
         return []
 
-def calculate_stats(records):
-    """计算统计数据"""
-    if not records:
-        return {
-            "total_count": 0,
-            "total_amount": 0,
-            "avg_price": 0,
-            "completed_count": 0,
-            "cancelled_count": 0,
-            "pending_count": 0
-        }
-    
-    total_count = len(records)
-    total_amount = sum([record.price for record in records if record.price])
+def calculate_stats(model_class, where="", params=()):
+    """计算统计数据（在数据库中聚合，不加载记录）"""
+    result = model_class.aggregate(where, params, count=True, sum='price')
+    total_count = result['count']
+    total_amount = result['sum_price']
     avg_price = total_amount / total_count if total_count > 0 else 0
     
     return {
@@ -50,6 +42,10 @@ def calculate_stats(records):
         "pending_count": 0
     }
 
+# record_to_array 用到的列，列表接口只查询这些列
+ARRAY_COLUMNS = ('ID', 'item_name', 'weapon_name', 'weapon_type', 'weapon_float',
+                 'float_range', 'price', 'trade_date', 'game_name')
+
 def record_to_array(record):
     """将记录转换为数组格式"""
     return [
@@ -82,16 +78,35 @@ def countSteamBuyNumber():
 
 @webSteamMarketV1.route('/getSteamBuyData/<int:min>/<int:max>', methods=['GET'])
 def getSteamBuyData(min, max):
-    """获取Steam购买数据（分页）"""
+    """
+    获取Steam购买数据（分页）
+    
+    带 ?cursor= 参数时使用游标分页（第一页传空值）：max 为每页条数，min 被忽略，
+    返回 {"data": [...], "next_cursor": "..."}，next_cursor 为 null 表示没有下一页
+    """
     try:
+        if 'cursor' in request.args:
+            records = SteamBuyModel.find_all(
+                limit=max,
+                order_by='trade_date',
+                descending=True,
+                cursor=request.args.get('cursor') or None,
+                columns=ARRAY_COLUMNS
+            )
+            data = [record_to_array(record) for record in records]
+            return jsonify({"data": data, "next_cursor": records.next_cursor}), 200
+        
         records = SteamBuyModel.find_all(
             "1=1 ORDER BY trade_date DESC",
             (),
             limit=max,
-            offset=min
+            offset=min,
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"查询Steam购买数据失败: {e}")
         return jsonify([]), 500
@@ -100,9 +115,11 @@ def getSteamBuyData(min, max):
 def selectSteamBuyWeaponName(itemName):
     """根据武器名称搜索Steam购买记录"""
     try:
+        condition, params = search_condition('steam_buy', itemName)
         records = SteamBuyModel.find_all(
-            "item_name LIKE ? OR weapon_name LIKE ? ORDER BY trade_date DESC",
-            (f"%{itemName}%", f"%{itemName}%")
+            f"{condition} ORDER BY trade_date DESC",
+            tuple(params),
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -118,7 +135,8 @@ def getSteamBuyDataByGameName(gameName, min, max):
             "game_name = ? ORDER BY trade_date DESC",
             (gameName,),
             limit=max,
-            offset=min
+            offset=min,
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -135,7 +153,8 @@ def getSteamBuyDataByStatus(status, min, max):
                 "1=1 ORDER BY trade_date DESC",
                 (),
                 limit=max,
-                offset=min
+                offset=min,
+                columns=ARRAY_COLUMNS
             )
             data = [record_to_array(record) for record in records]
             return jsonify(data), 200
@@ -150,8 +169,7 @@ def getSteamBuyDataByStatus(status, min, max):
 def getSteamBuyStats():
     """获取Steam购买统计数据"""
     try:
-        records = SteamBuyModel.find_all()
-        stats = calculate_stats(records)
+        stats = calculate_stats(SteamBuyModel)
         return jsonify(stats), 200
     except Exception as e:
         print(f"获取Steam购买统计失败: {e}")
@@ -168,11 +186,8 @@ def getSteamBuyStats():
 def getSteamBuyStatsBySearch(itemName):
     """根据搜索关键词获取Steam购买统计"""
     try:
-        records = SteamBuyModel.find_all(
-            "item_name LIKE ? OR weapon_name LIKE ?",
-            (f"%{itemName}%", f"%{itemName}%")
-        )
-        stats = calculate_stats(records)
+        condition, params = search_condition('steam_buy', itemName)
+        stats = calculate_stats(SteamBuyModel, condition, tuple(params))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据搜索获取Steam购买统计失败: {e}")
@@ -189,8 +204,7 @@ def getSteamBuyStatsBySearch(itemName):
 def getSteamBuyStatsByGameName(gameName):
     """根据游戏名称获取Steam购买统计"""
     try:
-        records = SteamBuyModel.find_all("game_name = ?", (gameName,))
-        stats = calculate_stats(records)
+        stats = calculate_stats(SteamBuyModel, "game_name = ?", (gameName,))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据游戏名称获取Steam购买统计失败: {e}")
@@ -208,8 +222,7 @@ def getSteamBuyStatsByStatus(status):
     """根据状态获取Steam购买统计"""
     try:
         if status == 'all' or status == '已完成':
-            records = SteamBuyModel.find_all()
-            stats = calculate_stats(records)
+            stats = calculate_stats(SteamBuyModel)
             return jsonify(stats), 200
         else:
             # 其他状态返回0统计
@@ -236,9 +249,11 @@ def getSteamBuyStatsByStatus(status):
 def searchSteamBuyByTimeRange(startDate, endDate):
     """根据时间范围搜索Steam购买记录"""
     try:
+        condition, params = SteamBuyModel.time_range('trade_date', startDate, endDate)
         records = SteamBuyModel.find_all(
-            "DATE(trade_date) BETWEEN ? AND ? ORDER BY trade_date DESC",
-            (startDate, endDate)
+            f"{condition} ORDER BY trade_date DESC",
+            tuple(params),
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -250,11 +265,8 @@ def searchSteamBuyByTimeRange(startDate, endDate):
 def getSteamBuyStatsByTimeRange(startDate, endDate):
     """根据时间范围获取Steam购买统计"""
     try:
-        records = SteamBuyModel.find_all(
-            "DATE(trade_date) BETWEEN ? AND ?",
-            (startDate, endDate)
-        )
-        stats = calculate_stats(records)
+        condition, params = SteamBuyModel.time_range('trade_date', startDate, endDate)
+        stats = calculate_stats(SteamBuyModel, condition, tuple(params))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据时间范围获取Steam购买统计失败: {e}")
@@ -297,7 +309,8 @@ def getSteamSellData(min, max):
             "1=1 ORDER BY trade_date DESC",
             (),
             limit=max,
-            offset=min
+            offset=min,
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -309,9 +322,11 @@ def getSteamSellData(min, max):
 def selectSteamSellWeaponName(itemName):
     """根据武器名称搜索Steam销售记录"""
     try:
+        condition, params = search_condition('steam_sell', itemName)
         records = SteamSellModel.find_all(
-            "item_name LIKE ? OR weapon_name LIKE ? ORDER BY trade_date DESC",
-            (f"%{itemName}%", f"%{itemName}%")
+            f"{condition} ORDER BY trade_date DESC",
+            tuple(params),
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -327,7 +342,8 @@ def getSteamSellDataByGameName(gameName, min, max):
             "game_name = ? ORDER BY trade_date DESC",
             (gameName,),
             limit=max,
-            offset=min
+            offset=min,
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -344,7 +360,8 @@ def getSteamSellDataByStatus(status, min, max):
                 "1=1 ORDER BY trade_date DESC",
                 (),
                 limit=max,
-                offset=min
+                offset=min,
+                columns=ARRAY_COLUMNS
             )
             data = [record_to_array(record) for record in records]
             return jsonify(data), 200
@@ -359,8 +376,7 @@ def getSteamSellDataByStatus(status, min, max):
 def getSteamSellStats():
     """获取Steam销售统计数据"""
     try:
-        records = SteamSellModel.find_all()
-        stats = calculate_stats(records)
+        stats = calculate_stats(SteamSellModel)
         return jsonify(stats), 200
     except Exception as e:
         print(f"获取Steam销售统计失败: {e}")
@@ -377,11 +393,8 @@ def getSteamSellStats():
 def getSteamSellStatsBySearch(itemName):
     """根据搜索关键词获取Steam销售统计"""
     try:
-        records = SteamSellModel.find_all(
-            "item_name LIKE ? OR weapon_name LIKE ?",
-            (f"%{itemName}%", f"%{itemName}%")
-        )
-        stats = calculate_stats(records)
+        condition, params = search_condition('steam_sell', itemName)
+        stats = calculate_stats(SteamSellModel, condition, tuple(params))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据搜索获取Steam销售统计失败: {e}")
@@ -398,8 +411,7 @@ def getSteamSellStatsBySearch(itemName):
 def getSteamSellStatsByGameName(gameName):
     """根据游戏名称获取Steam销售统计"""
     try:
-        records = SteamSellModel.find_all("game_name = ?", (gameName,))
-        stats = calculate_stats(records)
+        stats = calculate_stats(SteamSellModel, "game_name = ?", (gameName,))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据游戏名称获取Steam销售统计失败: {e}")
@@ -417,8 +429,7 @@ def getSteamSellStatsByStatus(status):
     """根据状态获取Steam销售统计"""
     try:
         if status == 'all' or status == '已完成':
-            records = SteamSellModel.find_all()
-            stats = calculate_stats(records)
+            stats = calculate_stats(SteamSellModel)
             return jsonify(stats), 200
         else:
             # 其他状态返回0统计
@@ -445,9 +456,11 @@ def getSteamSellStatsByStatus(status):
 def searchSteamSellByTimeRange(startDate, endDate):
     """根据时间范围搜索Steam销售记录"""
     try:
+        condition, params = SteamSellModel.time_range('trade_date', startDate, endDate)
         records = SteamSellModel.find_all(
-            "DATE(trade_date) BETWEEN ? AND ? ORDER BY trade_date DESC",
-            (startDate, endDate)
+            f"{condition} ORDER BY trade_date DESC",
+            tuple(params),
+            columns=ARRAY_COLUMNS
         )
         data = [record_to_array(record) for record in records]
         return jsonify(data), 200
@@ -459,11 +472,8 @@ def searchSteamSellByTimeRange(startDate, endDate):
 def getSteamSellStatsByTimeRange(startDate, endDate):
     """根据时间范围获取Steam销售统计"""
     try:
-        records = SteamSellModel.find_all(
-            "DATE(trade_date) BETWEEN ? AND ?",
-            (startDate, endDate)
-        )
-        stats = calculate_stats(records)
+        condition, params = SteamSellModel.time_range('trade_date', startDate, endDate)
+        stats = calculate_stats(SteamSellModel, condition, tuple(params))
         return jsonify(stats), 200
     except Exception as e:
         print(f"根据时间范围获取Steam销售统计失败: {e}")
@@ -483,15 +493,15 @@ def getSteamMarketStats():
     """获取Steam市场综合统计数据（购买+销售）"""
     try:
         # 获取购买统计
-        buy_records = SteamBuyModel.find_all()
-        buy_count = len(buy_records)
-        buy_total = sum([record.price for record in buy_records if record.price])
+        buy_result = SteamBuyModel.aggregate(count=True, sum='price')
+        buy_count = buy_result['count']
+        buy_total = buy_result['sum_price']
         buy_avg = buy_total / buy_count if buy_count > 0 else 0
         
         # 获取销售统计
-        sell_records = SteamSellModel.find_all()
-        sell_count = len(sell_records)
-        sell_total = sum([record.price for record in sell_records if record.price])
+        sell_result = SteamSellModel.aggregate(count=True, sum='price')
+        sell_count = sell_result['count']
+        sell_total = sell_result['sum_price']
         sell_avg = sell_total / sell_count if sell_count > 0 else 0
         
         # 计算净收益
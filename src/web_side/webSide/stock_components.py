@@ -1,5 +1,10 @@
 from flask import jsonify, request, Blueprint
 from src.db_manager.database import DatabaseManager
+from src.db_manager.pagination import keyset_fetch
+from src.db_manager.prices import price_or_none, price_sql
+from src.db_manager.steam.steam_stock_components import SteamStockComponentsModel
+from src.db_manager.versions import data_versions
+from src.web_side.conditional import versioned
 import traceback
 
 webStockComponentsV1 = Blueprint('webStockComponentsV1', __name__)
@@ -47,6 +52,7 @@ def get_steam_ids():
 
 
 @webStockComponentsV1.route('/components/<steam_id>', methods=['GET'])
+@versioned(SteamStockComponentsModel.get_table_name())
 def get_components(steam_id):
     """获取指定用户的库存组件列表 - 从 steam_stockComponents 表读取"""
     try:
@@ -56,6 +62,9 @@ def get_components(steam_id):
         weapon_level = request.args.get('weapon_level', '')  # 武器等级筛选
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 20, type=int)
+        # 带 cursor 参数时使用游标分页（第一页传空值），忽略 page
+        cursor_mode = 'cursor' in request.args
+        cursor = request.args.get('cursor') or None
         
         # 计算偏移量
         offset = (page - 1) * page_size
@@ -84,32 +93,31 @@ def get_components(steam_id):
         where_clause = " AND ".join(where_conditions)
         
         # 查询数据 - 查询所有字段
-        sql = f"""
-        SELECT 
+        columns = """
             assetid, instanceid, classid, item_name, weapon_name, 
             float_range, weapon_type, weapon_float, weapon_level, data_user, 
             buy_price, yyyp_price, buff_price, order_time, steam_price
-        FROM steam_stockComponents
-        WHERE {where_clause}
-        ORDER BY order_time DESC
-        LIMIT ? OFFSET ?
         """
-        params.extend([page_size, offset])
-        results = db.execute_query(sql, tuple(params))
+        next_cursor = None
+        if cursor_mode:
+            results, next_cursor = keyset_fetch(
+                db, columns, 'steam_stockComponents', where_clause, params,
+                'order_time', descending=True, cursor=cursor, limit=page_size
+            )
+        else:
+            sql = f"""
+            SELECT {columns}
+            FROM steam_stockComponents
+            WHERE {where_clause}
+            ORDER BY order_time DESC
+            LIMIT ? OFFSET ?
+            """
+            results = db.execute_query(sql, tuple(params) + (page_size, offset))
         
         # 转换为字典列表
         components = []
         if results:
             for row in results:
-                # 安全的浮点数转换函数
-                def safe_float(value, default=0.0):
-                    if value is None or value == '':
-                        return default
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-                
                 component = {
                     # 基本信息
                     'component_id': row[0],  # assetid - 用于操作
@@ -121,10 +129,10 @@ def get_components(steam_id):
                     'weapon_level': row[8],  # 武器等级
                     
                     # 价格信息
-                    'buy_price': safe_float(row[10]),  # 购入价格
-                    'yyyp_price': safe_float(row[11]),  # 悠悠价格
-                    'buff_price': safe_float(row[12]),  # BUFF价格
-                    'steam_price': safe_float(row[14]),  # Steam价格
+                    'buy_price': price_or_none(row[10]) or 0.0,  # 购入价格
+                    'yyyp_price': price_or_none(row[11]) or 0.0,  # 悠悠价格
+                    'buff_price': price_or_none(row[12]) or 0.0,  # BUFF价格
+                    'steam_price': price_or_none(row[14]) or 0.0,  # Steam价格
                     
                     # 时间信息
                     'order_time': row[13],  # 入库时间
@@ -134,8 +142,8 @@ def get_components(steam_id):
                     'component_type': row[6],
                     'quality': row[8],
                     'quantity': row[7],  # weapon_float 作为数量
-                    'unit_cost': safe_float(row[10]),
-                    'total_cost': safe_float(row[10]),
+                    'unit_cost': price_or_none(row[10]) or 0.0,
+                    'total_cost': price_or_none(row[10]) or 0.0,
                     'source': '库存',
                     'purchase_date': row[13],
                     'status': '库存中',
@@ -143,20 +151,27 @@ def get_components(steam_id):
                 }
                 components.append(component)
         
-        # 获取总数
-        count_params = params[:-2]  # 去掉limit和offset参数
-        count_sql = f"SELECT COUNT(*) FROM steam_stockComponents WHERE {where_clause}"
-        count_result = db.execute_query(count_sql, tuple(count_params))
-        total = count_result[0][0] if count_result else 0
+        # 获取总数（游标分页只在第一页统计）
+        total = None
+        if not (cursor_mode and cursor):
+            count_sql = f"SELECT COUNT(*) FROM steam_stockComponents WHERE {where_clause}"
+            count_result = db.execute_query(count_sql, tuple(params))
+            total = count_result[0][0] if count_result else 0
         
         return jsonify({
             'success': True,
             'data': components,
             'total': total,
             'page': page,
-            'page_size': page_size
+            'page_size': page_size,
+            'next_cursor': next_cursor
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         print(f"查询库存组件失败: {e}")
         import traceback
@@ -173,14 +188,14 @@ def get_components_stats(steam_id):
     try:
         db = DatabaseManager()
         
-        # 统计总数和各种价格总和
+        # 统计总数和各种价格总和（残留的文本价格经 price_sql 转换，无法解析的不计入）
         stats_sql = f"""
         SELECT 
             COUNT(*) as total_count,
-            SUM(CAST(buy_price AS REAL)) as total_buy_price,
-            SUM(CAST(yyyp_price AS REAL)) as total_yyyp_price,
-            SUM(CAST(buff_price AS REAL)) as total_buff_price,
-            SUM(CAST(steam_price AS REAL)) as total_steam_price
+            SUM({price_sql('buy_price')}) as total_buy_price,
+            SUM({price_sql('yyyp_price')}) as total_yyyp_price,
+            SUM({price_sql('buff_price')}) as total_buff_price,
+            SUM({price_sql('steam_price')}) as total_steam_price
         FROM steam_stockComponents
         WHERE data_user = ?
         """
@@ -225,6 +240,7 @@ def get_components_by_time_range(steam_id, start_date, end_date):
     """按时间范围搜索库存组件 - 从 steam_stockComponents 表读取"""
     try:
         db = DatabaseManager()
+        condition, params = SteamStockComponentsModel.time_range('order_time', start_date, end_date)
         
         sql = f"""
         SELECT 
@@ -233,24 +249,16 @@ def get_components_by_time_range(steam_id, start_date, end_date):
             buy_price, yyyp_price, buff_price, order_time, steam_price
         FROM steam_stockComponents
         WHERE data_user = ? 
-            AND DATE(order_time) BETWEEN ? AND ?
+            AND {condition}
         ORDER BY order_time DESC
         """
         
-        results = db.execute_query(sql, (steam_id, start_date, end_date))
+        results = db.execute_query(sql, (steam_id, *params))
         
         # 转换为字典列表
         components = []
         if results:
             for row in results:
-                def safe_float(value, default=0.0):
-                    if value is None or value == '':
-                        return default
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-                
                 component = {
                     'component_id': row[0],
                     'item_name': row[3],
@@ -259,17 +267,17 @@ def get_components_by_time_range(steam_id, start_date, end_date):
                     'weapon_type': row[6],
                     'weapon_float': row[7],
                     'weapon_level': row[8],
-                    'buy_price': safe_float(row[10]),
-                    'yyyp_price': safe_float(row[11]),
-                    'buff_price': safe_float(row[12]),
-                    'steam_price': safe_float(row[14]),
+                    'buy_price': price_or_none(row[10]) or 0.0,
+                    'yyyp_price': price_or_none(row[11]) or 0.0,
+                    'buff_price': price_or_none(row[12]) or 0.0,
+                    'steam_price': price_or_none(row[14]) or 0.0,
                     'order_time': row[13],
                     'component_name': row[3],
                     'component_type': row[6],
                     'quality': row[8],
                     'quantity': row[7],
-                    'unit_cost': safe_float(row[10]),
-                    'total_cost': safe_float(row[10]),
+                    'unit_cost': price_or_none(row[10]) or 0.0,
+                    'total_cost': price_or_none(row[10]) or 0.0,
                     'source': '库存',
                     'purchase_date': row[13],
                     'status': '库存中',
@@ -362,14 +370,6 @@ def get_component_detail(component_id):
         
         row = results[0]
         
-        def safe_float(value, default=0.0):
-            if value is None or value == '':
-                return default
-            try:
-                return float(value)
-            except (ValueError, TypeError):
-                return default
-        
         component_detail = {
             'component_id': row[0],
             'item_name': row[3],
@@ -378,10 +378,10 @@ def get_component_detail(component_id):
             'weapon_type': row[6],
             'weapon_float': row[7],
             'weapon_level': row[8],
-            'buy_price': safe_float(row[10]),
-            'yyyp_price': safe_float(row[11]),
-            'buff_price': safe_float(row[12]),
-            'steam_price': safe_float(row[14]),
+            'buy_price': price_or_none(row[10]) or 0.0,
+            'yyyp_price': price_or_none(row[11]) or 0.0,
+            'buff_price': price_or_none(row[12]) or 0.0,
+            'steam_price': price_or_none(row[14]) or 0.0,
             'order_time': row[13],
             # 兼容旧字段
             'assetid': row[0],
@@ -391,8 +391,8 @@ def get_component_detail(component_id):
             'component_type': row[6],
             'quality': row[8],
             'quantity': row[7],
-            'unit_cost': safe_float(row[10]),
-            'total_cost': safe_float(row[10]),
+            'unit_cost': price_or_none(row[10]) or 0.0,
+            'total_cost': price_or_none(row[10]) or 0.0,
             'source': '库存',
             'purchase_date': row[13],
             'status': '库存中',
@@ -481,7 +481,8 @@ def update_buy_price(steam_id, assetid):
         WHERE assetid = ? AND data_user = ?
         """
         
-        db.execute_update(update_sql, (str(buy_price), assetid, steam_id))
+        db.execute_update(update_sql, (price_float, assetid, steam_id))
+        data_versions.bump(SteamStockComponentsModel.get_table_name(), steam_id)
         
         print(f"✅ 价格更新成功 - assetid: {assetid}, steam_id: {steam_id}, buy_price: {buy_price}")
         
@@ -571,11 +572,11 @@ def auto_fill_prices(steam_id):
             
             buy_price = None
             if price_result and price_result[0][0] is not None:
-                buy_price = price_result[0][0]
+                buy_price = price_or_none(price_result[0][0])
             else:
                 # 如果没有找到该用户的购买记录，查询平均价格
-                avg_price_sql = """
-                SELECT AVG(CAST(price AS REAL))
+                avg_price_sql = f"""
+                SELECT AVG({price_sql('price')})
                 FROM yyyp_buy
                 WHERE item_name = ?
                 """
@@ -590,7 +591,7 @@ def auto_fill_prices(steam_id):
                 SET buy_price = ?
                 WHERE assetid = ? AND data_user = ?
                 """
-                affected_rows = db.execute_update(update_sql, (str(buy_price), assetid, steam_id))
+                affected_rows = db.execute_update(update_sql, (buy_price, assetid, steam_id))
                 if affected_rows > 0:
                     filled_count += 1
                     print(f"✅ 自动填充价格成功 - assetid: {assetid}, item_name: {item_name}, price: {buy_price}")
@@ -600,6 +601,9 @@ def auto_fill_prices(steam_id):
                 not_found_count += 1
                 print(f"⚠️  未找到价格 - assetid: {assetid}, item_name: {item_name}")
         
+        if filled_count:
+            data_versions.bump(SteamStockComponentsModel.get_table_name(), steam_id)
+        
         print(f"📊 自动填充价格完成 - steamId: {steam_id}, 总数: {total_count}, 成功填充: {filled_count}, 已有价格: {already_filled_count}, 未找到: {not_found_count}")
         
         return jsonify({
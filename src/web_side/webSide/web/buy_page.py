@@ -1,17 +1,37 @@
 from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.execution_db import Date_base
+from src.db_manager.search import search_condition
 from src.now_time import today
 from src.db_manager.index.buy import BuyModel
+from src.db_manager.index.daily_rollup import BuyDailyRollupModel, average, combine
 import requests
 
 webBuyV1 = Blueprint('webBuyV1', __name__)
 
+# 列表接口返回的列
+LIST_COLUMNS = ('ID', 'item_name', 'weapon_name', 'weapon_type', 'weapon_float', 'float_range',
+                'price', 'from', 'order_time', 'status', 'status_sub')
+
+
+def _stats_response(groups):
+    """统计卡片：总数、未取消记录的金额与均价、各状态数量（groups 为日汇总按状态的合计）"""
+    totals = combine(groups)
+    # 与 status != '已取消' 一致：状态为空的记录不计入金额
+    valid = combine(groups, exclude=('已取消', ''))
+    return jsonify({
+        "total_count": totals['record_count'],
+        "total_amount": round(float(valid['price_sum']), 2),
+        "avg_price": round(float(average(valid['price_sum'], valid['price_count'])), 2),
+        "completed_count": groups.get('已完成', {}).get('record_count', 0),
+        "cancelled_count": groups.get('已取消', {}).get('record_count', 0),
+        "pending_count": groups.get('待收货', {}).get('record_count', 0)
+    }), 200
+
 @webBuyV1.route('/countBuyNumber', methods=['get'])
 def countBuyNumber():
     try:
-        records = BuyModel.find_all()
-        count = len(records)
+        count = BuyModel.count()
         return jsonify({"count": count}), 200
     except Exception as e:
         print(f"查询购买数量失败: {e}")
@@ -19,13 +39,32 @@ def countBuyNumber():
 
 @webBuyV1.route('/getBuyData/<int:min>/<int:max>', methods=['get'])
 def getNowBuyingList(min, max):
+    """
+    分页获取购买数据
+    
+    带 ?cursor= 参数时使用游标分页（第一页传空值）：max 为每页条数，min 被忽略，
+    返回 {"data": [...], "next_cursor": "..."}，next_cursor 为 null 表示没有下一页
+    """
     try:
-        records = BuyModel.find_all(
-            "1=1 ORDER BY order_time DESC", 
-            (), 
-            limit=max, 
-            offset=min
-        )
+        cursor_mode = 'cursor' in request.args
+        if cursor_mode:
+            records = BuyModel.find_all(
+                limit=max,
+                order_by='order_time',
+                descending=True,
+                cursor=request.args.get('cursor') or None,
+                columns=LIST_COLUMNS,
+                rowid_descending=False
+            )
+        else:
+            # 同一时间的记录按 rowid 升序，与未建 order_time 索引时的顺序一致，且与游标分页相同
+            records = BuyModel.find_all(
+                "1=1 ORDER BY order_time DESC, rowid ASC", 
+                (), 
+                limit=max, 
+                offset=min,
+                columns=LIST_COLUMNS
+            )
         data = []
         for record in records:
             data.append([
@@ -34,7 +73,11 @@ def getNowBuyingList(min, max):
                 record.price, getattr(record, 'from', ''), record.order_time, record.status,
                 record.status_sub
             ])
+        if cursor_mode:
+            return jsonify({"data": data, "next_cursor": records.next_cursor}), 200
         return jsonify(data), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"查询购买数据失败: {e}")
         return jsonify([]), 500
@@ -42,8 +85,9 @@ def getNowBuyingList(min, max):
 
 @webBuyV1.route('/selectBuyWeaponName/<itemName>', methods=['get'])
 def selectBuyWeaponName(itemName):
-    sql = f"SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status, status_sub FROM buy WHERE item_name LIKE '%{itemName}%' OR weapon_name LIKE '%{itemName}%';"
-    result = Date_base().select(sql)
+    condition, params = search_condition('buy', itemName)
+    sql = f"SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status, status_sub FROM buy WHERE {condition};"
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -65,115 +109,53 @@ def getBuyDataByStatus(status, min, max):
 
 @webBuyV1.route('/getBuyStats', methods=['get'])
 def getBuyStats():
-    sql = """
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM buy
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(BuyDailyRollupModel.summarize())
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webBuyV1.route('/getBuyTotalStats', methods=['POST'])
 def getBuyTotalStats():
-    sql = """
-    SELECT COUNT(*) as total_count, COALESCE(SUM(price), 0) as total_amount
-    FROM buy
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify([stats[0], round(float(stats[1]), 2)]), 200
-    return jsonify([0, 0]), 500
+    try:
+        totals = combine(BuyDailyRollupModel.summarize())
+        return jsonify([totals['record_count'], round(float(totals['price_sum']), 2)]), 200
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return jsonify([0, 0]), 500
 
 @webBuyV1.route('/getBuyStatsBySearch/<itemName>', methods=['GET'])
 def getBuyStatsBySearch(itemName):
-    search_pattern = f"%{itemName}%"
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM buy
-    WHERE item_name LIKE '{search_pattern}' OR weapon_name LIKE '{search_pattern}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    # 关键词无法用日汇总回答，直接在明细表上合计
+    condition, params = search_condition('buy', itemName)
+    try:
+        return _stats_response(BuyDailyRollupModel.summarize_source(condition, tuple(params)))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webBuyV1.route('/getBuyStatsByStatus/<status>', methods=['GET'])
 def getBuyStatsByStatus(status):
     if status == 'all':
         return getBuyStats()
     
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM buy
-    WHERE status = '{status}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(BuyDailyRollupModel.summarize("status = ?", (status,)))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webBuyV1.route('/getBuyDataByTimeRange/<start_date>/<end_date>/<int:min>/<int:max>', methods=['GET'])
 def getBuyDataByTimeRange(start_date, end_date, min, max):
+    condition, params = BuyModel.time_range('order_time', start_date, end_date)
     sql = f"""
     SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, `from`, order_time, status, status_sub 
     FROM buy 
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
-    ORDER BY order_time DESC 
+    WHERE {condition}
+    ORDER BY order_time DESC, rowid ASC
     LIMIT {max} OFFSET {min};
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -182,41 +164,22 @@ def getBuyDataByTimeRange(start_date, end_date, min, max):
 
 @webBuyV1.route('/getBuyStatsByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def getBuyStatsByTimeRange(start_date, end_date):
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM buy
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(BuyDailyRollupModel.summarize_range(start_date, end_date))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webBuyV1.route('/searchBuyByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def searchBuyByTimeRange(start_date, end_date):
+    condition, params = BuyModel.time_range('order_time', start_date, end_date)
     sql = f"""
     SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, `from`, order_time, status 
     FROM buy 
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
-    ORDER BY order_time DESC;
+    WHERE {condition}
+    ORDER BY order_time DESC, rowid ASC;
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -2,10 +2,27 @@ from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.execution_db import Date_base
 from src.now_time import today
+from src.db_manager.yyyp.yyyp_lent import YyypLentModel
+from src.db_manager.index.daily_rollup import YyypLentDailyRollupModel, average, combine
 import requests
 
 webLentV1 = Blueprint('webLentV1', __name__)
 
+
+def _stats_response(groups):
+    """统计卡片：总数、租金、均价、租期与各状态数量（groups 为日汇总按状态的合计）"""
+    totals = combine(groups)
+    return jsonify({
+        "total_count": totals['record_count'],
+        "total_amount": round(float(totals['amount_sum']), 2),
+        "avg_price": round(float(average(totals['price_sum'], totals['price_count'])), 2),
+        "total_lease_days": totals['days_sum'],
+        "avg_lease_days": round(float(average(totals['days_sum'], totals['days_count'])), 1),
+        "renting_count": groups.get('租赁中', {}).get('record_count', 0),
+        "completed_count": groups.get('已完成', {}).get('record_count', 0),
+        "cancelled_count": groups.get('已取消', {}).get('record_count', 0)
+    }), 200
+
 @webLentV1.route('/countLentNumber', methods=['get'])
 def countLentNumber():
     sql = "SELECT COUNT(*) FROM yyyp_lent"
@@ -51,45 +68,23 @@ def getLentDataByStatus(status, min, max):
 
 @webLentV1.route('/getLentStats', methods=['get'])
 def getLentStats():
-    sql = """
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(price * total_Lease_Days), 0) as total_amount,
-        COALESCE(AVG(price), 0) as avg_price,
-        COALESCE(SUM(total_Lease_Days), 0) as total_lease_days,
-        COALESCE(AVG(total_Lease_Days), 0) as avg_lease_days,
-        COUNT(CASE WHEN status = '租赁中' THEN 1 END) as renting_count,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count
-    FROM yyyp_lent
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "total_lease_days": stats[3],
-                "avg_lease_days": round(float(stats[4]), 1),
-                "renting_count": stats[5],
-                "completed_count": stats[6],
-                "cancelled_count": stats[7]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(YyypLentDailyRollupModel.summarize())
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webLentV1.route('/getLentDataByTimeRange/<start_date>/<end_date>/<int:min>/<int:max>', methods=['GET'])
 def getLentDataByTimeRange(start_date, end_date, min, max):
+    condition, params = YyypLentModel.time_range('lean_start_time', start_date, end_date)
     sql = f"""
     SELECT ID, weapon_name, weapon_type, item_name, weapon_float, float_range, price, lenter_name, status, last_status, \"from\", lean_start_time, lean_end_time, total_Lease_Days, max_Lease_Days 
     FROM yyyp_lent 
-    WHERE DATE(lean_start_time) >= '{start_date}' AND DATE(lean_start_time) <= '{end_date}'
+    WHERE {condition}
     ORDER BY lean_start_time DESC 
     LIMIT {max} OFFSET {min};
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -98,45 +93,22 @@ def getLentDataByTimeRange(start_date, end_date, min, max):
 
 @webLentV1.route('/getLentStatsByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def getLentStatsByTimeRange(start_date, end_date):
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(price * total_Lease_Days), 0) as total_amount,
-        COALESCE(AVG(price), 0) as avg_price,
-        COALESCE(SUM(total_Lease_Days), 0) as total_lease_days,
-        COALESCE(AVG(total_Lease_Days), 0) as avg_lease_days,
-        COUNT(CASE WHEN status = '租赁中' THEN 1 END) as renting_count,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count
-    FROM yyyp_lent
-    WHERE DATE(lean_start_time) >= '{start_date}' AND DATE(lean_start_time) <= '{end_date}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "total_lease_days": stats[3],
-                "avg_lease_days": round(float(stats[4]), 1),
-                "renting_count": stats[5],
-                "completed_count": stats[6],
-                "cancelled_count": stats[7]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(YyypLentDailyRollupModel.summarize_range(start_date, end_date))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webLentV1.route('/searchLentByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def searchLentByTimeRange(start_date, end_date):
+    condition, params = YyypLentModel.time_range('lean_start_time', start_date, end_date)
     sql = f"""
     SELECT ID, weapon_name, weapon_type, item_name, weapon_float, float_range, price, lenter_name, status, last_status, \"from\", lean_start_time, lean_end_time, total_Lease_Days, max_Lease_Days 
     FROM yyyp_lent 
-    WHERE DATE(lean_start_time) >= '{start_date}' AND DATE(lean_start_time) <= '{end_date}'
+    WHERE {condition}
     ORDER BY lean_start_time DESC;
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.db_manager.index.weapon_classID import WeaponClassIDModel
+from src.db_manager.index.weapon_catalog import weapon_catalog
 
 webSelectWeaponV1 = Blueprint('webSelectWeaponV1', __name__)
 
@@ -8,7 +9,7 @@ def searchWeapon():
     """
     根据market_listing_item_name模糊搜索武器（用于自动完成下拉框）
     参数: keyword - 搜索关键词
-    返回: 匹配的武器名称列表（仅market_listing_item_name字段，限制20条）
+    返回: 匹配的武器名称列表（仅market_listing_item_name字段，去重，限制20条）
     """
     try:
         keyword = request.args.get('keyword', '')
@@ -19,25 +20,8 @@ def searchWeapon():
                 "data": []
             }), 200
         
-        # 使用LIKE进行模糊查询
-        where_clause = "[market_listing_item_name] LIKE ?"
-        params = (f"%{keyword}%",)
-        
-        # 查询数据库，限制返回20条用于下拉建议
-        records = WeaponClassIDModel.find_all(
-            where=where_clause, 
-            params=params,
-            limit=20
-        )
-        
-        # 提取market_listing_item_name字段
-        results = []
-        seen = set()  # 下拉框去重，避免重复显示
-        for record in records:
-            name = record.market_listing_item_name
-            if name and name not in seen:
-                results.append(name)
-                seen.add(name)
+        # 使用内存中的名称目录（n-gram 索引）匹配，不查询数据库；前缀匹配优先，其次名称较短的优先
+        results = weapon_catalog.search(keyword, limit=20)
         
         return jsonify({
             "success": True,
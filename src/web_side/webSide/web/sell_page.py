@@ -1,17 +1,37 @@
 from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.execution_db import Date_base
+from src.db_manager.search import search_condition
 from src.now_time import today
 from src.db_manager.index.sell import SellModel
+from src.db_manager.index.daily_rollup import SellDailyRollupModel, average, combine
 import requests
 
 webSellV1 = Blueprint('webSellV1', __name__)
 
+# 列表接口返回的列
+LIST_COLUMNS = ('ID', 'item_name', 'weapon_name', 'weapon_type', 'weapon_float', 'float_range',
+                'price', 'from', 'order_time', 'status', 'status_sub')
+
+
+def _stats_response(groups):
+    """统计卡片：总数、未取消记录的金额与均价、各状态数量（groups 为日汇总按状态的合计）"""
+    totals = combine(groups)
+    # 与 status != '已取消' 一致：状态为空的记录不计入金额
+    valid = combine(groups, exclude=('已取消', ''))
+    return jsonify({
+        "total_count": totals['record_count'],
+        "total_amount": round(float(valid['price_sum']), 2),
+        "avg_price": round(float(average(valid['price_sum'], valid['price_count'])), 2),
+        "completed_count": groups.get('已完成', {}).get('record_count', 0),
+        "cancelled_count": groups.get('已取消', {}).get('record_count', 0),
+        "pending_count": groups.get('待收货', {}).get('record_count', 0)
+    }), 200
+
 @webSellV1.route('/countSellNumber', methods=['get'])
 def countSellNumber():
     try:
-        records = SellModel.find_all()
-        count = len(records)
+        count = SellModel.count()
         return jsonify({"count": count}), 200
     except Exception as e:
         print(f"查询销售数量失败: {e}")
@@ -24,7 +44,8 @@ def getSellData(min, max):
             "1=1 ORDER BY order_time DESC", 
             (), 
             limit=max, 
-            offset=min
+            offset=min,
+            columns=LIST_COLUMNS
         )
         data = []
         for record in records:
@@ -42,8 +63,9 @@ def getSellData(min, max):
 
 @webSellV1.route('/selectSellWeaponName/<itemName>', methods=['get'])
 def selectSellWeaponName(itemName):
-    sql = f"SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status, status_sub FROM sell WHERE item_name LIKE '%{itemName}%' OR weapon_name LIKE '%{itemName}%';"
-    result = Date_base().select(sql)
+    condition, params = search_condition('sell', itemName)
+    sql = f"SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status, status_sub FROM sell WHERE {condition};"
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -65,101 +87,44 @@ def getSellDataByStatus(status, min, max):
 
 @webSellV1.route('/getSellStats', methods=['get'])
 def getSellStats():
-    sql = """
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM sell
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(SellDailyRollupModel.summarize())
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webSellV1.route('/getSellStatsBySearch/<itemName>', methods=['GET'])
 def getSellStatsBySearch(itemName):
-    search_pattern = f"%{itemName}%"
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM sell
-    WHERE item_name LIKE '{search_pattern}' OR weapon_name LIKE '{search_pattern}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    # 关键词无法用日汇总回答，直接在明细表上合计
+    condition, params = search_condition('sell', itemName)
+    try:
+        return _stats_response(SellDailyRollupModel.summarize_source(condition, tuple(params)))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webSellV1.route('/getSellStatsByStatus/<status>', methods=['GET'])
 def getSellStatsByStatus(status):
     if status == 'all':
         return getSellStats()
     
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM sell
-    WHERE status = '{status}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(SellDailyRollupModel.summarize("status = ?", (status,)))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webSellV1.route('/getSellDataByTimeRange/<start_date>/<end_date>/<int:min>/<int:max>', methods=['GET'])
 def getSellDataByTimeRange(start_date, end_date, min, max):
+    condition, params = SellModel.time_range('order_time', start_date, end_date)
     sql = f"""
     SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status 
     FROM sell 
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
+    WHERE {condition}
     ORDER BY order_time DESC 
     LIMIT {max} OFFSET {min};
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
@@ -168,41 +133,22 @@ def getSellDataByTimeRange(start_date, end_date, min, max):
 
 @webSellV1.route('/getSellStatsByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def getSellStatsByTimeRange(start_date, end_date):
-    sql = f"""
-    SELECT 
-        COUNT(*) as total_count,
-        COALESCE(SUM(CASE WHEN status != '已取消' THEN price ELSE 0 END), 0) as total_amount,
-        COALESCE(AVG(CASE WHEN status != '已取消' THEN price ELSE NULL END), 0) as avg_price,
-        COUNT(CASE WHEN status = '已完成' THEN 1 END) as completed_count,
-        COUNT(CASE WHEN status = '已取消' THEN 1 END) as cancelled_count,
-        COUNT(CASE WHEN status = '待收货' THEN 1 END) as pending_count
-    FROM sell
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
-    """
-    result = Date_base().select(sql)
-    if result and len(result) == 2:
-        flag, data = result
-        if flag and len(data) > 0:
-            stats = data[0]
-            return jsonify({
-                "total_count": stats[0],
-                "total_amount": round(float(stats[1]), 2),
-                "avg_price": round(float(stats[2]), 2),
-                "completed_count": stats[3],
-                "cancelled_count": stats[4],
-                "pending_count": stats[5]
-            }), 200
-    return "查询失败", 500
+    try:
+        return _stats_response(SellDailyRollupModel.summarize_range(start_date, end_date))
+    except Exception as e:
+        print(f"查询统计数据失败: {e}")
+        return "查询失败", 500
 
 @webSellV1.route('/searchSellByTimeRange/<start_date>/<end_date>', methods=['GET'])
 def searchSellByTimeRange(start_date, end_date):
+    condition, params = SellModel.time_range('order_time', start_date, end_date)
     sql = f"""
     SELECT ID, item_name, weapon_name, weapon_type, weapon_float, float_range, price, \"from\", order_time, status 
     FROM sell 
-    WHERE DATE(order_time) >= '{start_date}' AND DATE(order_time) <= '{end_date}'
+    WHERE {condition}
     ORDER BY order_time DESC;
     """
-    result = Date_base().select(sql)
+    result = Date_base().select(sql, tuple(params))
     if result and len(result) == 2:
         flag, data = result
         if flag:
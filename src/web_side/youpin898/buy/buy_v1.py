@@ -1,5 +1,6 @@
 from flask import jsonify, request, Blueprint
 from src.execution_db import Date_base
+from src.db_manager.database import DatabaseManager, TransactionRollback
 from src.db_manager.yyyp.yyyp_buy import YyypBuyModel
 from src.db_manager.index.buy import BuyModel
 
@@ -10,7 +11,8 @@ def getWeaponNotEndStatusList(data_user):
     try:
         records = YyypBuyModel.find_all(
             "status NOT IN ('已完成', '已取消') AND data_user = ?", 
-            (data_user,)
+            (data_user,),
+            columns=('ID',)
         )
         data = [[record.ID] for record in records]
         return jsonify(data), 200
@@ -30,7 +32,8 @@ def selectApexTime(data_user=None):
         records = YyypBuyModel.find_all(
             "data_user = ? ORDER BY order_time DESC",
             (data_user,),
-            limit=1
+            limit=1,
+            columns=('order_time',)
         )
         if records:
             data = str(records[0].order_time)
@@ -46,7 +49,8 @@ def selectNotEndID(data_user):
     try:
         records = YyypBuyModel.find_all(
             "status <> '已完成' AND status <> '已取消' AND data_user = ?", 
-            (data_user,)
+            (data_user,),
+            columns=('ID',)
         )
         data = [[record.ID] for record in records]
         return jsonify(data), 200
@@ -57,8 +61,7 @@ def selectNotEndID(data_user):
 @youpin898BuyV1.route('/getCount/<data_user>', methods=['get'])
 def getCount(data_user):
     try:
-        records = YyypBuyModel.find_all("data_user = ?", (data_user,))
-        data = str(len(records))
+        data = str(YyypBuyModel.count("data_user = ?", (data_user,)))
         return data, 200
     except Exception as e:
         print(f"查询记录数量失败: {e}")
@@ -71,20 +74,21 @@ def updateBuyData():
         weapon_ID = data['ID']
         weapon_status = data['weapon_status']
         
-        # 更新yyyp_buy表
-        yyyp_record = YyypBuyModel.find_by_id(ID=weapon_ID)
-        if yyyp_record:
-            yyyp_record.status = weapon_status
-            yyyp_saved = yyyp_record.save()
-        else:
-            return "记录不存在", 404
-        
-        # 更新通用buy表
-        buy_records = BuyModel.find_all("ID LIKE ? AND [from] = 'yyyp'", (f"{weapon_ID}%",))
-        for buy_record in buy_records:
-            buy_record.status = weapon_status
-            buy_record.save()
+        with DatabaseManager().transaction():
+            # 更新yyyp_buy表
+            yyyp_record = YyypBuyModel.find_by_id(ID=weapon_ID)
+            if yyyp_record:
+                yyyp_record.status = weapon_status
+                yyyp_saved = yyyp_record.save()
+            else:
+                return "记录不存在", 404
         
+            # 更新通用buy表
+            buy_records = BuyModel.find_all("ID LIKE ? AND [from] = 'yyyp'", (f"{weapon_ID}%",))
+            for buy_record in buy_records:
+                buy_record.status = weapon_status
+                buy_record.save()
+
         if yyyp_saved:
             return jsonify({'success': True, 'message': '更新成功'}), 200
         else:
@@ -129,54 +133,60 @@ def insert_webside_buydata():
         payment = data['payment']
         tradeType = data['tradeType']
 
-        # 插入到yyyp_buy表
-        print(f"插入悠悠有品购买记录到yyyp_buy表，ID: {ID}")
-        yyyp_buy_record = YyypBuyModel()
-        yyyp_buy_record.ID = ID
-        yyyp_buy_record.weapon_name = weapon_name
-        yyyp_buy_record.weapon_type = weapon_type
-        yyyp_buy_record.item_name = item_name
-        yyyp_buy_record.weapon_float = weapon_float
-        yyyp_buy_record.float_range = float_range
-        yyyp_buy_record.price = price
-        yyyp_buy_record.seller_name = seller_name
-        yyyp_buy_record.order_time = order_time
-        yyyp_buy_record.status = status
-        yyyp_buy_record.status_sub = status_sub
-        yyyp_buy_record.steam_id = steamid
-        yyyp_buy_record.buy_number = buy_number
-        yyyp_buy_record.err_number = err_number
-        yyyp_buy_record.price_all = price_all
-        yyyp_buy_record.payment = payment
-        yyyp_buy_record.trade_type = tradeType
-        yyyp_buy_record.data_user = data_user
-        setattr(yyyp_buy_record, 'from', 'yyyp')
-        yyyp_saved = yyyp_buy_record.save()
-        print(f"yyyp_buy表保存结果: {yyyp_saved}")
+        # yyyp_buy 与 buy 表在同一个事务中写入，任一失败则整体回滚
+        yyyp_saved = buy_saved = False
+        with DatabaseManager().transaction():
+            # 插入到yyyp_buy表
+            print(f"插入悠悠有品购买记录到yyyp_buy表，ID: {ID}")
+            yyyp_buy_record = YyypBuyModel()
+            yyyp_buy_record.ID = ID
+            yyyp_buy_record.weapon_name = weapon_name
+            yyyp_buy_record.weapon_type = weapon_type
+            yyyp_buy_record.item_name = item_name
+            yyyp_buy_record.weapon_float = weapon_float
+            yyyp_buy_record.float_range = float_range
+            yyyp_buy_record.price = price
+            yyyp_buy_record.seller_name = seller_name
+            yyyp_buy_record.order_time = order_time
+            yyyp_buy_record.status = status
+            yyyp_buy_record.status_sub = status_sub
+            yyyp_buy_record.steam_id = steamid
+            yyyp_buy_record.buy_number = buy_number
+            yyyp_buy_record.err_number = err_number
+            yyyp_buy_record.price_all = price_all
+            yyyp_buy_record.payment = payment
+            yyyp_buy_record.trade_type = tradeType
+            yyyp_buy_record.data_user = data_user
+            setattr(yyyp_buy_record, 'from', 'yyyp')
+            yyyp_saved = yyyp_buy_record.save(mode='upsert')
+            print(f"yyyp_buy表保存结果: {yyyp_saved}")
         
-        # 如果buy_number为1，也插入到通用buy表
-        buy_saved = True
-        if buy_number == 1:
-            print(f"插入购买记录到buy表，ID: {ID}")
-            buy_record = BuyModel()
-            buy_record.ID = ID
-            buy_record.weapon_name = weapon_name
-            buy_record.weapon_type = weapon_type
-            buy_record.item_name = item_name
-            buy_record.weapon_float = weapon_float
-            buy_record.float_range = float_range
-            buy_record.price = price
-            buy_record.seller_name = seller_name
-            buy_record.status = status
-            buy_record.status_sub = status_sub
-            buy_record.steam_id = steamid
-            buy_record.order_time = order_time
-            buy_record.payment = payment
-            buy_record.trade_type = tradeType
-            buy_record.data_user = data_user
-            setattr(buy_record, 'from', 'yyyp')
-            buy_saved = buy_record.save()
-            print(f"buy表保存结果: {buy_saved}")
+            # 如果buy_number为1，也插入到通用buy表
+            buy_saved = True
+            if buy_number == 1:
+                print(f"插入购买记录到buy表，ID: {ID}")
+                buy_record = BuyModel()
+                buy_record.ID = ID
+                buy_record.weapon_name = weapon_name
+                buy_record.weapon_type = weapon_type
+                buy_record.item_name = item_name
+                buy_record.weapon_float = weapon_float
+                buy_record.float_range = float_range
+                buy_record.price = price
+                buy_record.seller_name = seller_name
+                buy_record.status = status
+                buy_record.status_sub = status_sub
+                buy_record.steam_id = steamid
+                buy_record.order_time = order_time
+                buy_record.payment = payment
+                buy_record.trade_type = tradeType
+                buy_record.data_user = data_user
+                setattr(buy_record, 'from', 'yyyp')
+                buy_saved = buy_record.save(mode='upsert')
+                print(f"buy表保存结果: {buy_saved}")
+
+            if not (yyyp_saved and buy_saved):
+                raise TransactionRollback()
 
         if yyyp_saved and buy_saved:
             return jsonify({
@@ -242,7 +252,7 @@ def insert_main_buydata():
         buy_record.data_user = data_user
         setattr(buy_record, 'from', 'yyyp')  # from是Python保留关键字，使用setattr设置
         
-        buy_saved = buy_record.save()
+        buy_saved = buy_record.save(mode='upsert')
         print(f"buy表保存结果: {buy_saved}")
 
         if buy_saved:
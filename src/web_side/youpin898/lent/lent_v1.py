@@ -2,6 +2,7 @@ from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.now_time import today
 from src.db_manager.yyyp.yyyp_lent import YyypLentModel
+from src.db_manager.timestamps import to_epoch
 import requests
 
 youpin898LentV1 = Blueprint('youpin898LentV1', __name__)
@@ -10,11 +11,12 @@ youpin898LentV1 = Blueprint('youpin898LentV1', __name__)
 def getNowLentingList():
     """获取当前需要更新状态的租赁订单列表（未完成且已到达或超过结束时间的订单）"""
     try:
-        # 查询所有未完成、有结束时间且已到达结束时间的订单
-        current_time = today()
+        # 查询所有未完成、有结束时间且已到达结束时间的订单（结束时间不晚于今天零点，在时间戳列上比较）
+        current_time = to_epoch(today())
         records = YyypLentModel.find_all(
-            where="status NOT IN ('完成') AND lean_end_time IS NOT NULL AND lean_end_time <= ?",
-            params=(current_time,)
+            where="status NOT IN ('完成') AND lean_end_time_ts <= ?",
+            params=(current_time,),
+            columns=('ID',)
         )
         data = [[record.ID] for record in records]
         return jsonify(data), 200
@@ -30,8 +32,9 @@ def getTimeOutLent():
     try:
         # 使用模型查询超时订单
         records = YyypLentModel.find_all(
-            where="lean_end_time < ? AND status IN ('白玩中', '归还中', '租赁中')",
-            params=(today(),)
+            where="lean_end_time_ts < ? AND status IN ('白玩中', '归还中', '租赁中')",
+            params=(to_epoch(today()),),
+            columns=('ID',)
         )
         # 返回ID列表，格式与原来保持一致
         data = [[record.ID] for record in records]
@@ -163,11 +166,6 @@ def insert_webside_lentdata():
         max_Lease_Days = int(data.get('leaseMaxDays', totalLeaseDays))
         data_user = data.get('data_user', '')
         
-        # 检查记录是否已存在
-        existing_record = YyypLentModel.find_by_id(ID=ID)
-        if existing_record:
-            return '重复数据', 200
-        
         # 使用模型创建新记录
         lent_record = YyypLentModel(
             ID=ID,
@@ -190,11 +188,10 @@ def insert_webside_lentdata():
             data_user=data_user
         )
         
-        # 保存到数据库
-        if lent_record.save():
-            return '写入成功', 200
-        else:
-            return '写入失败', 500
+        # 保存到数据库，已存在的订单保持不变（ON CONFLICT DO NOTHING，不再先查询）
+        if YyypLentModel.upsert_many([lent_record], update=False) == 0:
+            return '重复数据', 200
+        return '写入成功', 200
             
     except Exception as e:
         print(f"插入租赁数据失败: {e}")
@@ -210,14 +210,21 @@ def batchInsertOrUpdate():
         # 获取平台参数，默认为yyyp
         platform = request.args.get('platform', 'yyyp')
         
-        success_count = WeaponClassIDModel.batch_insert_or_update(data, platform=platform)
+        result = None
+        if platform == 'steam':
+            success_count = WeaponClassIDModel.batch_insert_or_update(data, platform=platform)
+        else:
+            # 一个事务内按 steam_hash_name 集合合并
+            result = WeaponClassIDModel.merge_catalog(data, 'yyyp')
+            success_count = result['inserted'] + result['updated'] + result['unchanged']
         
         return jsonify({
             'success': True,
             'message': f'成功处理 {success_count}/{len(data)} 条数据',
             'success_count': success_count,
             'total_count': len(data),
-            'platform': platform
+            'platform': platform,
+            'merge': result
         }), 200
     except Exception as e:
         print(f"批量插入或更新武器数据失败: {e}")
@@ -1,18 +1,25 @@
 from flask import jsonify, request, Blueprint
 from src.log import Log
 from src.execution_db import Date_base
+from src.db_manager.database import DatabaseManager, TransactionRollback
 from src.db_manager.yyyp.yyyp_sell import YyypSellModel
 from src.db_manager.index.sell import SellModel
+from src.db_manager.search import search_condition
 import requests
 
 youpin898SellV1 = Blueprint('youpin898SellV1/', __name__)
 
+# 通用 sell 表列表接口返回的列
+LIST_COLUMNS = ('ID', 'item_name', 'weapon_name', 'weapon_type', 'weapon_float', 'float_range',
+                'price', 'from', 'order_time', 'status')
+
 @youpin898SellV1.route('/getWeaponNotEndStatusList/<data_user>', methods=['get'])
 def getWeaponNotEndStatusList(data_user):
     try:
         records = YyypSellModel.find_all(
             "status NOT IN ('已完成', '已取消') AND data_user = ?", 
-            (data_user,)
+            (data_user,),
+            columns=('ID',)
         )
         data = [[record.ID] for record in records]
         return jsonify(data), 200
@@ -34,29 +41,30 @@ def updateSellData():
         if not weapon_ID or not weapon_status:
             return jsonify({'success': False, 'error': '缺少必需参数ID或weapon_status'}), 400
         
-        # 更新yyyp_sell表
-        yyyp_record = YyypSellModel.find_by_id(ID=weapon_ID)
-        if yyyp_record:
-            yyyp_record.status = weapon_status
-            if weapon_status_sub is not None:
-                yyyp_record.status_sub = weapon_status_sub
-            yyyp_saved = yyyp_record.save()
-            print(f"更新yyyp_sell表成功: ID={weapon_ID}, status={weapon_status}, status_sub={weapon_status_sub}")
-        else:
-            print(f"yyyp_sell表中未找到记录: ID={weapon_ID}")
-            return jsonify({'success': False, 'error': 'yyyp_sell表中记录不存在'}), 404
-        
-        # 更新通用sell表
-        sell_records = SellModel.find_all("ID LIKE ? AND \"from\" = 'yyyp'", (f"{weapon_ID}%",))
-        sell_updated_count = 0
-        for sell_record in sell_records:
-            sell_record.status = weapon_status
-            if weapon_status_sub is not None:
-                sell_record.status_sub = weapon_status_sub
-            sell_record.save()
-            sell_updated_count += 1
-        print(f"更新通用sell表成功: 共更新{sell_updated_count}条记录")
+        with DatabaseManager().transaction():
+            # 更新yyyp_sell表
+            yyyp_record = YyypSellModel.find_by_id(ID=weapon_ID)
+            if yyyp_record:
+                yyyp_record.status = weapon_status
+                if weapon_status_sub is not None:
+                    yyyp_record.status_sub = weapon_status_sub
+                yyyp_saved = yyyp_record.save()
+                print(f"更新yyyp_sell表成功: ID={weapon_ID}, status={weapon_status}, status_sub={weapon_status_sub}")
+            else:
+                print(f"yyyp_sell表中未找到记录: ID={weapon_ID}")
+                return jsonify({'success': False, 'error': 'yyyp_sell表中记录不存在'}), 404
         
+            # 更新通用sell表
+            sell_records = SellModel.find_all("ID LIKE ? AND \"from\" = 'yyyp'", (f"{weapon_ID}%",))
+            sell_updated_count = 0
+            for sell_record in sell_records:
+                sell_record.status = weapon_status
+                if weapon_status_sub is not None:
+                    sell_record.status_sub = weapon_status_sub
+                sell_record.save()
+                sell_updated_count += 1
+            print(f"更新通用sell表成功: 共更新{sell_updated_count}条记录")
+
         if yyyp_saved:
             return jsonify({'success': True, 'message': '更新成功'}), 200
         else:
@@ -73,7 +81,8 @@ def selectApexTime(data_user):
         records = YyypSellModel.find_all(
             "data_user = ? ORDER BY order_time DESC", 
             (data_user,), 
-            limit=1
+            limit=1,
+            columns=('order_time',)
         )
         if records:
             data = str(records[0].order_time)
@@ -87,8 +96,7 @@ def selectApexTime(data_user):
 @youpin898SellV1.route('/getCount/<data_user>', methods=['get'])
 def getCount(data_user):
     try:
-        records = YyypSellModel.find_all("data_user = ?", (data_user,))
-        data = str(len(records))
+        data = str(YyypSellModel.count("data_user = ?", (data_user,)))
         return data, 200
     except Exception as e:
         print(f"查询记录数量失败: {e}")
@@ -138,54 +146,60 @@ def insert_webside_selldata():
             err_number = None
         price_all = data['price_all']
 
-        # 插入到yyyp_sell表
-        print(f"插入悠悠有品销售记录到yyyp_sell表，ID: {ID}")
-        yyyp_sell_record = YyypSellModel()
-        yyyp_sell_record.ID = ID
-        yyyp_sell_record.weapon_name = weapon_name
-        yyyp_sell_record.weapon_type = weapon_type
-        yyyp_sell_record.item_name = item_name
-        yyyp_sell_record.weapon_float = weapon_float
-        yyyp_sell_record.float_range = float_range
-        yyyp_sell_record.price = price
-        yyyp_sell_record.price_original = price_original
-        yyyp_sell_record.buyer_name = buyer_user_name
-        yyyp_sell_record.status = status
-        yyyp_sell_record.status_sub = status_sub
-        yyyp_sell_record.order_time = order_time
-        yyyp_sell_record.steam_id = steamid
-        yyyp_sell_record.sell_number = sell_number
-        yyyp_sell_record.err_number = err_number
-        yyyp_sell_record.price_all = price_all
-        yyyp_sell_record.data_user = data_user
-        setattr(yyyp_sell_record, 'from', 'yyyp')
+        # yyyp_sell 与 sell 表在同一个事务中写入，任一失败则整体回滚
+        yyyp_saved = sell_saved = False
+        with DatabaseManager().transaction():
+            # 插入到yyyp_sell表
+            print(f"插入悠悠有品销售记录到yyyp_sell表，ID: {ID}")
+            yyyp_sell_record = YyypSellModel()
+            yyyp_sell_record.ID = ID
+            yyyp_sell_record.weapon_name = weapon_name
+            yyyp_sell_record.weapon_type = weapon_type
+            yyyp_sell_record.item_name = item_name
+            yyyp_sell_record.weapon_float = weapon_float
+            yyyp_sell_record.float_range = float_range
+            yyyp_sell_record.price = price
+            yyyp_sell_record.price_original = price_original
+            yyyp_sell_record.buyer_name = buyer_user_name
+            yyyp_sell_record.status = status
+            yyyp_sell_record.status_sub = status_sub
+            yyyp_sell_record.order_time = order_time
+            yyyp_sell_record.steam_id = steamid
+            yyyp_sell_record.sell_number = sell_number
+            yyyp_sell_record.err_number = err_number
+            yyyp_sell_record.price_all = price_all
+            yyyp_sell_record.data_user = data_user
+            setattr(yyyp_sell_record, 'from', 'yyyp')
         
-        yyyp_saved = yyyp_sell_record.save()
-        print(f"yyyp_sell表保存结果: {yyyp_saved}")
+            yyyp_saved = yyyp_sell_record.save(mode='upsert')
+            print(f"yyyp_sell表保存结果: {yyyp_saved}")
 
-        # 初始化sell_saved变量
-        sell_saved = True
-        if sell_number == 1:
-            print(f"插入销售记录到sell表，ID: {ID}")
-            sell_record = SellModel()
-            sell_record.ID = ID
-            sell_record.weapon_name = weapon_name
-            sell_record.weapon_type = weapon_type
-            sell_record.item_name = item_name
-            sell_record.weapon_float = weapon_float
-            sell_record.float_range = float_range
-            sell_record.price = price
-            sell_record.price_original = price_original
-            sell_record.buyer_name = buyer_user_name
-            sell_record.status = status
-            sell_record.status_sub = status_sub
-            sell_record.order_time = order_time
-            sell_record.steam_id = steamid
-            sell_record.data_user = data_user
-            setattr(sell_record, 'from', 'yyyp')
+            # 初始化sell_saved变量
+            sell_saved = True
+            if sell_number == 1:
+                print(f"插入销售记录到sell表，ID: {ID}")
+                sell_record = SellModel()
+                sell_record.ID = ID
+                sell_record.weapon_name = weapon_name
+                sell_record.weapon_type = weapon_type
+                sell_record.item_name = item_name
+                sell_record.weapon_float = weapon_float
+                sell_record.float_range = float_range
+                sell_record.price = price
+                sell_record.price_original = price_original
+                sell_record.buyer_name = buyer_user_name
+                sell_record.status = status
+                sell_record.status_sub = status_sub
+                sell_record.order_time = order_time
+                sell_record.steam_id = steamid
+                sell_record.data_user = data_user
+                setattr(sell_record, 'from', 'yyyp')
             
-            sell_saved = sell_record.save()
-            print(f"sell表保存结果: {sell_saved}")
+                sell_saved = sell_record.save(mode='upsert')
+                print(f"sell表保存结果: {sell_saved}")
+
+            if not (yyyp_saved and sell_saved):
+                raise TransactionRollback()
 
         if yyyp_saved and sell_saved:
             return jsonify({
@@ -259,7 +273,7 @@ def insert_main_selldata():
         sell_record.data_user = data_user
         setattr(sell_record, 'from', data_from)
         
-        sell_saved = sell_record.save()
+        sell_saved = sell_record.save(mode='upsert')
         print(f"sell表保存结果: {sell_saved}")
 
         if sell_saved:
@@ -286,8 +300,7 @@ def insert_main_selldata():
 @youpin898SellV1.route('/countSellNumber', methods=['get'])
 def countSellNumber():
     try:
-        records = SellModel.find_all()
-        count = len(records)
+        count = SellModel.count()
         return jsonify({"count": count}), 200
     except Exception as e:
         print(f"查询销售数量失败: {e}")
@@ -300,7 +313,8 @@ def getSellData(min, max):
             "1=1 ORDER BY order_time DESC", 
             (), 
             limit=max, 
-            offset=min
+            offset=min,
+            columns=LIST_COLUMNS
         )
         data = []
         for record in records:
@@ -317,9 +331,11 @@ def getSellData(min, max):
 @youpin898SellV1.route('/selectSellWeaponName/<itemName>', methods=['get'])
 def selectSellWeaponName(itemName):
     try:
+        condition, params = search_condition('sell', itemName)
         records = SellModel.find_all(
-            "item_name LIKE ? OR weapon_name LIKE ?", 
-            (f"%{itemName}%", f"%{itemName}%")
+            condition,
+            tuple(params),
+            columns=LIST_COLUMNS
         )
         data = []
         for record in records:
@@ -341,14 +357,16 @@ def getSellDataByStatus(status, min, max):
                 "1=1 ORDER BY order_time DESC", 
                 (), 
                 limit=max, 
-                offset=min
+                offset=min,
+                columns=LIST_COLUMNS
             )
         else:
             records = SellModel.find_all(
                 "status = ? ORDER BY order_time DESC", 
                 (status,), 
                 limit=max, 
-                offset=min
+                offset=min,
+                columns=LIST_COLUMNS
             )
         
         data = []